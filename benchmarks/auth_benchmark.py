@@ -0,0 +1,58 @@
+"""Benchmark of the CPU spent adding the access token to each request.
+
+Compares decoding and re-encoding the body (the original behaviour) with
+splicing the token into the body and sending it in a bearer header.
+
+Run from the root of the repository:
+
+    python benchmarks/auth_benchmark.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.oauth import OAuth2Tokens
+
+ITERATIONS = 20000
+TOKEN = 'f' * 64
+
+class Request(object):
+    def __init__(self, body):
+        self.body = body
+        self.headers = {}
+
+def reencode_body(r):
+    """The original implementation of OAuth2Tokens.__call__"""
+    body = json.loads(r.body)
+    body.update({'access_token': TOKEN})
+    r.body = json.dumps(body)
+    return r
+
+def user_payload():
+    fixture = os.path.join(os.path.dirname(__file__), '..', 'tests',
+                           'fixtures', 'users', 'search.json')
+    with open(fixture, 'r') as file_handle:
+        users = json.load(file_handle)
+    return json.dumps({'user': users[0], 'users': users})
+
+def time_auth(auth, body):
+    seconds = timeit.timeit(lambda: auth(Request(body)), number=ITERATIONS)
+    return seconds / ITERATIONS * 1e6
+
+def main():
+    payloads = [('GET with {} body', '{}'),
+                ('update_user sized body', user_payload())]
+    auths = [('decode and re-encode', reencode_body),
+             ('splice into body', OAuth2Tokens(TOKEN, mode='body')),
+             ('bearer header', OAuth2Tokens(TOKEN, mode='header'))]
+
+    for name, body in payloads:
+        print "%s (%d bytes)" % (name, len(body))
+        for auth_name, auth in auths:
+            print "    %-22s %8.2fus/request" % (auth_name, time_auth(auth, body))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark of the memory used to hold search results as dicts or records.
+
+Builds a list of synthetic users/search results in two fresh processes:
+once as the dicts returned by json, and once as User records, as
+CsaAPI(records=True) returns them. The growth in RSS of each process is
+printed along with the approximate cost of each result.
+
+Run from the root of the repository:
+
+    python benchmarks/record_memory_benchmark.py [records]
+"""
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.records import User, TIMESTAMP_FORMAT
+
+RECORDS = 200000
+START = datetime.datetime(2014, 11, 25, 14, 15, 30)
+
+def rss_kb():
+    """Get the current resident set size of this process"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+def timestamp(i):
+    """Get a distinct timestamp for each user, a few seconds apart"""
+    moment = START + datetime.timedelta(seconds=i * 7, milliseconds=i % 1000)
+    return moment.strftime(TIMESTAMP_FORMAT)[:-4] + 'Z'
+
+def user_json(i):
+    """Encode a user shaped like users/search.json"""
+    return json.dumps({
+        'id': i,
+        'firstname': 'Firstname%d' % (i % 500),
+        'surname': 'Surname%d' % i,
+        'phone': '01970 622422',
+        'grad_year': 1970 + i % 45,
+        'jobs': i % 2 == 0,
+        'email': 'user%d@aber.ac.uk' % i,
+        'created_at': timestamp(i),
+        'updated_at': timestamp(i + 3600)
+    })
+
+def build(mode, records):
+    """Decode the users and return the growth in RSS holding them"""
+    before = rss_kb()
+    if mode == 'records':
+        users = [User.from_dict(json.loads(user_json(i)))
+                 for i in xrange(records)]
+    else:
+        users = [json.loads(user_json(i)) for i in xrange(records)]
+    return rss_kb() - before
+
+def measure(mode, records):
+    """Build the users in a new process and report its RSS growth"""
+    output = subprocess.check_output([sys.executable, __file__, '--build',
+                                      mode, str(records)])
+    return json.loads(output)
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    print "Holding %d users" % records
+    for mode in ('dicts', 'records'):
+        growth_kb = measure(mode, records)
+        print "%-8s RSS growth %7.1f MB, %5d bytes per user" % (
+            mode, growth_kb / 1024.0, growth_kb * 1024 / records)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--build']:
+        print json.dumps(build(sys.argv[2], int(sys.argv[3])))
+    else:
+        main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark comparing uri building with and without the route table.
+
+Run from the root of the repository:
+
+    python benchmarks/route_benchmark.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.constants import *
+from csa_client.request_handler import RequestHandler
+
+ITERATIONS = 200000
+
+def build_uri_with_regex(end_point, params={}):
+    """The original per-call implementation of _build_end_point_uri"""
+    if end_point not in END_POINTS:
+        raise KeyError("Unsupported application endpoint: %s" % end_point)
+
+    uri = end_point + '.' + CONTENT_TYPE
+    for key, value in params.iteritems():
+        if key in uri:
+            uri = re.sub(key, str(value), uri)
+
+    if ":" in uri:
+        raise ValueError("Some parameters were not replaced in uri.")
+
+    return PROTOCOL + ":".join((DOMAIN, PORT)) + uri
+
+def main():
+    params = {':id': 39}
+    regex_time = timeit.timeit(
+        lambda: build_uri_with_regex('/users/show/:id', params),
+        number=ITERATIONS)
+    route_time = timeit.timeit(
+        lambda: RequestHandler._build_end_point_uri('/users/show/:id', params),
+        number=ITERATIONS)
+
+    print "Building /users/show/:id %d times" % ITERATIONS
+    print "regex substitution: %.3fs (%.2fus/call)" % (regex_time, regex_time / ITERATIONS * 1e6)
+    print "route table:        %.3fs (%.2fus/call)" % (route_time, route_time / ITERATIONS * 1e6)
+    print "speedup:            %.1fx" % (regex_time / route_time)
+
+if __name__ == "__main__":
+    main()
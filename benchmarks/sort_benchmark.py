@@ -0,0 +1,43 @@
+"""Benchmark of selecting the first page of a large search result.
+
+Sorts synthetic users/search results by surname then descending id, and
+keeps the first 20, as 'users search --sort-by surname,-id --limit 20'
+does. This is compared with a full sort followed by a slice.
+
+Run from the root of the repository:
+
+    python benchmarks/sort_benchmark.py [records]
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.command import sort_json
+
+RECORDS = 200000
+LIMIT = 20
+REPEAT = 5
+
+def make_users(records):
+    random.seed(0)
+    return [{'id': i if i % 2 else str(i), 'surname': 'Surname%d' % random.randint(0, 5000)}
+            for i in xrange(records)]
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    users = make_users(records)
+    sort_keys = [('surname', False), ('id', True)]
+    assert sort_json(users, sort_keys)[:LIMIT] == sort_json(users, sort_keys, LIMIT)
+
+    full = min(timeit.repeat(lambda: sort_json(users, sort_keys)[:LIMIT],
+                             number=1, repeat=REPEAT))
+    top = min(timeit.repeat(lambda: sort_json(iter(users), sort_keys, LIMIT),
+                            number=1, repeat=REPEAT))
+    print "First %d of %d users, best of %d" % (LIMIT, records, REPEAT)
+    print "full sort %.3fs, top-k %.3fs (%.1fx)" % (full, top, full / top)
+
+if __name__ == "__main__":
+    main()
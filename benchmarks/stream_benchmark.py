@@ -0,0 +1,88 @@
+"""Benchmark of peak memory when decoding a large search response.
+
+Writes a synthetic users/search response with 1,000,000 records and then
+decodes it in two fresh processes: once with json.loads on the whole body,
+as response.json() does, and once with iter_json_array reading 64KB chunks,
+as CsaAPI.iter_users_search does. The peak RSS of each process is printed.
+
+Run from the root of the repository:
+
+    python benchmarks/stream_benchmark.py [records]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.constants import STREAM_CHUNK_SIZE
+from csa_client.json_stream import iter_json_array
+
+RECORDS = 1000000
+
+def write_fixture(path, records):
+    """Write a JSON array of user records shaped like users/search.json"""
+    with open(path, 'wb') as file_handle:
+        file_handle.write('[')
+        for i in xrange(records):
+            if i:
+                file_handle.write(',')
+            file_handle.write(json.dumps({
+                'id': i,
+                'firstname': 'Firstname%d' % i,
+                'surname': 'Surname%d' % i,
+                'phone': '01970 622422',
+                'grad_year': 1970 + i % 45,
+                'jobs': i % 2 == 0,
+                'email': 'user%d@aber.ac.uk' % i,
+                'created_at': '2014-11-25T14:15:30.777Z',
+                'updated_at': '2014-11-25T14:15:30.777Z'
+            }))
+        file_handle.write(']')
+
+def decode(mode, path):
+    """Decode the fixture and return how many records were found"""
+    with open(path, 'rb') as file_handle:
+        if mode == 'buffered':
+            return len(json.loads(file_handle.read()))
+
+        chunks = iter(lambda: file_handle.read(STREAM_CHUNK_SIZE), '')
+        return sum(1 for user in iter_json_array(chunks))
+
+def measure(mode, path):
+    """Decode the fixture in a new process and report its peak RSS"""
+    output = subprocess.check_output([sys.executable, __file__, '--decode',
+                                      mode, path])
+    return json.loads(output)
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+
+    try:
+        write_fixture(path, records)
+        print "Decoding %d records (%.1f MB)" % (records, os.path.getsize(path) / 1e6)
+        for mode in ('buffered', 'stream'):
+            result = measure(mode, path)
+            print "%-9s peak RSS %7.1f MB, %6.2fs, %d records" % (
+                mode, result['max_rss_kb'] / 1024.0, result['seconds'],
+                result['records'])
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--decode']:
+        start = time.time()
+        count = decode(sys.argv[2], sys.argv[3])
+        print json.dumps({
+            'records': count,
+            'seconds': time.time() - start,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        })
+    else:
+        main()
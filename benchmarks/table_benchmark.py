@@ -0,0 +1,83 @@
+"""Benchmark of cohort and posting rate reports over dicts and a ColumnTable.
+
+Builds synthetic users/search and broadcasts/search results and times two
+reports over them: the number of users with jobs in each graduation year,
+and the number of broadcasts posted by each user, sorted by count. Each
+report is run over the list of dicts and over a ColumnTable.
+
+Run from the root of the repository:
+
+    python benchmarks/table_benchmark.py [records]
+"""
+import collections
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from csa_client.table import ColumnTable
+
+RECORDS = 200000
+REPEAT = 5
+
+def make_users(records):
+    return [{
+        'id': i,
+        'firstname': u'Firstname%d' % (i % 500),
+        'surname': u'Surname%d' % i,
+        'phone': u'01970 622422',
+        'grad_year': 1970 + i % 45,
+        'jobs': i % 3 == 0,
+        'email': u'user%d@aber.ac.uk' % i,
+        'created_at': u'2014-11-25T14:15:30.777Z',
+        'updated_at': u'2014-11-25T14:15:30.777Z'
+    } for i in xrange(records)]
+
+def make_broadcasts(records):
+    return [{
+        'id': i,
+        'user_id': i % 1000,
+        'content': u'Broadcast %d' % (i % 50),
+        'created_at': u'2014-11-30T20:00:45.237Z',
+        'updated_at': u'2014-11-30T20:00:45.237Z'
+    } for i in xrange(records)]
+
+def cohorts_dicts(users):
+    return collections.Counter(user['grad_year'] for user in users
+                               if user['jobs'])
+
+def cohorts_table(users):
+    return users.filter('jobs', bool).count_by('grad_year')
+
+def posting_rates_dicts(broadcasts):
+    return collections.Counter(b['user_id'] for b in broadcasts).most_common()
+
+def posting_rates_table(broadcasts):
+    return broadcasts.count_by('user_id').most_common()
+
+def best(function, data):
+    return min(timeit.repeat(lambda: function(data), number=1, repeat=REPEAT))
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    users = make_users(records)
+    broadcasts = make_broadcasts(records)
+    user_table = ColumnTable.from_dicts(users)
+    broadcast_table = ColumnTable.from_dicts(broadcasts)
+
+    assert cohorts_dicts(users) == cohorts_table(user_table)
+    assert (dict(posting_rates_dicts(broadcasts)) ==
+            dict(posting_rates_table(broadcast_table)))
+
+    print "Reports over %d records, best of %d" % (records, REPEAT)
+    for name, dicts, table in (
+            ('cohorts', cohorts_dicts, cohorts_table),
+            ('posting rates', posting_rates_dicts, posting_rates_table)):
+        dict_time = best(dicts, users if name == 'cohorts' else broadcasts)
+        table_time = best(table, user_table if name == 'cohorts' else broadcast_table)
+        print "%-14s dicts %.4fs, table %.4fs (%.1fx)" % (
+            name, dict_time, table_time, dict_time / table_time)
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,64 @@ __author__ = 'Samuel Jackson'
 __license__ = 'MIT'
 __copyright__ = 'Copyright 2014 Samuel Jackson'
 
-try:
-    from .request_handler import RequestHandler
-    from .api import CsaAPI
-    from .oauth import OAuth2ResourceOwner
-    from .command import cli
-    from .constants import *
-except:
-    pass
+import importlib
+import sys
+from types import ModuleType
+
+from .constants import *
+
+# Module each public class is imported from the first time it is used, so
+# importing the package, as the CLI does on every run, does not load
+# requests and everything else the api needs.
+_LAZY_ATTRIBUTES = {
+    'RequestHandler': 'request_handler',
+    'TransportConfig': 'transport',
+    'CsaAPI': 'api',
+    'AsyncCsaAPI': 'async_api',
+    'ResponseCache': 'cache',
+    'User': 'records',
+    'Broadcast': 'records',
+    'ColumnTable': 'table',
+    'Mirror': 'mirror',
+    'SearchIndex': 'search_index',
+    'OAuth2ResourceOwner': 'oauth',
+    'cli': 'command',
+}
 
 __all__ = [
     'constants',
     'CsaAPI',
-    'cli'
+    'AsyncCsaAPI',
+    'ResponseCache',
+    'User',
+    'Broadcast',
+    'ColumnTable',
+    'Mirror',
+    'SearchIndex',
+    'cli',
     'OAuth2ResourceOwner',
     'RequestHandler',
+    'TransportConfig',
 ]
+
+
+class _LazyModule(ModuleType):
+    """ The csa_client package, importing public classes when first used """
+
+    def __getattr__(self, name):
+        if name not in _LAZY_ATTRIBUTES:
+            raise AttributeError("'module' object has no attribute '%s'" % name)
+        module = importlib.import_module('.' + _LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES))
+
+
+# Keep the original module alive, its globals are used by _LazyModule
+_original_module = sys.modules[__name__]
+_lazy_module = _LazyModule(__name__)
+_lazy_module.__dict__.update(globals())
+sys.modules[__name__] = _lazy_module
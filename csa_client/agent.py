@@ -0,0 +1,240 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import errno
+import json
+import os
+import socket
+import threading
+import time
+import types
+import SocketServer
+
+import requests
+
+from token_cache import TokenCache
+from watch import watch
+from constants import *
+
+# CsaAPI methods which may be called through the agent
+AGENT_METHODS = (
+    'create_user', 'get_user', 'update_user', 'destroy_user', 'users_search',
+    'iter_users_search', 'users_search_page', 'iter_users_search_paged',
+    'create_broadcast', 'get_broadcast', 'broadcasts_search',
+    'iter_broadcasts_search', 'broadcasts_search_page',
+    'iter_broadcasts_search_paged', 'destroy_broadcast', 'make_coffee'
+)
+
+class AgentError(Exception):
+    """Raised when the agent fails to run a request for a reason other
+    than an HTTP or connection error."""
+    pass
+
+
+class AgentServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    """ Serves requests for an authenticated CsaAPI over a unix socket.
+
+    The agent keeps one CsaAPI, with its tokens, user id and open
+    connections, alive between CLI commands. Each line sent to the socket
+    is a JSON object naming the method to call and its arguments, and the
+    agent answers with one JSON line holding the result or the error.
+
+    :param api: the authenticated CsaAPI to forward requests to
+    :param path: path of the unix socket to listen on
+    """
+    daemon_threads = True
+
+    def __init__(self, api, path=AGENT_SOCKET):
+        self.api = api
+        self.path = path
+        self._cached_tokens = api.get_tokens()
+        self._tokens_lock = threading.Lock()
+
+        if os.path.exists(path):
+            if connect_agent(path) is not None:
+                raise AgentError("An agent is already running at %s" % path)
+            os.remove(path)
+
+        SocketServer.UnixStreamServer.__init__(self, path, AgentRequestHandler)
+
+    def server_bind(self):
+        # Create the socket readable only by this user, so no other user
+        # can connect before its permissions could be changed
+        umask = os.umask(0177)
+        try:
+            SocketServer.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+    def call(self, request):
+        """Run a request against the api and build the response for it
+
+        :param request: dict with the method name and its args
+        """
+        method = request.get('method')
+        if method == 'shutdown':
+            threading.Thread(target=self.shutdown).start()
+            return {'result': None}
+
+        if method not in AGENT_METHODS:
+            return {'error': "Unsupported agent method: %s" % method,
+                    'type': 'AgentError'}
+
+        try:
+            result = getattr(self.api, method)(*request.get('args', []))
+            if isinstance(result, types.GeneratorType):
+                result = list(result)
+        except requests.exceptions.HTTPError, e:
+            response = e.response
+            return {'error': str(e), 'type': 'HTTPError',
+                    'status': response.status_code if response is not None else None,
+                    'body': response.text if response is not None else None}
+        except requests.exceptions.ConnectionError, e:
+            return {'error': str(e), 'type': 'ConnectionError'}
+        except Exception, e:
+            return {'error': str(e), 'type': 'AgentError'}
+        finally:
+            self.cache_tokens()
+
+        if isinstance(result, requests.Response):
+            result = None
+        return {'result': result}
+
+    def cache_tokens(self):
+        """Write the api's tokens to the token cache if they have changed,
+        such as after a refresh or once the user id is resolved"""
+        tokens = self.api.get_tokens()
+        with self._tokens_lock:
+            if tokens == self._cached_tokens:
+                return
+            TokenCache.cache_tokens(tokens)
+            self._cached_tokens = tokens
+
+    def server_close(self):
+        self.cache_tokens()
+        SocketServer.UnixStreamServer.server_close(self)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class AgentRequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        for line in iter(self.rfile.readline, ''):
+            try:
+                response = self.server.call(json.loads(line))
+            except ValueError:
+                response = {'error': "Invalid agent request.", 'type': 'AgentError'}
+            self.wfile.write(json.dumps(response) + '\n')
+            self.wfile.flush()
+
+
+class AgentClient(object):
+    """ Calls the methods of the CsaAPI held by a running agent.
+
+    The client has the same request helpers as CsaAPI and raises the same
+    HTTP and connection errors.
+
+    :param path: path of the agent's unix socket
+    """
+    def __init__(self, path=AGENT_SOCKET):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.file = self.sock.makefile('rwb')
+
+    def __getattr__(self, name):
+        if name not in AGENT_METHODS:
+            raise AttributeError(name)
+
+        def call(*args):
+            return self.call(name, *args)
+        return call
+
+    def call(self, method, *args):
+        """Call a method on the agent's CsaAPI
+
+        :param method: name of the method to call
+        :param args: positional arguments for the method
+        """
+        self.file.write(json.dumps({'method': method, 'args': args}) + '\n')
+        self.file.flush()
+
+        line = self.file.readline()
+        if not line:
+            raise requests.exceptions.ConnectionError("Agent closed the connection.")
+
+        response = json.loads(line)
+        if 'error' not in response:
+            return response['result']
+
+        if response['type'] == 'HTTPError':
+            http_response = requests.Response()
+            http_response.status_code = response['status']
+            http_response._content = (response['body'] or '').encode('utf-8')
+            raise requests.exceptions.HTTPError(response['error'],
+                                                response=http_response)
+        if response['type'] == 'ConnectionError':
+            raise requests.exceptions.ConnectionError(response['error'])
+        raise AgentError(response['error'])
+
+    def watch_broadcasts(self, query='', last=None, **kwargs):
+        """Yield broadcasts matching a query as they are posted
+
+        Takes the same arguments as CsaAPI.watch_broadcasts, but each poll
+        is a full search made through the agent.
+        """
+        return watch(lambda since: self.broadcasts_search(query), last,
+                     **kwargs)
+
+    def shutdown(self):
+        """Ask the agent to stop serving"""
+        self.call('shutdown')
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def stop_agent(path=AGENT_SOCKET, timeout=AGENT_STOP_TIMEOUT):
+    """Stop a running agent and wait for it to exit
+
+    The agent caches its tokens as it exits, so once this returns they
+    will not be written over tokens cached afterwards.
+
+    :param path: path of the agent's unix socket
+    :param timeout: seconds to wait for the agent to exit
+    :returns: True if an agent was stopped, False if none was running
+    :raises AgentError: if the agent is still running after timeout
+    """
+    client = connect_agent(path)
+    if client is None:
+        return False
+    try:
+        client.shutdown()
+    finally:
+        client.close()
+
+    # The socket is removed once the agent has closed
+    deadline = time.time() + timeout
+    while os.path.exists(path):
+        if time.time() >= deadline:
+            raise AgentError("The agent at %s did not stop." % path)
+        time.sleep(0.05)
+    return True
+
+def connect_agent(path=AGENT_SOCKET):
+    """Connect to a running agent
+
+    :param path: path of the agent's unix socket
+    :returns: an AgentClient, or None if no agent is listening
+    """
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+
+    try:
+        return AgentClient(path)
+    except socket.error, e:
+        if e.errno in (errno.ECONNREFUSED, errno.ENOENT):
+            return None
+        raise
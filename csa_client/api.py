@@ -2,25 +2,57 @@ __author__ = "Samuel Jackson"
 __date__ = "November 26, 2014"
 __license__ = "MIT"
 
+import time
+
 from oauth import OAuth2ResourceOwner
 from token_cache import TokenCache
+from json_stream import iter_json_array
+from executor import WorkerPool
+from records import Record, User, Broadcast
+from table import ColumnTable
+from watch import watch
 from constants import *
 
+# Marks a response missing from the cache
+_MISSING = object()
+
 class CsaAPI(object):
     """ Access the REST resources on the CSA application.
 
+    :param tokens: cached oauth tokens. May include the user_id of their owner
     :param username: CSA application username
     :param password: CSA application password
+    :param lazy_verify: only ask the server for the user's id when a request
+                        needs it, rather than when the object is created
+    :param cache: optional ResponseCache used by the read request helpers.
+                  Writes through this object invalidate the cached entries.
+    :param http_cache: optional HTTPCache used to revalidate responses with
+                       the server rather than download them again.
+    :param records: return users and broadcasts as compact User and
+                    Broadcast records instead of dicts
     """
-    def __init__(self, tokens=None, username=None, password=None):
-        self.session = OAuth2ResourceOwner('/oauth/token')
+    def __init__(self, tokens=None, username=None, password=None,
+                 lazy_verify=False, cache=None, http_cache=None, records=False):
+        self.session = OAuth2ResourceOwner('/oauth/token', http_cache=http_cache)
+        self.cache = cache
+        self.records = records
+        self._user_id = None
 
         if username is None and password is None:
             self.session.set_tokens(tokens)
+            self._user_id = tokens.get('user_id')
         else:
             self.session.request_auth_with_client_credentials(username, password)
 
-        self.verify()
+        if self._user_id is None and not lazy_verify:
+            self.verify()
+
+    @property
+    def user_id(self):
+        """The id of the authorized user, fetched from the server if unknown"""
+        if self._user_id is None:
+            self.verify()
+        return self._user_id
 
     ###########################################################################
     # User request helpers
@@ -38,6 +70,7 @@ class CsaAPI(object):
         }
         user = {'user': user_params}
         self.session.make_request('/users/create', params=user)
+        self._invalidate('/users/search')
 
     def get_user(self, user_id=None):
         """Get a user record as an object
@@ -45,19 +78,29 @@ class CsaAPI(object):
         :param user_id: the id of the user to get.
         """
         user_id = self.user_id if user_id is None else user_id
+        user = self._get_cached('/users/show/:id', user_id)
+        if user is not _MISSING:
+            return self._as_records(User, user)
+
         response = self.session.make_request('/users/show/:id', {":id": user_id})
         user = response.json()
         user["id"] = user_id
-        return user
+        self._set_cached('/users/show/:id', user_id, user)
+        return self._as_records(User, user)
 
     def update_user(self, user):
         """Update a user record
 
-        :param user: The user to update.
+        :param user: The user to update, as a dict or User record.
         """
+        if isinstance(user, Record):
+            user = user.to_dict()
+
         self.session.make_request('/users/update/:id',
                           end_point_vars={":id": user["id"]},
                           params=user)
+        self._invalidate('/users/show/:id', user["id"])
+        self._invalidate('/users/search')
 
     def destroy_user(self, user_id=None):
         """Destory a user record
@@ -66,12 +109,61 @@ class CsaAPI(object):
         """
         user_id = self.user_id if user_id is None else user_id
         self.session.make_request('/users/destroy/:id', {":id": user_id})
+        self._invalidate('/users/show/:id', user_id)
+        self._invalidate('/users/search')
 
+    def users_search(self, query='', as_table=False):
+        """Search for users matching a query
 
-    def users_search(self, query=''):
-        response = self.session.make_request('/users/search', params={'q': query})
-        json_reponse = response.json()
-        return json_reponse
+        :param query: the search query
+        :param as_table: return the users as a ColumnTable
+        """
+        users = self._get_cached('/users/search', query)
+        if users is _MISSING:
+            response = self.session.make_request('/users/search',
+                                                 params={'q': query})
+            users = response.json()
+            self._set_cached('/users/search', query, users)
+
+        if as_table:
+            return ColumnTable.from_dicts(users)
+        return self._as_records(User, users)
+
+    def iter_users_search(self, query='', updated_since=None):
+        """Search for users, decoding the results one at a time
+
+        The response is streamed so memory use does not grow with the
+        number of users found.
+
+        :param query: the search query
+        :param updated_since: only find users updated at or after this
+                              updated_at timestamp
+        """
+        users = self._iter_search('/users/search', query, updated_since)
+        return self._as_records(User, users)
+
+    def users_search_page(self, query='', page=1, per_page=PAGE_SIZE):
+        """Get one page of the users matching a query
+
+        :param query: the search query
+        :param page: the page to get, starting from 1
+        :param per_page: the number of users on each page
+        """
+        users = self._search_page('/users/search', query, page, per_page)
+        return self._as_records(User, users)
+
+    def iter_users_search_paged(self, query='', page=1, per_page=PAGE_SIZE):
+        """Search for users a page at a time
+
+        The next page is fetched in the background while the users on the
+        current page are being processed.
+
+        :param query: the search query
+        :param page: the page to start from
+        :param per_page: the number of users to fetch in each request
+        """
+        users = self._iter_pages('/users/search', query, page, per_page)
+        return self._as_records(User, users)
 
     ###########################################################################
     # Broadcast request helpers
@@ -84,23 +176,100 @@ class CsaAPI(object):
         """
         broadcast['broadcast'].update({'user_id': self.user_id})
         self.session.make_request('/broadcasts/create', params=broadcast)
+        self._invalidate('/broadcasts/search')
 
     def get_broadcast(self, broadcast_id):
         """Get a broadcast record
 
         :param broadcast_id: the id of the broadcast to get.
         """
+        broadcast = self._get_cached('/broadcasts/show/:id', broadcast_id)
+        if broadcast is not _MISSING:
+            return self._as_records(Broadcast, broadcast)
+
         response = self.session.make_request('/broadcasts/show/:id',
                                     {":id": broadcast_id})
         json_reponse = response.json()
-        return json_reponse
+        self._set_cached('/broadcasts/show/:id', broadcast_id, json_reponse)
+        return self._as_records(Broadcast, json_reponse)
 
-    def broadcasts_search(self, query=''):
-        """Get all broadcasts on the server."""
-        response = self.session.make_request('/broadcasts/search',
-                                             params={'q': query})
-        json_reponse = response.json()
-        return json_reponse
+    def broadcasts_search(self, query='', as_table=False):
+        """Get all broadcasts on the server.
+
+        :param query: the search query
+        :param as_table: return the broadcasts as a ColumnTable
+        """
+        broadcasts = self._get_cached('/broadcasts/search', query)
+        if broadcasts is _MISSING:
+            response = self.session.make_request('/broadcasts/search',
+                                                 params={'q': query})
+            broadcasts = response.json()
+            self._set_cached('/broadcasts/search', query, broadcasts)
+
+        if as_table:
+            return ColumnTable.from_dicts(broadcasts)
+        return self._as_records(Broadcast, broadcasts)
+
+    def iter_broadcasts_search(self, query='', updated_since=None):
+        """Search for broadcasts, decoding the results one at a time
+
+        The response is streamed so memory use does not grow with the
+        number of broadcasts found.
+
+        :param query: the search query
+        :param updated_since: only find broadcasts updated at or after this
+                              updated_at timestamp
+        """
+        broadcasts = self._iter_search('/broadcasts/search', query,
+                                       updated_since)
+        return self._as_records(Broadcast, broadcasts)
+
+    def watch_broadcasts(self, query='', last=None, interval=WATCH_INTERVAL,
+                         max_interval=WATCH_MAX_INTERVAL, sleep=time.sleep,
+                         max_polls=None):
+        """Yield broadcasts matching a query as they are posted
+
+        The server is polled for broadcasts created after the newest one
+        seen. With an http_cache an unchanged search is answered with a 304
+        and not decoded again.
+
+        :param query: the search query
+        :param last: the last broadcast already seen. By default the
+                     broadcasts on the server when watching starts are skipped.
+        :param interval: shortest wait in seconds between polls
+        :param max_interval: longest wait in seconds between polls, reached
+                             while nothing new is posted
+        :param sleep: function used to wait between polls
+        :param max_polls: stop after this many polls, or None to watch forever
+        """
+        broadcasts = watch(lambda since: self._poll_broadcasts(query, since),
+                           last, interval, max_interval, sleep, max_polls)
+        return self._as_records(Broadcast, broadcasts)
+
+    def broadcasts_search_page(self, query='', page=1, per_page=PAGE_SIZE):
+        """Get one page of the broadcasts matching a query
+
+        :param query: the search query
+        :param page: the page to get, starting from 1
+        :param per_page: the number of broadcasts on each page
+        """
+        broadcasts = self._search_page('/broadcasts/search', query, page,
+                                       per_page)
+        return self._as_records(Broadcast, broadcasts)
+
+    def iter_broadcasts_search_paged(self, query='', page=1, per_page=PAGE_SIZE):
+        """Search for broadcasts a page at a time
+
+        The next page is fetched in the background while the broadcasts on
+        the current page are being processed.
+
+        :param query: the search query
+        :param page: the page to start from
+        :param per_page: the number of broadcasts to fetch in each request
+        """
+        broadcasts = self._iter_pages('/broadcasts/search', query, page,
+                                      per_page)
+        return self._as_records(Broadcast, broadcasts)
 
     def destroy_broadcast(self, broadcast_id):
         """Destory a broadcast record
@@ -108,6 +277,8 @@ class CsaAPI(object):
         :param broadcast_id: the id of the broadcast to destory.
         """
         self.session.make_request('/broadcasts/destroy/:id', {":id": broadcast_id})
+        self._invalidate('/broadcasts/show/:id', broadcast_id)
+        self._invalidate('/broadcasts/search')
 
     ###########################################################################
     # Misc
@@ -121,7 +292,120 @@ class CsaAPI(object):
         """Get the users id from the server """
         response = self.session.make_request('/users/verify')
         json_reponse = response.json()
-        self.user_id = json_reponse['id']
+        self._user_id = json_reponse['id']
+
+    def get_tokens(self):
+        """Get dictionary of tokens, including the user id if it is known"""
+        tokens = self.session.get_tokens()
+        if self._user_id is not None:
+            tokens['user_id'] = self._user_id
+        return tokens
 
     def get_session(self):
         return self.session
+
+    def _iter_search(self, end_point, query, updated_since=None):
+        params = {'q': query}
+        if updated_since is not None:
+            params['updated_since'] = updated_since
+
+        response = self.session.make_request(end_point, params=params,
+                                             stream=True)
+        try:
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            for item in iter_json_array(chunks, response.encoding or 'utf-8'):
+                #the server may not filter, so check each item here as well.
+                #items with no timestamp are left to the server's filter
+                stamp = item.get('updated_at') or item.get('created_at')
+                if updated_since is None or stamp is None or stamp >= updated_since:
+                    yield item
+        finally:
+            response.close()
+
+    def _poll_broadcasts(self, query, since):
+        """Search for broadcasts updated since a timestamp, skipping the
+        response cache. Returns None if the search has not changed."""
+        params = {'q': query}
+        if since is not None:
+            params['updated_since'] = since
+
+        response = self.session.make_request('/broadcasts/search', params=params)
+        if getattr(response, 'from_cache', False):
+            return None
+        return response.json()
+
+    def _as_records(self, record_class, value):
+        """Convert a response to records if this api returns records
+
+        :param record_class: the Record class to convert to
+        :param value: a dict, list of dicts or iterator of dicts
+        """
+        if not self.records:
+            return value
+        if isinstance(value, dict):
+            return record_class.from_dict(value)
+        if isinstance(value, list):
+            return [record_class.from_dict(item) for item in value]
+        return record_class.from_dicts(value)
+
+    def _search_page(self, end_point, query, page, per_page):
+        return self._fetch_page(end_point, query, page, per_page)[0]
+
+    def _fetch_page(self, end_point, query, page, per_page):
+        """Get a page of results and the page size the server used, if it
+        sent one in the PAGE_SIZE_HEADER header"""
+        params = {'q': query, 'page': page, 'per_page': per_page}
+        response = self.session.make_request(end_point, params=params)
+        try:
+            page_size = int(response.headers.get(PAGE_SIZE_HEADER))
+        except (TypeError, ValueError):
+            page_size = None
+        return response.json(), page_size
+
+    def _iter_pages(self, end_point, query, page, per_page):
+        pool = WorkerPool(1)
+        try:
+            pending = pool.submit(self._fetch_page, end_point, query, page,
+                                  per_page)
+            previous = None
+            while pending is not None:
+                items, page_size = pending.result()
+
+                # A server which ignores paging returns the same page again
+                if items == previous:
+                    break
+
+                # The server may cap the page size below per_page, so a
+                # short page only ends the results if the server says how
+                # many it put on a page. More than per_page means it sent
+                # every result at once.
+                pending = None
+                last = (not items or len(items) > per_page or
+                        page_size is not None and len(items) < page_size)
+                if not last:
+                    page += 1
+                    pending = pool.submit(self._fetch_page, end_point, query,
+                                          page, per_page)
+
+                for item in items:
+                    yield item
+                previous = items
+        finally:
+            pool.shutdown(wait=False)
+
+    ###########################################################################
+    # Response cache helpers
+    ###########################################################################
+
+    def _get_cached(self, end_point, key):
+        if self.cache is None:
+            return _MISSING
+        return self.cache.get(end_point, key, _MISSING)
+
+    def _set_cached(self, end_point, key, value):
+        if self.cache is not None:
+            self.cache.set(end_point, key, value)
+
+    def _invalidate(self, end_point, key=None):
+        if self.cache is not None:
+            self.cache.invalidate(end_point, key)
@@ -0,0 +1,120 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+from api import CsaAPI
+from executor import WorkerPool
+from constants import *
+
+class AsyncCsaAPI(object):
+    """ Access the REST resources on the CSA application without blocking.
+
+    Every request helper mirrors the one on CsaAPI but returns a Future
+    immediately. Requests are run by a fixed pool of worker threads which
+    share one session and a connection pool bounded to the number of
+    workers, so many requests can be kept in flight from a single process.
+    An expired access token is refreshed once by the first worker to
+    notice; the other workers wait and retry with the new token.
+
+    :param tokens: cached oauth tokens
+    :param username: CSA application username
+    :param password: CSA application password
+    :param workers: number of requests which may be in flight at once
+    :param cache: optional ResponseCache shared by the workers
+    """
+    def __init__(self, tokens=None, username=None, password=None,
+                 workers=WORKERS, cache=None):
+        self.api = CsaAPI(tokens=tokens, username=username, password=password,
+                          cache=cache)
+        self.pool = WorkerPool(workers)
+        self.api.get_session().ensure_pool_size(workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Wait for in flight requests and stop the worker threads"""
+        self.pool.shutdown()
+
+    @property
+    def user_id(self):
+        return self.api.user_id
+
+    ###########################################################################
+    # User request helpers
+    ###########################################################################
+
+    def create_user(self, user_params):
+        """Create a new user
+
+        :param user: the user object to create
+        """
+        return self.pool.submit(self.api.create_user, user_params)
+
+    def get_user(self, user_id=None):
+        """Get a user record as an object
+
+        :param user_id: the id of the user to get.
+        """
+        return self.pool.submit(self.api.get_user, user_id)
+
+    def update_user(self, user):
+        """Update a user record
+
+        :param user: The user to update.
+        """
+        return self.pool.submit(self.api.update_user, user)
+
+    def destroy_user(self, user_id=None):
+        """Destory a user record
+
+        :param user_id: the ide of the user to delete
+        """
+        return self.pool.submit(self.api.destroy_user, user_id)
+
+    def users_search(self, query=''):
+        """Search for users matching a query"""
+        return self.pool.submit(self.api.users_search, query)
+
+    ###########################################################################
+    # Broadcast request helpers
+    ###########################################################################
+
+    def create_broadcast(self, broadcast):
+        """Create a new broadcast
+
+        :param broadcast: the broadcast object to create
+        """
+        return self.pool.submit(self.api.create_broadcast, broadcast)
+
+    def get_broadcast(self, broadcast_id):
+        """Get a broadcast record
+
+        :param broadcast_id: the id of the broadcast to get.
+        """
+        return self.pool.submit(self.api.get_broadcast, broadcast_id)
+
+    def broadcasts_search(self, query=''):
+        """Search for broadcasts matching a query"""
+        return self.pool.submit(self.api.broadcasts_search, query)
+
+    def destroy_broadcast(self, broadcast_id):
+        """Destory a broadcast record
+
+        :param broadcast_id: the id of the broadcast to destory.
+        """
+        return self.pool.submit(self.api.destroy_broadcast, broadcast_id)
+
+    ###########################################################################
+    # Misc
+    ###########################################################################
+
+    def make_coffee(self):
+        """ Request via BREW """
+        return self.pool.submit(self.api.make_coffee)
+
+    def get_session(self):
+        return self.api.get_session()
@@ -0,0 +1,105 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from constants import *
+
+class ResponseCache(object):
+    """ A bounded in-memory cache of decoded API responses.
+
+    Entries are keyed on the end point and a key identifying the resource
+    within it (an id or a search query). The least recently used entry is
+    evicted once max_entries is reached and entries expire after the time
+    to live configured for their end point. Values are copied in and out
+    so callers may modify what they get back.
+
+    Any object with the same get, set and invalidate methods can be given
+    to CsaAPI in place of this class.
+
+    :param max_entries: number of responses to keep
+    :param ttls: dict of end point to time to live in seconds
+    :param default_ttl: time to live for end points not in ttls
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttls=CACHE_TTLS,
+                 default_ttl=CACHE_DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, end_point, key, default=None):
+        """Get a cached response
+
+        :param end_point: the end point the response came from
+        :param key: the id or query the response is for
+        :param default: value to return if there is no fresh entry
+        """
+        cache_key = (end_point, str(key))
+        with self._lock:
+            entry = self._entries.pop(cache_key, None)
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return default
+
+            self._entries[cache_key] = entry
+            self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, end_point, key, value):
+        """Cache a response
+
+        :param end_point: the end point the response came from
+        :param key: the id or query the response is for
+        :param value: the decoded response
+        """
+        ttl = self.ttls.get(end_point, self.default_ttl)
+        if ttl <= 0:
+            return
+
+        entry = (time.time() + ttl, copy.deepcopy(value))
+        with self._lock:
+            self._entries.pop((end_point, str(key)), None)
+            self._entries[(end_point, str(key))] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, end_point, key=None):
+        """Remove cached responses
+
+        :param end_point: the end point to remove responses for
+        :param key: the id or query to remove. All of the end point's
+                    responses are removed if None.
+        """
+        with self._lock:
+            if key is not None:
+                self._entries.pop((end_point, str(key)), None)
+                return
+
+            for cache_key in [k for k in self._entries if k[0] == end_point]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get the cache's hit, miss and eviction counts"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
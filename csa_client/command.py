@@ -1,19 +1,139 @@
 import click
 import datetime
+import heapq
+import itertools
 import json
+import re
+import shlex
 import sys
+import threading
 from functools import update_wrapper
-from tabulate import tabulate
 
-from requests.exceptions import HTTPError, ConnectionError
-from token_cache import TokenCache
-from api import CsaAPI
+from constants import (AGENT_SOCKET, WATCH_INTERVAL, WATCH_MAX_INTERVAL,
+                       SHELL_PROMPT)
+from output import FORMATS, ThreadLocalOutput, write_entries
+
+# Modules which are slow to import, such as requests, tabulate and the api,
+# are imported inside the commands that use them so the CLI starts quickly.
 
 NOW = datetime.datetime.now()
 
-def sort_json(json_data, key):
-    """Sort a list of json by a given key """
-    return sorted(json_data, key=lambda x:x[key])
+# Strings which sort as numbers. isdigit also accepts digits such as
+# superscripts, which int cannot convert.
+INTEGER_PATTERN = re.compile(r'-?[0-9]+$')
+
+class _Descending(object):
+    """ Wraps a sort value so that it sorts in reverse """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __ne__(self, other):
+        return self.value != other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+def sort_value(value):
+    """Get a value which sorts missing values, then numbers, then text
+
+    Strings holding integers, such as an id of "15", sort as numbers.
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, basestring):
+        if INTEGER_PATTERN.match(value):
+            return (1, int(value))
+        return (2, value)
+    if isinstance(value, (int, long, float)):
+        return (1, value)
+    return (2, value)
+
+def reverse_sort_value(value):
+    """Get a value which sorts in the reverse order of sort_value"""
+    rank, value = sort_value(value)
+    if rank == 1:
+        return (-1, -value)
+    return (-rank, _Descending(value))
+
+def sort_json(json_data, sort_keys, limit=None):
+    """Sort json by one or more keys, keeping the first limit entries
+
+    With a limit the entries are selected with a heap, so only limit
+    entries are held at once and json_data may be a generator.
+
+    :param json_data: an iterable of dicts
+    :param sort_keys: a key, or a list of (key, descending) tuples
+    :param limit: the number of entries to keep, or None for all
+    """
+    if isinstance(sort_keys, basestring):
+        sort_keys = [(sort_keys, False)]
+
+    if all(not descending for name, descending in sort_keys):
+        def sort_key(item):
+            return tuple([sort_value(item.get(name)) for name, _ in sort_keys])
+    else:
+        def sort_key(item):
+            return tuple([reverse_sort_value(item.get(name)) if descending
+                          else sort_value(item.get(name))
+                          for name, descending in sort_keys])
+
+    if limit is None:
+        return sorted(json_data, key=sort_key)
+    return heapq.nsmallest(limit, json_data, key=sort_key)
+
+def select_entries(json_data, sort_keys=None, limit=None):
+    """Sort entries if sort keys are given, and keep the first limit
+
+    :param json_data: an iterable of dicts
+    :param sort_keys: a list of (key, descending) tuples, or None to keep
+                      the order of json_data
+    :param limit: the number of entries to keep, or None for all
+    """
+    if sort_keys:
+        return sort_json(json_data, sort_keys, limit)
+    if limit is not None:
+        return itertools.islice(json_data, limit)
+    return json_data
+
+
+class SortKeys(click.ParamType):
+    """ A comma separated list of keys to sort by, such as surname,-id.
+
+    A key starting with - sorts in descending order. Converts to a list of
+    (key, descending) tuples.
+
+    :param choices: the keys which may be sorted by
+    """
+    name = 'keys'
+
+    def __init__(self, choices):
+        self.choices = choices
+
+    def convert(self, value, param, ctx):
+        if not isinstance(value, basestring):
+            return value
+
+        sort_keys = []
+        for key in value.split(','):
+            key = key.strip()
+            descending = key.startswith('-')
+            key = key.lstrip('-')
+            if key not in self.choices:
+                self.fail("invalid sort key: %s. (choose from %s)" %
+                          (key, ', '.join(self.choices)), param, ctx)
+            sort_keys.append((key, descending))
+        return sort_keys
+
+    def get_metavar(self, param):
+        return '[-]%s,...' % '|'.join(self.choices)
 
 def update_non_empty(json_data, update_data):
     """Update a dict with another dict where the value is not None """
@@ -21,56 +141,143 @@ def update_non_empty(json_data, update_data):
                         if v is not None)
     return json_data
 
-def print_multiple_entries(json_data, show_keys):
-    """Print a table of json data to the cli"""
-    if len(json_data) == 0:
-        click.echo("No entries to show.")
-    else:
-        header = [key for key in show_keys]
-        table_data = [[item[key]  for key in show_keys] for item in json_data]
+def print_multiple_entries(json_data, show_keys, output_format='table'):
+    """Print json data to the cli as it is iterated over
 
-        table_string = tabulate(table_data, headers=header, tablefmt="rst")
-        click.echo(table_string)
+    :param json_data: an iterable of dicts
+    :param show_keys: the keys to show
+    :param output_format: the format to print in, one of FORMATS
+    """
+    write_entries(json_data, show_keys, output_format)
+
+def format_option(f):
+    """Add the --format option to a command"""
+    return click.option('--format', 'output_format', default='table',
+                        type=click.Choice(FORMATS),
+                        help="Output format. ndjson, csv and tsv are written "
+                             "as results arrive.")(f)
 
 def catch_HTTPError(f):
     @click.pass_context
     def new_func(ctx, *args, **kwargs):
        try:
            return ctx.invoke(f, ctx, *args, **kwargs)
-       except HTTPError, e:
-           click.echo(e.message)
-           if e.response.status_code == 418:
-               click.echo(e.response.text)
-           sys.exit(1)
-       except ConnectionError, e:
-           click.echo(e.message)
-           sys.exit(1)
+       except Exception, e:
+           # requests can only have raised if it has been imported
+           exceptions = sys.modules.get('requests.exceptions')
+           if exceptions is None:
+               raise
+           if isinstance(e, exceptions.HTTPError):
+               click.echo(e.message)
+               if e.response.status_code == 418:
+                   click.echo(e.response.text)
+               sys.exit(1)
+           if isinstance(e, exceptions.ConnectionError):
+               click.echo(e.message)
+               sys.exit(1)
+           raise
     return update_wrapper(new_func, f)
 
 
 def load_tokens():
     """Load the oauth tokens at the start of a command"""
+    from token_cache import TokenCache
     return TokenCache.load_tokens()
 
+# Held while the search index is changed and saved
+SEARCH_INDEX_LOCK = threading.Lock()
+
+def load_search_index():
+    """Open the local broadcast search index, or start an empty one if
+    there is none or it cannot be read"""
+    from search_index import SearchIndex
+    try:
+        return SearchIndex.load()
+    except ValueError:
+        return SearchIndex.create()
+
 def cache_tokens(ctx):
     """Cache the oauth tokens after a command has executed """
-    tokens = ctx.obj.get_session().get_tokens()
+    from token_cache import TokenCache
+    tokens = ctx.obj.get_tokens()
     TokenCache.cache_tokens(tokens)
 
+def connect_api():
+    """Connect to a running agent, or build an api from the cached tokens"""
+    from agent import connect_agent
+    from api import CsaAPI
+    from http_cache import HTTPCache
+
+    # Forward commands to a running agent if there is one
+    client = connect_agent()
+    if client is not None:
+        return client
+
+    try:
+        tokens = load_tokens()
+    except ValueError, e:
+        click.echo(e)
+        click.echo("Could not retrieve tokens from cache. "
+                   "Have you run csa_client authorize ?")
+        sys.exit(1)
+    return CsaAPI(tokens=tokens, lazy_verify=True, http_cache=HTTPCache())
+
+
+class LazyAPI(object):
+    """ Stands in for the api until a command first uses it.
+
+    The agent is only contacted, and the cached tokens only loaded, when
+    an attribute of the api is first looked up. Commands which never use
+    the api, and --help, do no token or network I/O.
+    """
+    def __init__(self):
+        self.api = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        #commands in a batch share the api, so only one may build it
+        with self._lock:
+            if self.api is None:
+                self.api = connect_api()
+        return getattr(self.api, name)
+
+    def cache_tokens(self):
+        """Cache the tokens of the api, if it was used and is not an agent"""
+        if self.api is None:
+            return
+
+        from agent import AgentClient
+        if not isinstance(self.api, AgentClient):
+            from token_cache import TokenCache
+            TokenCache.cache_tokens(self.api.get_tokens())
+
+    def close(self):
+        """Disconnect from the agent, or cache the tokens of the api, if
+        the api was used"""
+        if self.api is None:
+            return
+
+        from agent import AgentClient
+        if isinstance(self.api, AgentClient):
+            self.api.close()
+        else:
+            self.cache_tokens()
+
+
 @click.group()
 @click.pass_context
 @catch_HTTPError
 def cli(ctx):
-    if not ctx.invoked_subcommand == 'authorize':
-        try:
-            tokens = load_tokens()
-            ctx.obj = CsaAPI(tokens=tokens)
-            cache_tokens(ctx)
-        except ValueError, e:
-            click.echo(e)
-            click.echo("Could not retrieve tokens from cache. "
-                       "Have you run csa_client authorize ?")
-            sys.exit(1)
+    if isinstance(ctx.obj, LazyAPI):
+        # Run from the shell, which keeps one api for every command
+        return
+    if ctx.invoked_subcommand in ('authorize', 'agent'):
+        return
+
+    ctx.obj = LazyAPI()
+    # Cache after the command so refreshed tokens and a user id
+    # looked up while running it are kept for the next command
+    ctx.call_on_close(ctx.obj.close)
 
 ##############################################################################
 # Misc commands
@@ -83,11 +290,219 @@ def cli(ctx):
 @click.pass_context
 @catch_HTTPError
 def authorize(ctx, username, password):
+    from agent import AgentError, stop_agent
+    from api import CsaAPI
+
     ctx.obj = CsaAPI(username=username, password=password)
+
+    # A running agent would keep using the old tokens, and write them over
+    # the new ones, so stop it before caching them
+    try:
+        if stop_agent():
+            click.echo("Stopped the running agent. Start it again to use "
+                       "the new login.")
+    except AgentError, e:
+        click.echo("Warning: %s It may still use the old login." % e)
+
     cache_tokens(ctx)
     click.echo("Successfully authorized as user: %s" % username)
 
 
+@cli.group()
+def agent():
+    """Run a local agent which keeps an authorized session open"""
+    pass
+
+@agent.command()
+@click.option('--socket', 'socket_path', default=AGENT_SOCKET,
+              help="Unix socket to listen on")
+@click.pass_context
+@catch_HTTPError
+def start(ctx, socket_path):
+    """ Start the agent in the foreground """
+    from agent import AgentServer
+    from api import CsaAPI
+
+    try:
+        api = CsaAPI(tokens=load_tokens())
+    except ValueError, e:
+        click.echo(e)
+        click.echo("Could not retrieve tokens from cache. "
+                   "Have you run csa_client authorize ?")
+        sys.exit(1)
+
+    server = AgentServer(api, socket_path)
+    click.echo("Agent listening on %s" % socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+@agent.command()
+@click.option('--socket', 'socket_path', default=AGENT_SOCKET,
+              help="Unix socket the agent listens on")
+def stop(socket_path):
+    """ Stop a running agent """
+    from agent import AgentError, stop_agent
+
+    try:
+        stopped = stop_agent(socket_path)
+    except AgentError, e:
+        click.echo(e)
+        sys.exit(1)
+
+    if stopped:
+        click.echo("Agent stopped.")
+    else:
+        click.echo("No agent is running.")
+
+@agent.command()
+@click.option('--socket', 'socket_path', default=AGENT_SOCKET,
+              help="Unix socket the agent listens on")
+def status(socket_path):
+    """ Check if an agent is running """
+    from agent import connect_agent
+
+    client = connect_agent(socket_path)
+    if client is None:
+        click.echo("No agent is running.")
+    else:
+        client.close()
+        click.echo("Agent running on %s" % socket_path)
+
+
+# Commands which cannot be run from the shell
+SHELL_EXCLUDED = ('shell', 'batch')
+# Commands which cannot be run from a batch, where lines share the api
+BATCH_EXCLUDED = SHELL_EXCLUDED + ('authorize',)
+
+@cli.command()
+@click.pass_context
+@catch_HTTPError
+def shell(ctx):
+    """ Run commands in one authorized session """
+    try:
+        import readline
+    except ImportError:
+        pass
+
+    click.echo("Type a command, such as: users search '' --limit 5. "
+               "Type help for the list of commands, or exit to leave.")
+    while True:
+        try:
+            line = raw_input(SHELL_PROMPT)
+        except EOFError:
+            click.echo()
+            break
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+
+        args = line.split()
+        if args and args[0] in ('exit', 'quit'):
+            break
+
+        error = invoke_line(ctx.obj, line)
+        if error is not None:
+            click.echo("Error: %s" % error)
+        ctx.obj.cache_tokens()
+
+@cli.command()
+@click.argument('script', type=click.File('rb'))
+@click.option('--workers', type=click.IntRange(1), default=1,
+              help='Number of commands to run at once. With more than one, '
+                   'commands run in any order, so only use this when the '
+                   'lines do not depend on each other.')
+@click.pass_context
+@catch_HTTPError
+def batch(ctx, script, workers):
+    """ Run the commands in a file, or - for stdin, in one session
+
+    Each line holds one command, such as: broadcasts destroy 17. Lines run
+    one after another, unless --workers is given. Output is printed in the
+    order of the lines, and the batch fails if any command failed.
+    Commands cannot prompt, so give every option on the line, and
+    authorize cannot be run.
+    """
+    from executor import WorkerPool
+
+    lines = [(number, line) for number, line in enumerate(script, 1)
+             if line.strip() and not line.lstrip().startswith('#')]
+
+    # Collect the output of each command apart, and make prompts abort
+    stdout = sys.stdout
+    prompts = click.termui.visible_prompt_func, click.termui.hidden_prompt_func
+    sys.stdout = output = ThreadLocalOutput(stdout)
+    click.termui.visible_prompt_func = click.termui.hidden_prompt_func = no_input
+    failures = 0
+    try:
+        with WorkerPool(workers) as pool:
+            results = [(number, pool.submit(run_batch_line, ctx.obj, output, line))
+                       for number, line in lines]
+            for number, result in results:
+                text, error = result.result()
+                # a command which prompted leaves its line unfinished
+                click.echo(text, nl=bool(text) and not text.endswith('\n'))
+                if error is not None:
+                    failures += 1
+                    click.echo("Line %d: Error: %s" % (number, error), err=True)
+    finally:
+        sys.stdout = stdout
+        click.termui.visible_prompt_func, click.termui.hidden_prompt_func = prompts
+
+    click.echo("Ran %d commands, %d failed." % (len(lines), failures), err=True)
+    if failures:
+        sys.exit(1)
+
+def no_input(prompt=''):
+    """Read input for a prompt in a batch, where there is none"""
+    raise EOFError()
+
+def run_batch_line(obj, output, line):
+    """Run a line of a batch, collecting what it prints
+
+    :returns: a tuple of the output and the error message, if any
+    """
+    with output.capture() as text:
+        error = invoke_line(obj, line, BATCH_EXCLUDED)
+    return text.getvalue(), error
+
+def invoke_line(obj, line, excluded=SHELL_EXCLUDED):
+    """Run a line of the shell or of a batch as a command
+
+    :param obj: the LazyAPI shared by every command
+    :param excluded: the commands which may not be run
+    :returns: an error message, or None if the command succeeded
+    """
+    try:
+        args = shlex.split(line, comments=True)
+    except ValueError, e:
+        return str(e)
+
+    if not args:
+        return None
+    if args[0] == 'help':
+        args = ['--help']
+    if args[0] in excluded:
+        return "%s cannot be run here." % args[0]
+
+    try:
+        cli.main(args, prog_name='csa_client', obj=obj, standalone_mode=False)
+    except click.ClickException, e:
+        return e.format_message()
+    except click.Abort:
+        return "Aborted!"
+    except SystemExit, e:
+        if e.code:
+            return "Command failed."
+    except Exception, e:
+        return "%s: %s" % (type(e).__name__, e)
+    finally:
+        if args[0] == 'authorize':
+            # Use the new tokens from the next command on
+            obj.api = None
+
+
 @cli.command('make-coffee',
              help="Run a HTCPCP request")
 @click.pass_context
@@ -108,24 +523,40 @@ def users(ctx):
 
 @users.command()
 @click.argument("query")
-@click.option('--sort-by', default='id',
-              type=click.Choice(['id', 'firstname', 'surname', 'email']))
+@click.option('--sort-by', default=None,
+              type=SortKeys(['id', 'firstname', 'surname', 'email']),
+              help="Columns to sort by, separated by commas. Start a column "
+                   "with - to sort it in descending order. Tables are sorted "
+                   "by id by default.")
+@click.option('--limit', type=click.IntRange(0), default=None,
+              help="Only show the first LIMIT users.")
+@format_option
 @click.pass_context
 @catch_HTTPError
-def search(ctx, query, sort_by):
+def search(ctx, query, sort_by, limit, output_format):
     """ Search for users """
-    users_list = ctx.obj.users_search(query)
-    users_list = sort_json(users_list, sort_by)
-    print_multiple_entries(users_list, ['id', 'firstname', 'surname', 'email', 'phone'])
+    if sort_by is None and output_format == 'table':
+        sort_by = [('id', False)]
+
+    if sort_by and limit is None:
+        users_list = ctx.obj.users_search(query)
+    else:
+        # Stream the users, holding at most limit of them
+        users_list = ctx.obj.iter_users_search(query)
+    users_list = select_entries(users_list, sort_by, limit)
+    print_multiple_entries(users_list, ['id', 'firstname', 'surname', 'email', 'phone'],
+                           output_format)
 
 @users.command()
 @click.option("--user-id", type=int, help="ID of user to show")
+@format_option
 @click.pass_context
 @catch_HTTPError
-def show(ctx, user_id):
+def show(ctx, user_id, output_format):
     """ Show a user """
     user = ctx.obj.get_user(user_id)
-    print_multiple_entries([user], ['id', 'firstname', 'surname', 'email', 'phone'])
+    print_multiple_entries([user], ['id', 'firstname', 'surname', 'email', 'phone'],
+                           output_format)
 
 @users.command()
 @click.option('--firstname', prompt="Enter firstname",
@@ -203,25 +634,94 @@ def create(ctx, content, feeds):
 
 @broadcasts.command()
 @click.argument("broadcast-id")
+@format_option
 @click.pass_context
 @catch_HTTPError
-def show(ctx, broadcast_id):
+def show(ctx, broadcast_id, output_format):
     """ Show a broadcast """
     broadcast = ctx.obj.get_broadcast(broadcast_id)
-    print_multiple_entries([broadcast], ['user_id', 'content', 'created_at'])
+    print_multiple_entries([broadcast], ['user_id', 'content', 'created_at'],
+                           output_format)
 
 @broadcasts.command()
 @click.argument('query')
-@click.option('--sort-by', default='id',
-              type=click.Choice(['id', 'user_id', 'content', 'created_at']),
-              help="Column to sort by.")
+@click.option('--sort-by', default=None,
+              type=SortKeys(['id', 'user_id', 'content', 'created_at']),
+              help="Columns to sort by, separated by commas. Start a column "
+                   "with - to sort it in descending order. Tables are sorted "
+                   "by id by default, and --local results by rank.")
+@click.option('--limit', type=click.IntRange(0), default=None,
+              help="Only show the first LIMIT broadcasts.")
+@click.option('--local', is_flag=True,
+              help="Search the local index instead of the server.")
+@format_option
 @click.pass_context
 @catch_HTTPError
-def search(ctx, query, sort_by):
+def search(ctx, query, sort_by, limit, local, output_format):
     """ Search for broadcasts """
-    broadcasts_list = ctx.obj.broadcasts_search(query)
-    broadcasts_list = sort_json(broadcasts_list, sort_by)
-    print_multiple_entries(broadcasts_list, ['id', 'user_id', 'content', 'created_at'])
+    if local:
+        from search_index import SearchIndex
+
+        try:
+            # Results come ranked, so only a sort needs more than limit
+            broadcasts_list = SearchIndex.load().search(
+                query, None if sort_by else limit)
+        except ValueError, e:
+            click.echo(e)
+            click.echo("Have you run csa_client broadcasts index ?")
+            sys.exit(1)
+    else:
+        if sort_by is None and output_format == 'table':
+            sort_by = [('id', False)]
+
+        if sort_by and limit is None:
+            broadcasts_list = ctx.obj.broadcasts_search(query)
+        else:
+            # Stream the broadcasts, holding at most limit of them
+            broadcasts_list = ctx.obj.iter_broadcasts_search(query)
+
+    broadcasts_list = select_entries(broadcasts_list, sort_by, limit)
+    print_multiple_entries(broadcasts_list, ['id', 'user_id', 'content', 'created_at'],
+                           output_format)
+
+@broadcasts.command()
+@click.option('--rebuild', is_flag=True,
+              help="Index every broadcast again instead of only new ones.")
+@click.pass_context
+@catch_HTTPError
+def index(ctx, rebuild):
+    """ Update the local search index of broadcasts """
+    from search_index import SearchIndex
+
+    search_index = SearchIndex.create() if rebuild else load_search_index()
+    broadcasts_list = ctx.obj.iter_broadcasts_search('', search_index.high_water)
+    count = search_index.update(broadcasts_list)
+    search_index.save()
+    click.echo("Indexed %d broadcasts, %d in total." % (count, len(search_index)))
+    search_index.close()
+
+@broadcasts.command()
+@click.argument('query', required=False, default='')
+@click.option('--interval', default=WATCH_INTERVAL, type=float,
+              help="Seconds between polls while broadcasts are being posted.")
+@click.option('--max-interval', default=WATCH_MAX_INTERVAL, type=float,
+              help="Longest wait in seconds between polls.")
+@click.option('--polls', default=None, type=int,
+              help="Stop after this many polls.")
+@click.pass_context
+@catch_HTTPError
+def watch(ctx, query, interval, max_interval, polls):
+    """ Print new broadcasts as they are posted """
+    broadcasts_list = ctx.obj.watch_broadcasts(query, interval=interval,
+                                               max_interval=max_interval,
+                                               max_polls=polls)
+    try:
+        for broadcast in broadcasts_list:
+            click.echo("%s\t%s\t%s\t%s" % (broadcast['id'], broadcast['user_id'],
+                                           broadcast['created_at'],
+                                           broadcast['content']))
+    except KeyboardInterrupt:
+        pass
 
 @broadcasts.command()
 @click.argument('broadcast-id', type=int)
@@ -230,6 +730,20 @@ def search(ctx, query, sort_by):
 def destroy(ctx, broadcast_id):
     """ Destroy a broadcast """
     ctx.obj.destroy_broadcast(broadcast_id)
+
+    from search_index import SearchIndex
+    try:
+        search_index = SearchIndex.load()
+    except ValueError:
+        # There is no local index to remove the broadcast from
+        pass
+    else:
+        # Broadcasts destroyed at once in a batch update the index in turn
+        with SEARCH_INDEX_LOCK:
+            if broadcast_id in search_index:
+                search_index.remove(broadcast_id)
+                search_index.save()
+        search_index.close()
     click.echo("Broadcast destroyed.")
 
 if __name__ == "__main__":
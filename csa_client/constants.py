@@ -14,9 +14,87 @@ PORT = '3001'
 CONTENT_TYPE = 'json'
 # Whether to verify the ssl certificate of the website
 VERIFY_SSL = False
+# Number of threads used to make concurrent requests
+WORKERS = 10
+
+# Number of hosts to keep connection pools for
+POOL_CONNECTIONS = 1
+# Number of connections kept open to the application
+POOL_MAXSIZE = 10
+# Whether to wait for a free connection instead of opening a new one
+POOL_BLOCK = False
+# Seconds to wait when connecting to the application
+CONNECT_TIMEOUT = 10
+# Seconds to wait for the application to respond
+READ_TIMEOUT = 60
+# Whether to reuse connections between requests
+KEEP_ALIVE = True
+
+# Seconds before an access token expires that it will be refreshed
+TOKEN_REFRESH_SKEW = 30
+# How the access token is sent: in the json 'body' or an auth 'header'
+AUTH_MODE = 'body'
+# Whether concurrent identical GET requests share one response
+COALESCE_REQUESTS = True
+# Bytes read at a time from streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+# Number of records requested in each page of a paged search
+PAGE_SIZE = 100
+# Response header a paged search sets to the number of records per page
+PAGE_SIZE_HEADER = 'X-Per-Page'
+
+# Number of responses kept by the in-memory response cache
+CACHE_MAX_ENTRIES = 1000
+# Seconds responses are cached for when their end point is not listed below
+CACHE_DEFAULT_TTL = 60
+# Seconds responses from each end point are cached for
+CACHE_TTLS = {
+    "/users/show/:id": 300,
+    "/users/search": 60,
+    "/broadcasts/show/:id": 300,
+    "/broadcasts/search": 30
+}
 
 # TOKEN_FILE = os.path.join(os.path.expanduser("~"), '.csa_tokens.json')
 TOKEN_FILE = os.path.expanduser('.csa_tokens.json')
+# File locked while reading or updating the token file
+TOKEN_LOCK_FILE = TOKEN_FILE + '.lock'
+# Directory responses are cached in between commands, kept per user
+HTTP_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                              os.path.expanduser(os.path.join('~', '.cache')),
+                              'csa_client', 'http')
+# Bytes the on-disk response cache may use
+HTTP_CACHE_MAX_SIZE = 50 * 1024 * 1024
+# Fraction of HTTP_CACHE_MAX_SIZE the cache is cut down to once it is full
+HTTP_CACHE_EVICT_RATIO = 0.75
+# Unix socket the client agent listens on
+AGENT_SOCKET = os.path.expanduser('.csa_agent.sock')
+# Seconds to wait for an agent to exit once asked to stop
+AGENT_STOP_TIMEOUT = 5
+
+# SQLite database the local mirror of users and broadcasts is kept in
+MIRROR_FILE = os.path.expanduser('.csa_mirror.db')
+
+# File the local full-text index of broadcasts is saved in
+SEARCH_INDEX_FILE = os.path.expanduser('.csa_search_index.db')
+
+# Seconds between polls for new broadcasts while they are being posted
+WATCH_INTERVAL = 2
+
+# Longest wait in seconds between polls for new broadcasts
+WATCH_MAX_INTERVAL = 60
+
+# Factor the poll interval grows by after each poll with nothing new
+WATCH_BACKOFF = 2
+
+# Rows used to size the columns of a table too long to lay out at once
+TABLE_SAMPLE_SIZE = 100
+
+# Most distinct strings records share before the shared table is cleared
+INTERN_TABLE_SIZE = 10000
+
+# Prompt shown by the interactive shell
+SHELL_PROMPT = 'csa> '
 
 END_POINTS = {
     "/oauth/token": "POST",
@@ -36,7 +114,10 @@ END_POINTS = {
     "/coffee": "BREW"
 }
 
-#Squash ssl verify warning if we're not verifying.
-if not VERIFY_SSL:
-    import requests.packages.urllib3 as urllib3
-    urllib3.disable_warnings()
+# End points whose responses may be cached and revalidated
+CACHEABLE_END_POINTS = (
+    "/users/search",
+    "/users/show/:id",
+    "/broadcasts/search",
+    "/broadcasts/show/:id"
+)
@@ -0,0 +1,159 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import sys
+import threading
+import Queue
+
+from constants import *
+
+class Future(object):
+    """ The pending result of a call submitted to a WorkerPool.
+
+    The result is set once by the worker which ran the call. Any exception
+    raised by the call is captured and re-raised when the result is read.
+    """
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        """Check if the call has finished"""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the call to finish and return its result
+
+        :param timeout: seconds to wait before raising a RuntimeError
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError("Timed out waiting for result.")
+
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """Wait for the call to finish and return the exception it raised
+
+        :param timeout: seconds to wait before raising a RuntimeError
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError("Timed out waiting for result.")
+
+        return None if self._exc_info is None else self._exc_info[1]
+
+    def add_done_callback(self, callback):
+        """Call a function with this future once the call has finished
+
+        :param callback: function taking the future as its only argument
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class WorkerPool(object):
+    """ A fixed size pool of threads which run submitted calls.
+
+    :param workers: the number of threads in the pool
+    """
+    def __init__(self, workers=WORKERS):
+        if workers < 1:
+            raise ValueError("A worker pool needs at least one worker.")
+
+        self.workers = workers
+        self._queue = Queue.Queue()
+        self._threads = []
+        self._shutdown = False
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a function on the pool
+
+        :param fn: the function to call
+        :returns: a Future holding the result of the call
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a pool after shutdown.")
+            self._start_threads()
+
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def map(self, fn, iterable):
+        """Run a function over each item of an iterable on the pool
+
+        :param fn: the function to call
+        :param iterable: the arguments to call fn with
+        :returns: list of Futures in the same order as the iterable
+        """
+        return [self.submit(fn, item) for item in iterable]
+
+    def shutdown(self, wait=True):
+        """Stop the pool once all submitted calls have finished
+
+        :param wait: whether to block until the worker threads exit
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+
+        for _ in threads:
+            self._queue.put(None)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def _start_threads(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                future.set_exc_info(sys.exc_info())
+            else:
+                future.set_result(result)
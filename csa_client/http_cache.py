@@ -0,0 +1,230 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from constants import *
+
+# File in the cache directory holding the number of bytes cached
+SIZE_FILE = '.size'
+
+def _cache_directives(response):
+    """Get the names of the Cache-Control directives of a response"""
+    value = response.headers.get('cache-control') or ''
+    return set(directive.split('=')[0].strip().lower()
+               for directive in value.split(','))
+
+
+class HTTPCache(object):
+    """ An on-disk cache of responses validated with ETag and Last-Modified.
+
+    Each response carrying a validator is stored in its own file, named by a
+    hash of the request. The validators are sent with the next identical
+    request so an unchanged resource is answered with a 304 and read back
+    from disk, even in a later process. Responses marked no-store or
+    private are not stored.
+
+    The number of bytes cached is kept in a file, so storing a response
+    does not need to look at the other files. Once the files take up more
+    than max_size bytes the least recently used ones are removed until
+    HTTP_CACHE_EVICT_RATIO of max_size is used.
+
+    The directory is created when the first response is stored.
+
+    :param directory: directory to keep the cached responses in
+    :param max_size: number of bytes the cache may use
+    """
+    def __init__(self, directory=HTTP_CACHE_DIR, max_size=HTTP_CACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method, url, body):
+        """Build the cache key for a request"""
+        return hashlib.sha1('\n'.join((method, url, body or ''))).hexdigest()
+
+    def get(self, key):
+        """Load a cached response
+
+        :param key: the key of the request
+        :returns: dict with the response's validators, status, headers and
+                  content, or None if the request is not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file_handle:
+                entry = json.loads(file_handle.readline())
+                entry['content'] = file_handle.read()
+        except (IOError, ValueError):
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def set(self, key, response):
+        """Store a response if it has a validator
+
+        :param key: the key of the request
+        :param response: the requests.Response to store
+        """
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if etag is None and last_modified is None:
+            return
+        if _cache_directives(response) & set(['no-store', 'private']):
+            return
+
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'status': response.status_code,
+            'headers': dict(response.headers)
+        }
+        data = json.dumps(entry) + '\n' + response.content
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                #made by another thread or process
+                pass
+
+        # Caching is best effort, a cache which cannot be written to must
+        # not fail the request the response is for
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+            with os.fdopen(fd, 'wb') as file_handle:
+                file_handle.write(data)
+
+            path = self._path(key)
+            with self._lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.rename(temp_path, path)
+                temp_path = None
+                self._track(len(data) - previous)
+        except (OSError, IOError):
+            if temp_path is not None and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def validators(self, entry):
+        """Build the conditional request headers for a cached response"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def build_response(self, entry, request):
+        """Rebuild a response from a cached entry
+
+        :param entry: the cached entry returned by get
+        :param request: the prepared request the response is for
+        """
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['content']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    os.remove(os.path.join(self.directory, name))
+            self._size = 0
+
+    def size(self):
+        """Get the number of bytes used by the cache"""
+        with self._lock:
+            self._track(0)
+            return self._size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _track(self, change):
+        """Update the cache size, evicting entries if it is too large.
+
+        Must be called holding the lock.
+        """
+        changed = bool(change)
+        if self._size is None:
+            self._size = self._read_size()
+            if self._size is None:
+                #the first count already includes the change
+                self._size = sum(size for path, size, mtime in self._entries())
+                change, changed = 0, True
+        self._size += change
+
+        if self._size > self.max_size:
+            self._evict()
+        elif not changed:
+            return
+        self._write_size()
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache is below
+        HTTP_CACHE_EVICT_RATIO of its max size"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        #other processes may have changed the cache, so count it again
+        self._size = sum(size for path, size, mtime in entries)
+        target = self.max_size * HTTP_CACHE_EVICT_RATIO
+        for path, size, mtime in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def _read_size(self):
+        try:
+            with open(self._path(SIZE_FILE)) as file_handle:
+                return int(file_handle.read())
+        except (IOError, ValueError):
+            return None
+
+    def _write_size(self):
+        try:
+            with open(self._path(SIZE_FILE), 'w') as file_handle:
+                file_handle.write(str(self._size))
+        except IOError:
+            pass
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            #skip temporary files and the size file
+            if name.startswith('.'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
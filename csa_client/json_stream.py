@@ -0,0 +1,76 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import codecs
+import json
+
+from constants import *
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = WHITESPACE + ',]'
+
+def iter_json_array(chunks, encoding='utf-8'):
+    """Decode the items of a JSON array one at a time
+
+    Only the item being decoded is held in memory, so arrays of any size
+    can be read in constant memory.
+
+    :param chunks: iterable of byte strings holding the encoded array
+    :param encoding: encoding of the byte strings
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+
+    buf = u''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        while pos < len(buf) and buf[pos] in WHITESPACE:
+            pos += 1
+
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("Expected a JSON array.")
+                started = True
+                expect_item = True
+                pos += 1
+                continue
+
+            if buf[pos] == ']':
+                return
+
+            if not expect_item:
+                if buf[pos] != ',':
+                    raise ValueError("Expected ',' or ']' at position %d." % pos)
+                expect_item = True
+                pos += 1
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # A number running to the end of the buffer may be cut short
+                if eof or (end < len(buf) and buf[end] in DELIMITERS):
+                    yield item
+                    pos = end
+                    expect_item = False
+                    continue
+        elif eof:
+            raise ValueError("Unexpected end of JSON array.")
+
+        #read more of the array, dropping what has been decoded
+        buf = buf[pos:]
+        pos = 0
+        try:
+            buf += text_decoder.decode(next(chunks))
+        except StopIteration:
+            buf += text_decoder.decode('', final=True)
+            eof = True
@@ -0,0 +1,217 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import json
+import sqlite3
+import threading
+import time
+
+from constants import *
+
+# Columns copied out of each record so they can be indexed
+COLUMNS = {
+    'users': ('id', 'firstname', 'surname', 'email', 'grad_year', 'updated_at'),
+    'broadcasts': ('id', 'user_id', 'content', 'created_at', 'updated_at'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    firstname TEXT,
+    surname TEXT,
+    email TEXT,
+    grad_year INTEGER,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_surname ON users (surname);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE INDEX IF NOT EXISTS users_grad_year ON users (grad_year);
+CREATE INDEX IF NOT EXISTS users_updated_at ON users (updated_at);
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER,
+    content TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS broadcasts_user_id ON broadcasts (user_id, created_at);
+CREATE INDEX IF NOT EXISTS broadcasts_updated_at ON broadcasts (updated_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    resource TEXT PRIMARY KEY,
+    high_water TEXT,
+    synced_at REAL
+);
+"""
+
+def _like_pattern(query):
+    """Build a LIKE pattern matching values which contain the query"""
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return '%' + escaped + '%'
+
+
+class Mirror(object):
+    """ A local SQLite replica of the users and broadcasts on the server.
+
+    The first sync pulls every user and broadcast through the api. Later
+    syncs only ask for records updated since the newest updated_at seen,
+    the high-water mark. Reads are answered from indexed local tables and
+    never contact the server.
+
+    Records deleted on the server are only removed by a full sync.
+
+    :param api: the CsaAPI used to fetch records
+    :param path: path of the SQLite database
+    """
+    def __init__(self, api, path=MIRROR_FILE):
+        self.api = api
+        self.path = path
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+
+        with self._connection() as db:
+            db.executescript(SCHEMA)
+
+    def _connection(self):
+        """Get the database connection for the current thread"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path)
+            #let readers carry on while a sync is writing
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def close(self):
+        """Close the database connection of the current thread"""
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    ###########################################################################
+    # Syncing
+    ###########################################################################
+
+    def sync(self, full=False):
+        """Bring the mirror up to date with the server
+
+        :param full: pull every record again, removing any which were
+                     deleted on the server
+        :return: a dict of the number of users and broadcasts stored
+        """
+        with self._sync_lock:
+            return {
+                'users': self._sync('users', self.api.iter_users_search, full),
+                'broadcasts': self._sync('broadcasts',
+                                         self.api.iter_broadcasts_search, full),
+            }
+
+    def high_water(self, resource):
+        """Get the newest updated_at stored for 'users' or 'broadcasts'"""
+        row = self._connection().execute(
+            'SELECT high_water FROM sync_state WHERE resource = ?',
+            (resource,)).fetchone()
+        return row[0] if row else None
+
+    def _sync(self, resource, search, full):
+        high_water = None if full else self.high_water(resource)
+        #newest updated_at and number of records seen while streaming
+        state = {'newest': high_water, 'count': 0}
+        columns = COLUMNS[resource]
+
+        def rows():
+            for item in search('', high_water):
+                if hasattr(item, 'to_dict'):
+                    item = item.to_dict()
+                state['newest'] = max(state['newest'], item.get('updated_at'))
+                state['count'] += 1
+                yield self._row(columns, item)
+
+        insert = 'INSERT OR REPLACE INTO %s (%s, data) VALUES (%s)' % (
+            resource, ', '.join(columns), ', '.join('?' * (len(columns) + 1)))
+
+        db = self._connection()
+        with db:
+            if full:
+                #readers see the old rows until the transaction commits
+                db.execute('DELETE FROM %s' % resource)
+            db.executemany(insert, rows())
+            db.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)',
+                       (resource, state['newest'], time.time()))
+        return state['count']
+
+    @staticmethod
+    def _row(columns, item):
+        values = [item.get(column) for column in columns]
+        try:
+            #ids are sometimes sent as strings
+            values[0] = int(values[0])
+        except (TypeError, ValueError):
+            pass
+        values.append(json.dumps(item))
+        return values
+
+    ###########################################################################
+    # Reads
+    ###########################################################################
+
+    def get_user(self, user_id):
+        """Get a user from the mirror
+
+        :param user_id: the id of the user to get
+        :raises KeyError: if the user is not in the mirror
+        """
+        return self._get('users', user_id)
+
+    def users_search(self, query=''):
+        """Find users whose name or email contains the query"""
+        if not query:
+            return self._select('users', '1', {})
+        return self._select('users',
+                            "firstname LIKE :q ESCAPE '\\' OR "
+                            "surname LIKE :q ESCAPE '\\' OR "
+                            "email LIKE :q ESCAPE '\\'",
+                            {'q': _like_pattern(query)})
+
+    def users_by_grad_year(self, grad_year):
+        """Find the users who graduated in a year"""
+        return self._select('users', 'grad_year = :year', {'year': grad_year})
+
+    def get_broadcast(self, broadcast_id):
+        """Get a broadcast from the mirror
+
+        :param broadcast_id: the id of the broadcast to get
+        :raises KeyError: if the broadcast is not in the mirror
+        """
+        return self._get('broadcasts', broadcast_id)
+
+    def broadcasts_search(self, query=''):
+        """Find broadcasts whose content contains the query"""
+        if not query:
+            return self._select('broadcasts', '1', {})
+        return self._select('broadcasts', "content LIKE :q ESCAPE '\\'",
+                            {'q': _like_pattern(query)})
+
+    def broadcasts_by_user(self, user_id):
+        """Find the broadcasts posted by a user, oldest first"""
+        return self._select('broadcasts', 'user_id = :user_id',
+                            {'user_id': user_id}, order='created_at, id')
+
+    def _get(self, resource, record_id):
+        row = self._connection().execute(
+            'SELECT data FROM %s WHERE id = ?' % resource,
+            (int(record_id),)).fetchone()
+        if row is None:
+            raise KeyError("%s %s is not in the mirror" % (resource, record_id))
+        return json.loads(row[0])
+
+    def _select(self, resource, where, params, order='id'):
+        cursor = self._connection().execute(
+            'SELECT data FROM %s WHERE %s ORDER BY %s' % (resource, where, order),
+            params)
+        return [json.loads(data) for data, in cursor]
@@ -4,9 +4,13 @@ __license__ = "MIT"
 
 import requests
 import json
+import sys
+import threading
+import time
 
 from constants import *
 from request_handler import RequestHandler
+from executor import WorkerPool, Future
 
 class OAuth2ResourceOwner(RequestHandler):
     """ Handles retrieving resources from the specified end-points.
@@ -17,11 +21,39 @@ class OAuth2ResourceOwner(RequestHandler):
     obtained and can be cached locally. This class will automatically handle
     refreshing the tokens ase required. See RFC6749 for more info.
 
+    When the server reports how long an access token lasts it is refreshed
+    shortly before it expires, saving the round trip of a rejected request.
+    A 401 response still triggers a refresh for tokens without an expiry.
+
+    Handlers may be shared between threads. Only one thread refreshes an
+    expired token; the others wait for it and then use the new token.
+    Identical GET requests made by several threads at once are coalesced
+    into one request whose response is given to all of them.
+
     :param token_endpoint: the end point to request oauth2 tokens from.
+    :param transport: TransportConfig used for the underlying session.
+    :param refresh_skew: seconds before expiry to refresh the access token.
+    :param auth_mode: 'body' or 'header'. See OAuth2Tokens.
+    :param http_cache: optional HTTPCache used to revalidate responses.
+    :param coalesce: whether to share responses between concurrent
+                     identical GET requests.
     """
-    def __init__(self, token_endpoint):
-        super(OAuth2ResourceOwner, self).__init__()
+    def __init__(self, token_endpoint, transport=None,
+                 refresh_skew=TOKEN_REFRESH_SKEW, auth_mode=AUTH_MODE,
+                 http_cache=None, coalesce=COALESCE_REQUESTS):
+        super(OAuth2ResourceOwner, self).__init__(transport, http_cache)
         self.token_endpoint = token_endpoint
+        self.refresh_skew = refresh_skew
+        self.auth_mode = auth_mode
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_in = None
+        self.issued_at = None
+        # Reentrant, as the auth state is replaced while refreshing
+        self._refresh_lock = threading.RLock()
+        self.coalesce = coalesce
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
 
     def request_auth_with_client_credentials(self, username, password):
         """Request authentication using the resource owners credentials
@@ -56,7 +88,8 @@ class OAuth2ResourceOwner(RequestHandler):
         json_response = response.json()
         self._refresh_auth_state(json_response)
 
-    def make_request(self, end_point, end_point_vars={}, params={}):
+    def make_request(self, end_point, end_point_vars={}, params={},
+                     stream=False):
         """Make a request to Csa API at the specified end point
 
         This method is override from the request handler class and will refresh
@@ -65,28 +98,119 @@ class OAuth2ResourceOwner(RequestHandler):
         :param end_point: string representing the end resource request
         :param end_point_vars: dictionary of variables to be replaced in the uri
         :param params: dictionary of parameters to be passed via GET/POST
+        :param stream: whether to leave the response body to be read with
+                       response.iter_content. Streamed requests are not
+                       coalesced.
         """
+        route = self._get_route(end_point)
+        if not self.coalesce or route.method != 'GET' or stream \
+                or end_point == self.token_endpoint:
+            return self._make_authorized_request(end_point, end_point_vars,
+                                                 params, stream)
+
+        key = (route.build_path(end_point_vars), json.dumps(params, sort_keys=True))
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._in_flight[key] = Future()
+
+        if not is_leader:
+            return call.result()
+
+        try:
+            response = self._make_authorized_request(end_point, end_point_vars, params)
+        except BaseException:
+            call.set_exc_info(sys.exc_info())
+            raise
+        else:
+            call.set_result(response)
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+        return response
+
+    def _make_authorized_request(self, end_point, end_point_vars, params,
+                                 stream=False):
+        """Make a request, refreshing the oauth tokens if neccessary"""
+        is_token_request = end_point == self.token_endpoint
+
+        if not is_token_request and self.token_expiring():
+            self._refresh_expired_token(self.access_token)
+
+        access_token = self.access_token
         response = super(OAuth2ResourceOwner, self) \
-                        .make_request(end_point, end_point_vars, params)
+                        .make_request(end_point, end_point_vars, params, stream)
 
 
         if response.status_code == requests.codes.unauthorized:
-            if not 'error' in response.text:
-                self.request_auth_with_refresh_token()
+            if not 'error' in response.text and not is_token_request:
+                self._refresh_expired_token(access_token)
                 response = super(OAuth2ResourceOwner, self) \
-                                .make_request(end_point, end_point_vars, params)
+                                .make_request(end_point, end_point_vars,
+                                              params, stream)
             else:
                 raise requests.exceptions.HTTPError(response.text)
 
         response.raise_for_status()
         return response
 
+    def make_requests(self, batch, workers=WORKERS):
+        """Make many requests to the Csa API at once
+
+        The requests are run on a pool of worker threads sharing this
+        handler's session and connection pool. A failing request does not
+        stop the others; its exception is returned in place of a response.
+
+        :param batch: list of (end_point, end_point_vars, params) tuples.
+                      end_point_vars and params may be omitted.
+        :param workers: number of requests to make concurrently
+        :returns: list of (response, exception) tuples in the same order
+                  as the batch. One of each pair is always None.
+        """
+        self.ensure_pool_size(workers)
+
+        with WorkerPool(workers) as pool:
+            futures = [pool.submit(self.make_request, *request)
+                       for request in batch]
+
+        results = []
+        for future in futures:
+            error = future.exception()
+            if error is None:
+                results.append((future.result(), None))
+            else:
+                results.append((None, error))
+        return results
+
+    def _refresh_expired_token(self, expired_token):
+        """Refresh the access token unless another thread already has
+
+        :param expired_token: the access token which was found to be expired
+        """
+        with self._refresh_lock:
+            if self.access_token == expired_token:
+                self.request_auth_with_refresh_token()
+
+    def token_expiring(self):
+        """Check if the access token expires within the refresh skew"""
+        if self.expires_in is None or self.issued_at is None:
+            return False
+
+        expires_at = self.issued_at + self.expires_in
+        return time.time() >= expires_at - self.refresh_skew
+
     def get_tokens(self):
         """Get dictionary of tokens"""
         token_data = {
           'access_token': self.access_token,
           'refresh_token': self.refresh_token
         }
+
+        if self.expires_in is not None:
+            token_data['expires_in'] = self.expires_in
+            token_data['issued_at'] = self.issued_at
+
         return token_data
 
     def set_tokens(self,token_data):
@@ -98,24 +222,61 @@ class OAuth2ResourceOwner(RequestHandler):
 
         :param tokens: dict containing the access_tokens
         """
-        self.access_token = tokens['access_token']
-        self.refresh_token = tokens['refresh_token']
-        self.session.auth = OAuth2Tokens(self.access_token)
+        auth = OAuth2Tokens(tokens['access_token'], self.auth_mode)
+        with self._refresh_lock:
+            # Requests are sent with session.auth, so it is replaced before
+            # the access token threads compare against. A thread which
+            # sees the new token is then sure to send it.
+            self.session.auth = auth
+            self.access_token = tokens['access_token']
+            self.refresh_token = tokens['refresh_token']
+            self.expires_in = tokens.get('expires_in')
+            self.issued_at = tokens.get('issued_at') or time.time()
 
 
 class OAuth2Tokens(requests.auth.AuthBase):
     """Authorization extensions of the requests.auth.AuthBase class
 
-    Adds support for appending the access token to a request.
+    Adds support for sending the access token with a request. In 'header'
+    mode the token is sent as a bearer token in the Authorization header.
+    In 'body' mode it is added to the JSON object in the request body. The
+    body is not parsed again; the token is spliced in after the opening
+    brace.
 
     :param token: access token used with the resource request
+    :param mode: 'body' or 'header'
     """
-    def __init__(self, token):
+    def __init__(self, token, mode='body'):
+        if mode not in ('body', 'header'):
+            raise ValueError("Unsupported auth mode: %s" % mode)
+
         self.token = token
+        self.mode = mode
+        self._body_prefix = '{"access_token": %s' % json.dumps(token)
+        self._header = 'Bearer %s' % token
 
     def __call__(self, r):
-        #append the access token to the body
-        body = json.loads(r.body)
-        body.update({'access_token': self.token})
-        r.body = json.dumps(body)
+        if self.mode == 'header':
+            r.headers['Authorization'] = self._header
+        else:
+            r.body = self._add_token_to_body(r.body)
         return r
+
+    def _add_token_to_body(self, body):
+        """Add the access token to a JSON object in the request body
+
+        :param body: JSON encoded request body
+        """
+        if not body:
+            return self._body_prefix + '}'
+
+        if body[0] != '{' or '"access_token"' in body:
+            #not a plain object, fall back to decoding it
+            body = json.loads(body)
+            body.update({'access_token': self.token})
+            return json.dumps(body)
+
+        rest = body[1:].lstrip()
+        if rest[:1] == '}':
+            return self._body_prefix + rest
+        return self._body_prefix + ', ' + rest
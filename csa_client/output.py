@@ -0,0 +1,161 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import contextlib
+import csv
+import io
+import itertools
+import json
+import StringIO
+import threading
+
+import click
+
+from constants import *
+
+# Formats entries can be written in
+FORMATS = ('table', 'ndjson', 'csv', 'tsv')
+
+def write_entries(entries, keys, output_format='table', echo=click.echo):
+    """Write entries to the cli, one row at a time where possible
+
+    :param entries: an iterable of dicts or records
+    :param keys: the keys to show, in order. ndjson shows every key.
+    :param output_format: one of FORMATS
+    :param echo: function used to write each line
+    """
+    if output_format == 'table':
+        write_table(entries, keys, echo)
+    elif output_format == 'ndjson':
+        write_ndjson(entries, echo)
+    elif output_format == 'csv':
+        write_delimited(entries, keys, echo, 'excel')
+    elif output_format == 'tsv':
+        write_delimited(entries, keys, echo, 'excel-tab')
+    else:
+        raise ValueError("Unknown output format: %s" % output_format)
+
+def write_ndjson(entries, echo=click.echo):
+    """Write each entry as a line of json"""
+    for item in entries:
+        if hasattr(item, 'to_dict'):
+            item = item.to_dict()
+        echo(json.dumps(item, sort_keys=True))
+
+def write_delimited(entries, keys, echo=click.echo, dialect='excel'):
+    """Write a header and then each entry as a line of csv
+
+    :param dialect: the csv dialect, such as excel or excel-tab
+    """
+    buffer = StringIO.StringIO()
+    writer = csv.writer(buffer, dialect, lineterminator='\n')
+
+    def write_row(values):
+        writer.writerow([_encode(value) for value in values])
+        echo(buffer.getvalue(), nl=False)
+        buffer.seek(0)
+        buffer.truncate()
+
+    write_row(keys)
+    for item in entries:
+        write_row([item.get(key) for key in keys])
+
+def write_table(entries, keys, echo=click.echo, sample_size=TABLE_SAMPLE_SIZE):
+    """Write entries as a reStructuredText table
+
+    Up to sample_size entries are laid out by tabulate. Longer tables are
+    sized from the first sample_size entries and then written a row at a
+    time, with longer values cut short to fit.
+    """
+    entries = iter(entries)
+    sample = list(itertools.islice(entries, sample_size + 1))
+    if not sample:
+        echo("No entries to show.")
+        return
+
+    if len(sample) <= sample_size:
+        from tabulate import tabulate
+
+        table_data = [[item[key] for key in keys] for item in sample]
+        echo(tabulate(table_data, headers=keys, tablefmt="rst"))
+        return
+
+    columns = [[item.get(key) for item in sample] for key in keys]
+    numeric = [all(_is_number(value) for value in column if value is not None)
+               for column in columns]
+    widths = [max([len(key) + 2] + [len(_text(value)) for value in column])
+              for key, column in zip(keys, columns)]
+
+    def row(values):
+        cells = []
+        for value, width, right in zip(values, widths, numeric):
+            text = _text(value)
+            if len(text) > width:
+                text = text[:width - 3] + '...'
+            cells.append(text.rjust(width) if right else text.ljust(width))
+        return '  '.join(cells).rstrip()
+
+    border = '  '.join('=' * width for width in widths)
+    echo(border)
+    echo(row(keys))
+    echo(border)
+    for item in itertools.chain(sample, entries):
+        echo(row([item.get(key) for key in keys]))
+    echo(border)
+
+def _is_number(value):
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+def _text(value):
+    if value is None:
+        return u''
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    return unicode(value)
+
+def _encode(value):
+    if value is None:
+        return ''
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+
+class ThreadLocalOutput(object):
+    """ A stream which writes to a buffer of the current thread, if it has
+    one, and otherwise to the stream it wraps.
+
+    Set as sys.stdout, it lets commands running at once on a WorkerPool
+    each collect what they print.
+
+    :param stream: the stream written to by threads without a buffer
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Collect what the current thread writes, as utf-8, in a buffer"""
+        buffer = self._local.buffer = io.BytesIO()
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = None
+
+    def _target(self):
+        buffer = getattr(self._local, 'buffer', None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, data):
+        target = self._target()
+        if target is not self.stream and isinstance(data, unicode):
+            data = data.encode('utf-8')
+        target.write(data)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
@@ -0,0 +1,157 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import datetime
+
+from constants import *
+
+# Format of the timestamps sent by the application
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+# Table of strings shared between records, cleared when it is full so
+# long running processes do not keep every string they have seen
+_interned = {}
+
+# Marker for a field which has not been set
+_UNSET = object()
+
+def intern_string(value):
+    """Get a shared copy of a string so equal values use memory once
+
+    :param value: the str or unicode value to intern
+    """
+    if not isinstance(value, basestring):
+        return value
+    try:
+        return _interned[value]
+    except KeyError:
+        if len(_interned) >= INTERN_TABLE_SIZE:
+            _interned.clear()
+        _interned[value] = value
+        return value
+
+def parse_timestamp(value):
+    """Parse a timestamp sent by the application into a datetime"""
+    if value is None:
+        return None
+    return datetime.datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+class Record(object):
+    """ A compact record for a resource returned by the API.
+
+    Records store their values in __slots__ instead of a dict per
+    instance. Fields which often repeat between records are interned.
+    Keys the class does not know about are kept in a separate dict, and
+    fields missing from the dict the record was built from stay unset. This
+    means to_dict returns exactly the dict the record was made from.
+    """
+    __slots__ = ('_extra',)
+
+    FIELDS = ()
+    INTERNED_FIELDS = ()
+
+    def __init__(self, **values):
+        extra = None
+        for key, value in values.iteritems():
+            if key in self.FIELDS:
+                if key in self.INTERNED_FIELDS:
+                    value = intern_string(value)
+                object.__setattr__(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the dict form returned by the API"""
+        return cls(**dict((str(k), v) for k, v in data.iteritems()))
+
+    @classmethod
+    def from_dicts(cls, items):
+        """Build a record from each dict in an iterable, lazily"""
+        for data in items:
+            yield cls.from_dict(data)
+
+    def to_dict(self):
+        """Get the dict form of the record used by the API"""
+        data = {}
+        for key in self.FIELDS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def get(self, key, default=None):
+        """Get a field by name, like dict.get"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key, _UNSET) is not _UNSET
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.to_dict())
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def created(self):
+        """created_at parsed into a datetime"""
+        return parse_timestamp(self.get('created_at'))
+
+    @property
+    def updated(self):
+        """updated_at parsed into a datetime"""
+        return parse_timestamp(self.get('updated_at'))
+
+
+class User(Record):
+    """ A user of the CSA application """
+    FIELDS = ('id', 'firstname', 'surname', 'email', 'phone', 'grad_year',
+              'jobs', 'created_at', 'updated_at')
+    INTERNED_FIELDS = ('firstname', 'phone')
+    __slots__ = FIELDS
+
+
+class Broadcast(Record):
+    """ A broadcast posted on the CSA application """
+    FIELDS = ('id', 'user_id', 'content', 'created_at', 'updated_at')
+    INTERNED_FIELDS = ()
+    __slots__ = FIELDS
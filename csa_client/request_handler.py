@@ -7,10 +7,73 @@ import requests
 import re
 
 from constants import *
+from transport import TransportConfig, PoolStats, PooledHTTPAdapter
+
+#Squash ssl verify warning if we're not verifying.
+if not VERIFY_SSL:
+    requests.packages.urllib3.disable_warnings()
+
+# Matches the named variables (e.g. :id) in an end point
+END_POINT_VAR_PATTERN = re.compile(r':\w+')
+
+class Route(object):
+    """ A single end point compiled into a reusable uri template.
+
+    The end point string is split once into a format template and the list
+    of variables it expects so that building a uri does not need to run any
+    regular expressions.
+
+    :param end_point: the end point to compile. I.e. /users/show/:id
+    :param method: the HTTP method used to request the end point
+    """
+    def __init__(self, end_point, method):
+        self.end_point = end_point
+        self.method = method
+
+        uri = end_point + '.' + CONTENT_TYPE
+        self.variables = tuple(END_POINT_VAR_PATTERN.findall(uri))
+        self.template = END_POINT_VAR_PATTERN.sub('%s', uri.replace('%', '%%'))
+
+    def build_path(self, params={}):
+        """Build the path to this end point, excluding the domain
+
+        :param params: A dictionary parameters to replace in the uri
+        """
+        if not self.variables:
+            return self.template
+
+        try:
+            values = tuple([str(params[key]) for key in self.variables])
+        except KeyError:
+            raise ValueError("Some parameters were not replaced in uri.\
+                             Cannot build valid application url.")
+
+        return self.template % values
+
+
+def compile_routes(end_points):
+    """Compile a dictionary of end points to HTTP methods into routes
+
+    :param end_points: dictionary mapping end points to HTTP methods
+    """
+    return dict((end_point, Route(end_point, method))
+                for end_point, method in end_points.iteritems())
+
 
 class RequestHandler(object):
-    """ Handles retrieving resources from the specified end-points."""
-    def __init__(self):
+    """ Handles retrieving resources from the specified end-points.
+
+    :param transport: TransportConfig controlling connection pooling and
+                      timeouts. The defaults in constants are used if None.
+    :param http_cache: optional HTTPCache used to revalidate responses from
+                       the end points in CACHEABLE_END_POINTS.
+    """
+
+    # Route table and base url are built once when the module is loaded
+    ROUTES = compile_routes(END_POINTS)
+    DOMAIN_ADDRESS = PROTOCOL + ":".join((DOMAIN, PORT))
+
+    def __init__(self, transport=None, http_cache=None):
         headers={
             "content-type": "application/json",
             "x-api-client-type": "application/json"
@@ -19,48 +82,109 @@ class RequestHandler(object):
         self.session = requests.Session()
         self.session.headers.update(headers)
 
-    def make_request(self, end_point, end_point_vars={}, params={}):
+        self.pool_stats = PoolStats()
+        self.set_transport(transport or TransportConfig())
+        self.http_cache = http_cache
+
+    def set_transport(self, transport):
+        """Configure connection pooling and timeouts for the session
+
+        :param transport: the TransportConfig to apply
+        """
+        self.transport = transport
+
+        # Close the connections pooled by the adapter being replaced
+        for prefix in ('https://', 'http://'):
+            previous = self.session.adapters.get(prefix)
+            if previous is not None:
+                previous.close()
+
+        adapter = PooledHTTPAdapter(transport, self.pool_stats)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if transport.keep_alive:
+            self.session.headers['connection'] = 'keep-alive'
+        else:
+            self.session.headers['connection'] = 'close'
+
+    def make_request(self, end_point, end_point_vars={}, params={},
+                     stream=False):
         """Make a request to Csa API at the specified end point
 
         :param end_point: string representing the end resource request
         :param end_point_vars: dictionary of variables to be replaced in the uri
         :param params: dictionary of parameters to be passed via GET/POST
+        :param stream: whether to leave the response body to be read with
+                       response.iter_content. Streamed responses are not
+                       cached.
         """
-        url = RequestHandler._build_end_point_uri(end_point, end_point_vars)
+        route = RequestHandler._get_route(end_point)
+        url = self.DOMAIN_ADDRESS + route.build_path(end_point_vars)
+        body = json.dumps(params)
+
+        cache_key = cached = None
+        headers = {}
+        if self.http_cache is not None and end_point in CACHEABLE_END_POINTS \
+                and not stream:
+            cache_key = self.http_cache.key(route.method, url, body)
+            cached = self.http_cache.get(cache_key)
+            if cached is not None:
+                headers = self.http_cache.validators(cached)
 
-        req = requests.Request(END_POINTS[end_point],
+        req = requests.Request(route.method,
                                url,
-                               data=json.dumps(params))
+                               data=body,
+                               headers=headers)
 
         prepped = self.session.prepare_request(req)
-        response = self.session.send(prepped, verify=VERIFY_SSL)
+        response = self.session.send(prepped, verify=VERIFY_SSL,
+                                     timeout=self.transport.timeout,
+                                     stream=stream)
+
+        if cache_key is not None:
+            if cached is not None and response.status_code == requests.codes.not_modified:
+                response = self.http_cache.build_response(cached, prepped)
+            elif response.status_code == requests.codes.ok:
+                self.http_cache.set(cache_key, response)
+
         return response
 
+    def ensure_pool_size(self, size):
+        """Make sure the session can keep enough connections open
+
+        :param size: number of connections that may be used at once
+        """
+        if self.transport.pool_maxsize < size:
+            # Workers wait for a connection rather than opening extra ones
+            self.set_transport(self.transport.copy(pool_maxsize=size,
+                                                   pool_block=True))
+
+    @staticmethod
+    def _get_route(end_point):
+        """Look up the compiled route for an end point
+
+        :param end_point: The end point to find the route for
+        """
+        try:
+            return RequestHandler.ROUTES[end_point]
+        except KeyError:
+            raise KeyError("Unsupported application endpoint: %s" % end_point)
+
     @staticmethod
     def _build_end_point_uri(end_point, params={}):
         """Build a url to a API end point.
 
-        This takes a optional dictionary of regex parameters to replace in the
+        This takes a optional dictionary of parameters to replace in the
         end point url. I.e. replacing :id in users/show/:id
 
         :param end_point: The end point to build the uri for
         :param params: A dictionary parameters to replace in the uri
         """
-        if end_point not in END_POINTS:
-            raise KeyError("Unsupported application endpoint: %s" % end_point)
-
-        uri = end_point + '.' + CONTENT_TYPE
-        for key, value in params.iteritems():
-            if key in uri:
-                uri = re.sub(key, str(value), uri)
-
-        if ":" in uri:
-            raise ValueError("Some parameters were not replaced in uri.\
-                             Cannot build valid application url.")
-
-        return RequestHandler._build_domain_address() + uri
+        route = RequestHandler._get_route(end_point)
+        return RequestHandler.DOMAIN_ADDRESS + route.build_path(params)
 
     @staticmethod
     def _build_domain_address():
         """ Build the base url of the api end points """
-        return PROTOCOL + ":".join((DOMAIN, PORT))
+        return RequestHandler.DOMAIN_ADDRESS
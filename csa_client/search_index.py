@@ -0,0 +1,310 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import collections
+import json
+import math
+import os
+import re
+import sqlite3
+
+from constants import *
+
+# Words in broadcast content, with any leading @ or #
+TOKEN_PATTERN = re.compile(r"[@#]?\w+\*?", re.UNICODE)
+
+# Version of the saved index format
+INDEX_VERSION = 2
+
+# Most values bound to a single SQLite statement
+MAX_VARIABLES = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, id)
+);
+CREATE INDEX IF NOT EXISTS postings_id ON postings (id);
+CREATE TABLE IF NOT EXISTS mentions (
+    name TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (name, id)
+);
+CREATE INDEX IF NOT EXISTS mentions_id ON mentions (id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Tables copied when an index is saved to another file
+TABLES = ('documents', 'postings', 'mentions', 'meta')
+
+def tokenize(text, wildcards=False):
+    """Split text into lower case terms and the users it mentions
+
+    :param text: the text to split
+    :param wildcards: keep a * at the end of terms, as used in queries
+    :return: a tuple of the list of terms and the list of mentions
+    """
+    terms = []
+    mentions = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if not wildcards:
+            token = token.rstrip('*')
+        if token.startswith('@'):
+            mentions.append(token[1:])
+            token = token[1:]
+        elif token.startswith('#'):
+            token = token[1:]
+        terms.append(token)
+    return terms, mentions
+
+def parse_query(query):
+    """Split a query into the words to search for and the users it must
+    mention. Words starting with @ are only mentions.
+
+    :return: a tuple of the list of words and the list of mentions
+    """
+    words = []
+    mentions = []
+    for token in TOKEN_PATTERN.findall(query.lower()):
+        if token.startswith('@'):
+            mentions.append(token[1:])
+        else:
+            words.append(token.lstrip('#'))
+    return words, mentions
+
+
+class SearchIndex(object):
+    """ An inverted index over the content of broadcasts.
+
+    Each term maps to the broadcasts containing it and how many times it
+    appears, and each mentioned user to the broadcasts mentioning them.
+    Broadcasts can be added and removed one at a time. Queries are ranked
+    by tf-idf, so broadcasts using rare query terms often come first.
+
+    Queries are made of words. A word ending in * matches every term
+    starting with it, and a word starting with @ only matches broadcasts
+    mentioning that user.
+
+    The index is kept in SQLite, so a query or a removal only reads the
+    rows it needs rather than the whole index. Changes are written when
+    save is called.
+
+    :param path: the SQLite database to keep the index in, by default one
+                 in memory
+    """
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+        self._db.execute('INSERT OR IGNORE INTO meta VALUES (?, ?)',
+                         ('version', str(INDEX_VERSION)))
+
+    @classmethod
+    def create(cls, path=SEARCH_INDEX_FILE):
+        """Start an empty index in a file, replacing any file already there"""
+        if os.path.exists(path):
+            os.remove(path)
+        return cls(path)
+
+    def close(self):
+        """Close the database, discarding changes which were not saved"""
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def __contains__(self, broadcast_id):
+        return self._db.execute('SELECT 1 FROM documents WHERE id = ?',
+                                (unicode(broadcast_id),)).fetchone() is not None
+
+    @property
+    def high_water(self):
+        """The newest updated_at of the broadcasts added"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'high_water'"
+                               ).fetchone()
+        return row[0] if row else None
+
+    def add(self, broadcast):
+        """Add a broadcast to the index, replacing any with the same id"""
+        key = unicode(broadcast['id'])
+        self._delete(key)
+
+        terms, mentions = tokenize(broadcast.get('content') or u'')
+        self._db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                             ((term, key, count) for term, count
+                              in collections.Counter(terms).iteritems()))
+        self._db.executemany('INSERT INTO mentions VALUES (?, ?)',
+                             ((name, key) for name in set(mentions)))
+        self._db.execute('INSERT INTO documents VALUES (?, ?)',
+                         (key, json.dumps(broadcast)))
+
+        updated_at = broadcast.get('updated_at')
+        if updated_at is not None and updated_at > self.high_water:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             ('high_water', updated_at))
+
+    def update(self, broadcasts):
+        """Add each broadcast in an iterable, returning how many were added"""
+        count = 0
+        for broadcast in broadcasts:
+            self.add(broadcast)
+            count += 1
+        return count
+
+    def remove(self, broadcast_id):
+        """Remove a broadcast from the index
+
+        :raises KeyError: if the broadcast is not in the index
+        """
+        key = unicode(broadcast_id)
+        if not self._delete(key):
+            raise KeyError(broadcast_id)
+
+    def _delete(self, key):
+        """Delete a broadcast's rows, returning whether it was indexed"""
+        deleted = self._db.execute('DELETE FROM documents WHERE id = ?', (key,))
+        if not deleted.rowcount:
+            return False
+        self._db.execute('DELETE FROM postings WHERE id = ?', (key,))
+        self._db.execute('DELETE FROM mentions WHERE id = ?', (key,))
+        return True
+
+    def search(self, query, limit=None):
+        """Find the broadcasts matching a query, best match first
+
+        :param query: the words to search for
+        :param limit: the largest number of broadcasts to return
+        """
+        words, mentions = parse_query(query)
+        candidates = None
+        for name in mentions:
+            mentioning = self._mentioning(name)
+            candidates = mentioning if candidates is None else candidates & mentioning
+
+        if words:
+            scores = collections.defaultdict(float)
+            total = float(len(self))
+            for word in words:
+                for postings in self._expand(word).itervalues():
+                    idf = math.log(1 + total / len(postings))
+                    for key, count in postings:
+                        if candidates is None or key in candidates:
+                            scores[key] += (1 + math.log(count)) * idf
+        elif candidates is not None:
+            scores = dict.fromkeys(candidates, 0)
+        else:
+            scores = dict.fromkeys((key for key, in
+                                    self._db.execute('SELECT id FROM documents')), 0)
+
+        ranked = sorted(scores, key=lambda key: (-scores[key], self._sort_id(key)))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return self._documents(ranked)
+
+    def mentioning(self, name):
+        """Get the broadcasts mentioning a user, in order of id
+
+        :param name: the name mentioned, with or without the @
+        """
+        keys = self._mentioning(name.lstrip('@').lower())
+        return self._documents(sorted(keys, key=self._sort_id))
+
+    def _mentioning(self, name):
+        return set(key for key, in self._db.execute(
+            'SELECT id FROM mentions WHERE name = ?', (name,)))
+
+    def _expand(self, word):
+        """Get the postings of the indexed terms matching a query word
+
+        :return: a dict of term to a list of (id, count) tuples
+        """
+        if not word.endswith('*'):
+            rows = self._db.execute(
+                'SELECT term, id, count FROM postings WHERE term = ?', (word,))
+        elif len(word) > 1:
+            #every term from the prefix up to the next possible prefix
+            prefix = word[:-1]
+            end = prefix[:-1] + unichr(ord(prefix[-1]) + 1)
+            rows = self._db.execute(
+                'SELECT term, id, count FROM postings WHERE term >= ? AND term < ?',
+                (prefix, end))
+        else:
+            rows = self._db.execute('SELECT term, id, count FROM postings')
+
+        postings = collections.defaultdict(list)
+        for term, key, count in rows:
+            postings[term].append((key, count))
+        return postings
+
+    def _documents(self, keys):
+        """Load broadcasts by id, in the order of keys"""
+        documents = {}
+        for start in xrange(0, len(keys), MAX_VARIABLES):
+            chunk = keys[start:start + MAX_VARIABLES]
+            rows = self._db.execute(
+                'SELECT id, data FROM documents WHERE id IN (%s)' %
+                ', '.join('?' * len(chunk)), chunk)
+            documents.update((key, json.loads(data)) for key, data in rows)
+        return [documents[key] for key in keys]
+
+    @staticmethod
+    def _sort_id(key):
+        """Order ids numerically where they are numbers"""
+        try:
+            return (0, int(key), key)
+        except ValueError:
+            return (1, 0, key)
+
+    ###########################################################################
+    # Persistence
+    ###########################################################################
+
+    def save(self, path=None):
+        """Write changes to the index, or copy the index to another file
+
+        :param path: a file to copy the index to, replacing any file there
+        """
+        if path is None or path == self.path:
+            self._db.commit()
+            return
+
+        target = SearchIndex.create(path)
+        try:
+            for table in TABLES:
+                rows = self._db.execute('SELECT * FROM %s' % table)
+                columns = len(rows.description)
+                target._db.executemany('INSERT OR REPLACE INTO %s VALUES (%s)' %
+                                       (table, ', '.join('?' * columns)), rows)
+            target.save()
+        finally:
+            target.close()
+
+    @classmethod
+    def load(cls, path=SEARCH_INDEX_FILE):
+        """Open an index saved with save
+
+        :raises ValueError: if the file is missing or not a saved index
+        """
+        if not os.path.isfile(path):
+            raise ValueError("No search index found at %s" % path)
+
+        db = sqlite3.connect(path)
+        try:
+            row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError:
+            row = None
+        finally:
+            db.close()
+        if row is None or row[0] != str(INDEX_VERSION):
+            raise ValueError("%s is not a search index" % path)
+        return cls(path)
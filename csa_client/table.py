@@ -0,0 +1,359 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import array
+import calendar
+import collections
+import datetime
+import itertools
+
+from records import TIMESTAMP_FORMAT
+
+def timestamp_to_epoch(value):
+    """Convert a timestamp sent by the application to seconds since the epoch
+
+    :param value: a timestamp string such as 2014-11-25T14:15:30.777Z
+    """
+    if not isinstance(value, basestring):
+        raise TypeError("timestamp must be a string")
+    parsed = datetime.datetime.strptime(value, TIMESTAMP_FORMAT)
+    return calendar.timegm(parsed.timetuple()) + parsed.microsecond / 1e6
+
+def _to_int(value):
+    """Convert a value to an int, rejecting missing values and fractions"""
+    if value is None or isinstance(value, float) and value != int(value):
+        raise ValueError("not an integer: %r" % (value,))
+    return int(value)
+
+# Type code and conversion for each column stored in a typed array
+TYPED_COLUMNS = {
+    'id': ('l', _to_int),
+    'user_id': ('l', _to_int),
+    'grad_year': ('l', _to_int),
+    'jobs': ('b', _to_int),
+    'created_at': ('d', timestamp_to_epoch),
+    'updated_at': ('d', timestamp_to_epoch),
+}
+
+
+class StringColumn(object):
+    """ A column stored as an array of codes into a table of distinct values.
+
+    Each distinct value is stored once, so columns where values repeat,
+    like names or phone numbers, are small. Operations which test values
+    only need to test each distinct value once.
+    """
+    #converter applied to values appended by ColumnTable, if any
+    convert = None
+
+    def __init__(self, values=None, codes=None):
+        self.values = values if values is not None else []
+        self.codes = codes if codes is not None else array.array('l')
+        self._index = {}
+        for code, value in enumerate(self.values):
+            try:
+                self._index.setdefault(value, code)
+            except TypeError:
+                pass
+
+    def append(self, value):
+        """Add a value to the end of the column"""
+        try:
+            code = self._index[value]
+        except KeyError:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        except TypeError:
+            #unhashable values are not shared
+            code = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def extend(self, values):
+        """Add each value in an iterable to the end of the column"""
+        for value in values:
+            self.append(value)
+
+    def take(self, indices):
+        """Get a new column with the values at the given rows
+
+        :param indices: the rows to take, in order
+        """
+        codes = self.codes
+        return StringColumn(self.values,
+                            array.array('l', map(codes.__getitem__, indices)))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        values = self.values
+        for code in self.codes:
+            yield values[code]
+
+
+class ColumnTable(object):
+    """ A set of results stored column by column.
+
+    Numeric columns and timestamps are stored in typed arrays, and all
+    other columns in a StringColumn. Timestamps are stored as seconds since
+    the epoch. A typed column which has a value that cannot be converted,
+    such as a missing value, is stored as a StringColumn instead.
+
+    Filtering, grouping and sorting work on whole columns at once and
+    return new tables. A new table only records which rows it holds, and
+    copies a column out of the original table when it is first used.
+
+    :param columns: an OrderedDict of column name to column
+    :param selection: the rows of the columns in this table, or None for
+                      every row
+    """
+
+    def __init__(self, columns=None, selection=None):
+        self._source = columns if columns is not None else collections.OrderedDict()
+        self._selection = selection
+        if selection is None:
+            self._columns = self._source
+            lengths = set(len(column) for column in self._source.itervalues())
+            if len(lengths) > 1:
+                raise ValueError("columns have different lengths")
+        else:
+            self._columns = {}
+
+    @classmethod
+    def from_dicts(cls, items, types=TYPED_COLUMNS):
+        """Build a table from an iterable of dicts, such as search results
+
+        Items are consumed one at a time, so a streaming search can be
+        loaded without holding every result as a dict.
+
+        :param items: an iterable of dicts or records
+        :param types: a dict of column name to array type code and converter
+        """
+        columns = collections.OrderedDict()
+        length = 0
+        for item in items:
+            if hasattr(item, 'to_dict'):
+                item = item.to_dict()
+            for name, value in item.iteritems():
+                if name not in columns:
+                    columns[name] = cls._new_column(name, types, length)
+                column = columns[name]
+                if len(column) < length:
+                    column = columns[name] = cls._pad(column, length)
+                columns[name] = cls._append(column, value)
+            length += 1
+
+        for name, column in columns.iteritems():
+            if len(column) < length:
+                columns[name] = cls._pad(column, length)
+        return cls(columns)
+
+    @staticmethod
+    def _new_column(name, types, length):
+        """Create the column for a name first seen at the given row"""
+        if name not in types:
+            column = StringColumn()
+        elif length:
+            #earlier rows are missing this column
+            column = StringColumn()
+            column.convert = types[name][1]
+        else:
+            typecode, convert = types[name]
+            return _TypedColumn(typecode, convert)
+        column.extend([None] * length)
+        return column
+
+    @staticmethod
+    def _pad(column, length):
+        """Fill a column with missing values up to a length"""
+        if isinstance(column, _TypedColumn):
+            column = column.to_string_column()
+        column.extend([None] * (length - len(column)))
+        return column
+
+    @staticmethod
+    def _append(column, value):
+        """Append to a column, returning the column which holds the value"""
+        if isinstance(column, _TypedColumn):
+            try:
+                column.append(column.convert(value))
+                return column
+            except (TypeError, ValueError):
+                column = column.to_string_column()
+        elif column.convert is not None:
+            try:
+                value = column.convert(value)
+            except (TypeError, ValueError):
+                pass
+        column.append(value)
+        return column
+
+    def _column(self, name):
+        """Get a column, copying it out of the original table if needed"""
+        column = self._columns.get(name)
+        if column is None:
+            column = self._source[name].take(self._selection)
+            self._columns[name] = column
+        return column
+
+    def __len__(self):
+        if self._selection is not None:
+            return len(self._selection)
+        if not self._source:
+            return 0
+        return len(next(self._source.itervalues()))
+
+    def __getitem__(self, name):
+        column = self._column(name)
+        if isinstance(column, _TypedColumn):
+            return column.data
+        return column
+
+    def __iter__(self):
+        return self.rows()
+
+    @property
+    def column_names(self):
+        """The names of the columns, in the order they were first seen"""
+        return list(self._source)
+
+    def row(self, index):
+        """Get a single row as a dict"""
+        return dict((name, self[name][index]) for name in self._source)
+
+    def rows(self):
+        """Iterate over the rows as dicts"""
+        names = self.column_names
+        columns = [self[name] for name in names]
+        for values in itertools.izip(*columns):
+            yield dict(itertools.izip(names, values))
+
+    def take(self, indices):
+        """Get a new table with only the given rows
+
+        :param indices: the rows to take, in order
+        """
+        if self._selection is not None:
+            indices = map(self._selection.__getitem__, indices)
+        return ColumnTable(self._source, array.array('l', indices))
+
+    def filter(self, name, predicate):
+        """Get a new table with the rows where predicate(value) is true
+
+        The predicate is called once for each distinct value where values
+        repeat, so it is cheap to filter on columns like grad_year.
+
+        :param name: the column to test
+        :param predicate: a function of a single value
+        """
+        column = self._column(name)
+        if isinstance(column, StringColumn):
+            keys = column.codes
+            keep = [bool(predicate(value)) for value in column.values]
+        elif column.data.typecode == 'b':
+            #map each byte of the column to a 0 or 1 byte in a single pass
+            table = bytearray(256)
+            for value in set(column.data):
+                table[value % 256] = bool(predicate(value))
+            mask = bytearray(column.data.tostring().translate(str(table)))
+            return self.take(itertools.compress(xrange(len(mask)), mask))
+        else:
+            keys = column.data
+            distinct = set(keys)
+            if len(distinct) * 2 > len(keys):
+                return self.take([i for i, value in enumerate(keys)
+                                  if predicate(value)])
+            keep = dict((value, bool(predicate(value))) for value in distinct)
+        mask = map(keep.__getitem__, keys)
+        return self.take(itertools.compress(xrange(len(keys)), mask))
+
+    def sort(self, name, reverse=False):
+        """Get a new table sorted by a column
+
+        The sort is stable, so sorting by several columns in turn, starting
+        with the least significant, sorts by all of them.
+
+        :param name: the column to sort by
+        :param reverse: sort in descending order
+        """
+        column = self._column(name)
+        if isinstance(column, StringColumn):
+            #rank the distinct values once and sort the rows by rank
+            order = sorted(xrange(len(column.values)),
+                           key=column.values.__getitem__)
+            rank = array.array('l', [0] * len(order))
+            for position, code in enumerate(order):
+                rank[code] = position
+            keys = map(rank.__getitem__, column.codes)
+        else:
+            keys = column.data
+        return self.take(sorted(xrange(len(self)), key=keys.__getitem__,
+                                reverse=reverse))
+
+    def group_by(self, name):
+        """Split the table into a table for each value of a column
+
+        :param name: the column to group by
+        :return: an OrderedDict of value to table, in order of first row
+        """
+        groups = collections.OrderedDict()
+        for index, value in enumerate(self[name]):
+            groups.setdefault(value, []).append(index)
+        return collections.OrderedDict((value, self.take(indices))
+                                       for value, indices in groups.iteritems())
+
+    def count_by(self, name):
+        """Count the rows with each value of a column
+
+        :param name: the column to count
+        :return: a Counter of value to number of rows
+        """
+        column = self._column(name)
+        if isinstance(column, StringColumn):
+            counts = _count(column.codes)
+            return collections.Counter(dict((column.values[code], count)
+                                            for code, count in counts.iteritems()))
+        return _count(column.data)
+
+    def __repr__(self):
+        return '<ColumnTable %d rows: %s>' % (len(self), ', '.join(self._source))
+
+
+def _count(keys):
+    """Count each distinct value in an array"""
+    counts = collections.defaultdict(int)
+    for key in keys:
+        counts[key] += 1
+    return collections.Counter(counts)
+
+
+class _TypedColumn(object):
+    """ A column of numbers stored in an array """
+
+    def __init__(self, typecode, convert, data=None):
+        self.convert = convert
+        self.data = data if data is not None else array.array(typecode)
+
+    def append(self, value):
+        self.data.append(value)
+
+    def take(self, indices):
+        data = self.data
+        return _TypedColumn(data.typecode, self.convert,
+                            array.array(data.typecode,
+                                        map(data.__getitem__, indices)))
+
+    def to_string_column(self):
+        """Get a StringColumn holding the values converted so far"""
+        column = StringColumn()
+        column.convert = self.convert
+        column.extend(self.data)
+        return column
+
+    def __len__(self):
+        return len(self.data)
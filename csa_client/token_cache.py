@@ -2,22 +2,51 @@ __author__ = "Samuel Jackson"
 __date__ = "December 2, 2014"
 __license__ = "MIT"
 
+import json
 import os
-import pickledb
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 from constants import *
 
+# Values cached alongside the tokens when they are known
+OPTIONAL_KEYS = ('expires_in', 'issued_at', 'user_id')
+
 class TokenCache(object):
+    """ Stores oauth tokens in a small JSON file between commands.
+
+    The file is replaced atomically by writing a temporary file and renaming
+    it over the old one, so readers never see a partly written file. A lock
+    file serialises processes updating the cache at the same time, and the
+    file is only rewritten when the tokens have changed.
+    """
     @staticmethod
     def cache_tokens(token_data):
-        """Save oauth tokens to a local file between commands"""
+        """Save oauth tokens to a local file between commands
+
+        :returns: True if the file was written, False if it was unchanged
+        """
         if not token_data:
             raise ValueError("Token data does not exist.")
 
-        db = pickledb.load(TOKEN_FILE, False)
-        db.set('access_token', token_data['access_token'])
-        db.set('refresh_token', token_data['refresh_token'])
-        db.dump()
+        tokens = {
+            'access_token': token_data['access_token'],
+            'refresh_token': token_data['refresh_token']
+        }
+        for key in OPTIONAL_KEYS:
+            if key in token_data:
+                tokens[key] = token_data[key]
+
+        with TokenCache._lock(exclusive=True):
+            if TokenCache._read() == tokens:
+                return False
+            TokenCache._write(tokens)
+        return True
 
     @staticmethod
     def load_tokens():
@@ -25,8 +54,63 @@ class TokenCache(object):
         if not os.path.isfile(TOKEN_FILE):
             raise ValueError("Token cache file does not exist.")
 
-        db = pickledb.load(TOKEN_FILE, False)
+        with TokenCache._lock(exclusive=False):
+            cached = TokenCache._read()
+
+        if cached is None:
+            raise ValueError("Token cache file is corrupt.")
+
         tokens = {}
-        tokens['access_token'] = db.get('access_token')
-        tokens['refresh_token'] = db.get('refresh_token')
+        tokens['access_token'] = cached.get('access_token')
+        tokens['refresh_token'] = cached.get('refresh_token')
+        for key in OPTIONAL_KEYS:
+            if cached.get(key):
+                tokens[key] = cached[key]
         return tokens
+
+    @staticmethod
+    def _read():
+        """Read the cache file, returning None if it is missing or invalid"""
+        try:
+            with open(TOKEN_FILE, 'rb') as file_handle:
+                return json.loads(file_handle.read())
+        except (IOError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(tokens):
+        """Atomically replace the cache file with new tokens"""
+        directory = os.path.dirname(os.path.abspath(TOKEN_FILE))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.csa_tokens')
+        try:
+            with os.fdopen(fd, 'wb') as file_handle:
+                file_handle.write(json.dumps(tokens))
+                file_handle.flush()
+                os.fsync(file_handle.fileno())
+
+            if os.name == 'nt' and os.path.exists(TOKEN_FILE):
+                os.remove(TOKEN_FILE)
+            os.rename(temp_path, TOKEN_FILE)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    @contextmanager
+    def _lock(exclusive):
+        """Hold a lock on the cache's lock file
+
+        :param exclusive: take a write lock rather than a shared read lock
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(TOKEN_LOCK_FILE, 'a') as lock_file:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.flock(lock_file.fileno(), mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,121 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import copy
+import threading
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, \
+                                                      HTTPSConnectionPool
+
+from constants import *
+
+class TransportConfig(object):
+    """ Connection pooling and timeout settings used by a RequestHandler.
+
+    :param pool_connections: number of hosts to keep connection pools for
+    :param pool_maxsize: number of connections to keep open per host
+    :param pool_block: whether to wait for a free connection when the pool
+                       is exhausted rather than opening a throw away one
+    :param connect_timeout: seconds to wait when opening a connection
+    :param read_timeout: seconds to wait for the server to respond
+    :param keep_alive: whether to reuse connections between requests
+    """
+    def __init__(self, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 keep_alive=KEEP_ALIVE):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+
+    @property
+    def timeout(self):
+        """Timeout tuple in the form expected by requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def copy(self, **changes):
+        """Copy this configuration replacing some of its settings"""
+        config = copy.copy(self)
+        config.__dict__.update(changes)
+        return config
+
+
+class PoolStats(object):
+    """ Counters for the connections handed out by a connection pool.
+
+    opened counts requests which needed a new connection, reused counts
+    requests sent over a connection which was already open and discarded
+    counts connections closed because the pool was full or they failed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.opened = 0
+            self.reused = 0
+            self.discarded = 0
+
+    def increment(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'reused': self.reused,
+                'discarded': self.discarded
+            }
+
+
+def _counting_pool_class(pool_class, stats):
+    """Create a connection pool class which records its usage in stats"""
+
+    def _get_conn(self, timeout=None):
+        conn = pool_class._get_conn(self, timeout)
+        if getattr(conn, 'sock', None) is None:
+            stats.increment('opened')
+        else:
+            stats.increment('reused')
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is None or self.pool is None or self.pool.full():
+            stats.increment('discarded')
+        pool_class._put_conn(self, conn)
+
+    return type('Counting' + pool_class.__name__, (pool_class,),
+                {'_get_conn': _get_conn, '_put_conn': _put_conn})
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """ HTTP adapter which is sized by a TransportConfig and counts the
+    connections it opens, reuses and discards.
+
+    :param config: the TransportConfig to size the pool with
+    :param stats: the PoolStats to record connection usage in
+    """
+    def __init__(self, config, stats):
+        self.stats = stats
+        super(PooledHTTPAdapter, self).__init__(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            pool_block=config.pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PooledHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats)
+        }
+
+    def __setstate__(self, state):
+        self.stats = state.get('stats', PoolStats())
+        super(PooledHTTPAdapter, self).__setstate__(state)
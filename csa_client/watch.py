@@ -0,0 +1,78 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import time
+
+from requests.exceptions import HTTPError, ConnectionError, Timeout
+
+from constants import *
+
+def broadcast_key(broadcast):
+    """Get the key broadcasts are ordered by: created_at, then id"""
+    broadcast_id = broadcast.get('id')
+    try:
+        broadcast_id = (0, int(broadcast_id))
+    except (TypeError, ValueError):
+        broadcast_id = (1, broadcast_id)
+    return (broadcast.get('created_at') or '', broadcast_id)
+
+def watch(poll, last=None, interval=WATCH_INTERVAL,
+          max_interval=WATCH_MAX_INTERVAL, sleep=time.sleep, max_polls=None):
+    """Yield new broadcasts, oldest first, by polling for them
+
+    The newest broadcast seen is kept as a high-water mark, and only
+    broadcasts after it are yielded. The wait between polls grows while
+    nothing new is posted, and drops back to interval once something is.
+    Connection errors, timeouts and server errors also make the wait grow
+    rather than stopping the watch.
+
+    :param poll: function of the newest created_at seen, or None, which
+                 returns the broadcasts on the server, or None if they have
+                 not changed since the last poll
+    :param last: the last broadcast already seen. By default the
+                 broadcasts on the server when watching starts are skipped.
+    :param interval: shortest wait in seconds between polls
+    :param max_interval: longest wait in seconds between polls
+    :param sleep: function used to wait between polls
+    :param max_polls: stop after this many polls, or None to watch forever
+    """
+    high_water = broadcast_key(last) if last is not None else None
+    started = last is not None
+    wait = interval
+    polls = 0
+
+    while max_polls is None or polls < max_polls:
+        if polls:
+            sleep(wait)
+        polls += 1
+
+        since = high_water[0] if high_water is not None else None
+        try:
+            broadcasts = poll(since)
+        except (ConnectionError, Timeout):
+            broadcasts = None
+        except HTTPError, e:
+            if e.response is None or e.response.status_code < 500:
+                raise
+            broadcasts = None
+
+        new = []
+        if broadcasts is not None and not started:
+            #first answer from the server, skip what is already there
+            started = True
+            if broadcasts:
+                high_water = max(broadcast_key(b) for b in broadcasts)
+        elif broadcasts:
+            new = sorted((b for b in broadcasts
+                          if high_water is None or broadcast_key(b) > high_water),
+                         key=broadcast_key)
+
+        if new:
+            high_water = broadcast_key(new[-1])
+            wait = interval
+        else:
+            wait = min(wait * WATCH_BACKOFF, max_interval)
+
+        for broadcast in new:
+            yield broadcast
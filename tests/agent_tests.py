@@ -0,0 +1,161 @@
+import unittest
+import nose.tools
+import requests
+import responses
+import json
+import os
+import threading
+
+from click.testing import CliRunner
+from test_helpers import *
+from csa_client import constants
+from csa_client.api import CsaAPI
+from csa_client.agent import AgentServer, AgentError, connect_agent
+from csa_client.token_cache import TokenCache
+from csa_client.command import cli
+
+SOCKET = '.csa_agent_test.sock'
+
+class AgentTests(unittest.TestCase):
+
+    @responses.activate
+    def setUp(self):
+        mock_auth_response(user_id=39)
+        self.api = CsaAPI("admin", 'taliesin')
+        responses.reset()
+
+        self.server = AgentServer(self.api, SOCKET)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        self.thread.start()
+        self.client = connect_agent(SOCKET)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        for path in (constants.TOKEN_FILE, constants.TOKEN_LOCK_FILE):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @responses.activate
+    def test_get_user(self):
+        fixture = mock_show_user_response(39)
+        nose.tools.assert_dict_equal(fixture, self.client.get_user(39))
+
+    @responses.activate
+    def test_uses_resolved_user_id(self):
+        fixture = mock_show_user_response(39)
+        nose.tools.assert_dict_equal(fixture, self.client.get_user())
+        nose.tools.assert_equal(1, len(responses.calls))
+
+    @responses.activate
+    def test_many_calls_on_one_connection(self):
+        mock_show_user_response(39)
+        for _ in range(10):
+            self.client.get_user(39)
+        nose.tools.assert_equal(10, len(responses.calls))
+
+    @responses.activate
+    def test_tokens_cached_only_when_changed(self):
+        mock_show_user_response(39)
+        for _ in range(3):
+            self.client.get_user(39)
+        nose.tools.assert_false(os.path.exists(constants.TOKEN_LOCK_FILE))
+
+        self.api.get_session().set_tokens({'access_token': 'new', 'refresh_token': 'new'})
+        self.client.get_user(39)
+        nose.tools.assert_equal('new', TokenCache.load_tokens()['access_token'])
+
+    def test_socket_is_private(self):
+        nose.tools.assert_equal(0600, os.stat(SOCKET).st_mode & 0777)
+
+    @responses.activate
+    def test_http_error(self):
+        mock_show_user_response(41, status=403, body='{"error": "forbidden"}')
+        try:
+            self.client.get_user(41)
+        except requests.exceptions.HTTPError, e:
+            nose.tools.assert_equal(403, e.response.status_code)
+            nose.tools.assert_equal('{"error": "forbidden"}', e.response.text)
+        else:
+            raise AssertionError("HTTPError not raised")
+
+    @nose.tools.raises(AttributeError)
+    def test_unsupported_method(self):
+        self.client.get_session()
+
+    @nose.tools.raises(AgentError)
+    def test_unsupported_agent_method(self):
+        self.client.call('verify')
+
+    @nose.tools.raises(AgentError)
+    def test_already_running(self):
+        AgentServer(self.api, SOCKET)
+
+    def test_not_running(self):
+        nose.tools.assert_is_none(connect_agent('.csa_no_agent.sock'))
+
+    @responses.activate
+    def test_cli_forwards_to_agent(self):
+        mock_show_user_response(39)
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            server = AgentServer(self.api, constants.AGENT_SOCKET)
+            thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+            thread.start()
+            try:
+                result = runner.invoke(cli, ['users', 'show', '--user-id=39'])
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+        nose.tools.assert_false(result.exception)
+        nose.tools.assert_in('Surname39', result.output)
+        nose.tools.assert_equal(1, len(responses.calls))
+
+    @responses.activate
+    def test_authorize_stops_running_agent(self):
+        mock_auth_response(body=json.dumps({'access_token': 'second',
+                                            'refresh_token': 'second'}))
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            api = CsaAPI(tokens={'access_token': 'first', 'refresh_token': 'first',
+                                 'user_id': 39})
+            server = AgentServer(api, constants.AGENT_SOCKET)
+
+            def serve():
+                try:
+                    server.serve_forever(0.01)
+                finally:
+                    server.server_close()
+            thread = threading.Thread(target=serve)
+            thread.start()
+
+            #the agent refreshed its tokens, so caches them as it exits
+            api.get_session().set_tokens({'access_token': 'refreshed',
+                                          'refresh_token': 'refreshed'})
+            try:
+                result = runner.invoke(cli, ['authorize'],
+                                       input='admin\ntaliesin\ntaliesin')
+            finally:
+                if thread.is_alive():
+                    server.shutdown()
+                thread.join()
+
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_in('Stopped the running agent', result.output)
+            nose.tools.assert_false(os.path.exists(constants.AGENT_SOCKET))
+            nose.tools.assert_equal('second', TokenCache.load_tokens()['access_token'])
+
+    @responses.activate
+    def test_iter_search(self):
+        fixture = load_fixture('broadcasts/search.json')
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/broadcasts/search'),
+                      body=fixture, status=200)
+        nose.tools.assert_equal(json.loads(fixture),
+                                list(self.client.iter_broadcasts_search('')))
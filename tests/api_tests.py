@@ -9,6 +9,9 @@ from requests.exceptions import HTTPError
 from test_helpers import *
 from csa_client import constants
 from csa_client.api import CsaAPI
+from csa_client.cache import ResponseCache
+from csa_client.records import User, Broadcast
+from csa_client.table import ColumnTable
 
 class ApiTests(unittest.TestCase):
 
@@ -356,3 +359,215 @@ class ApiTests(unittest.TestCase):
 
         api = CsaAPI("admin", 'taliesin')
         response = api.make_coffee()
+
+    ##########################################################################
+    # Verify tests
+    ##########################################################################
+
+    @responses.activate
+    def test_lazy_verify(self):
+        fixture = mock_show_user_response(39)
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/users/verify'),
+                      body=json.dumps({"id": 39}),
+                      status=200,
+                      content_type='application/json')
+
+        tokens = {'access_token': 'abcd', 'refresh_token': 'abcd'}
+        api = CsaAPI(tokens=tokens, lazy_verify=True)
+        nose.tools.assert_equal(0, len(responses.calls))
+
+        user = api.get_user()
+        nose.tools.assert_equal(39, user['id'])
+        nose.tools.assert_equal(2, len(responses.calls))
+        nose.tools.assert_equal(39, api.get_tokens()['user_id'])
+
+    @responses.activate
+    def test_cached_user_id_skips_verify(self):
+        mock_show_user_response(39)
+
+        tokens = {'access_token': 'abcd', 'refresh_token': 'abcd', 'user_id': 39}
+        api = CsaAPI(tokens=tokens)
+        user = api.get_user()
+
+        nose.tools.assert_equal(39, user['id'])
+        nose.tools.assert_equal(1, len(responses.calls))
+
+    @responses.activate
+    def test_eager_verify(self):
+        mock_auth_response(user_id=39)
+
+        api = CsaAPI("admin", 'taliesin')
+        nose.tools.assert_equal(39, api.get_tokens()['user_id'])
+
+    ##########################################################################
+    # Response cache tests
+    ##########################################################################
+
+    @responses.activate
+    def test_cached_get_user(self):
+        mock_auth_response()
+        fixture = mock_show_user_response(39)
+
+        api = CsaAPI("admin", 'taliesin', cache=ResponseCache())
+        responses.calls.reset()
+        nose.tools.assert_dict_equal(fixture, api.get_user(39))
+        nose.tools.assert_dict_equal(fixture, api.get_user(39))
+        nose.tools.assert_equal(1, len(responses.calls))
+
+    @responses.activate
+    def test_update_invalidates_cached_user(self):
+        mock_auth_response()
+        mock_show_user_response(39)
+        responses.add(responses.PUT,
+                      RequestHandler._build_end_point_uri('/users/update/:id', {':id': 39}),
+                      status=200)
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/users/search'),
+                      body='[]', status=200)
+
+        api = CsaAPI("admin", 'taliesin', cache=ResponseCache())
+        user = api.get_user(39)
+        api.users_search('Surname')
+        user['grad_year'] = 1986
+        api.update_user(user)
+
+        responses.calls.reset()
+        api.get_user(39)
+        api.users_search('Surname')
+        nose.tools.assert_equal(2, len(responses.calls))
+
+    @responses.activate
+    def test_destroy_invalidates_cached_broadcast(self):
+        mock_auth_response()
+        fixture = load_fixture("broadcasts/1.json")
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/broadcasts/show/:id', {':id': 1}),
+                      body=fixture, status=200)
+        responses.add(responses.DELETE,
+                      RequestHandler._build_end_point_uri('/broadcasts/destroy/:id', {':id': 1}),
+                      status=200)
+
+        cache = ResponseCache()
+        api = CsaAPI("admin", 'taliesin', cache=cache)
+        api.get_broadcast(1)
+        api.get_broadcast(1)
+        api.destroy_broadcast(1)
+        api.get_broadcast(1)
+
+        nose.tools.assert_equal(2, cache.stats()['misses'])
+        nose.tools.assert_equal(1, cache.stats()['hits'])
+
+    ##########################################################################
+    # Streaming search tests
+    ##########################################################################
+
+    @responses.activate
+    def test_iter_users_search(self):
+        mock_auth_response()
+        fixture = load_fixture('users/search.json')
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/users/search'),
+                      body=fixture, status=200,
+                      content_type='application/json')
+
+        api = CsaAPI("admin", 'taliesin')
+        users = api.iter_users_search()
+        nose.tools.assert_false(isinstance(users, list))
+        nose.tools.assert_equal(json.loads(fixture), list(users))
+
+    @responses.activate
+    def test_iter_broadcasts_search(self):
+        mock_auth_response()
+        fixture = load_fixture('broadcasts/search.json')
+
+        def check_query(request):
+            nose.tools.assert_equal('Chris', json.loads(request.body)['q'])
+            return (200, {}, fixture)
+
+        responses.add_callback(responses.GET,
+                               RequestHandler._build_end_point_uri('/broadcasts/search'),
+                               callback=check_query)
+
+        api = CsaAPI("admin", 'taliesin')
+        nose.tools.assert_equal(json.loads(fixture),
+                                list(api.iter_broadcasts_search('Chris')))
+
+    ##########################################################################
+    # Record tests
+    ##########################################################################
+
+    @responses.activate
+    def test_get_user_as_record(self):
+        mock_auth_response()
+        fixture = mock_show_user_response(39)
+
+        api = CsaAPI("cwl39", 'taliesin', records=True)
+        user = api.get_user(39)
+        nose.tools.assert_true(isinstance(user, User))
+        nose.tools.assert_equal(fixture, user.to_dict())
+
+    @responses.activate
+    def test_update_user_from_record(self):
+        mock_auth_response()
+        mock_show_user_response(39)
+
+        def check_payload(request):
+            payload = json.loads(request.body)
+            nose.tools.assert_equal(1986, payload["grad_year"])
+            nose.tools.assert_equal("Surname39", payload["surname"])
+            return (200, {}, {})
+
+        responses.add_callback(responses.PUT,
+                      RequestHandler._build_end_point_uri('/users/update/:id',
+                                                    {':id': '39'}),
+                      callback=check_payload,
+                      content_type='application/json')
+
+        api = CsaAPI("cwl39", 'taliesin', records=True)
+        user = api.get_user(39)
+        user.grad_year = 1986
+        api.update_user(user)
+
+    @responses.activate
+    def test_search_broadcasts_as_records(self):
+        mock_auth_response()
+        fixture = load_fixture('broadcasts/search.json')
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/broadcasts/search'),
+                      body=fixture, status=200,
+                      content_type='application/json')
+
+        api = CsaAPI("admin", 'taliesin', records=True)
+        broadcasts = api.broadcasts_search()
+        nose.tools.assert_true(all(isinstance(b, Broadcast) for b in broadcasts))
+        nose.tools.assert_equal(json.loads(fixture), [b.to_dict() for b in broadcasts])
+
+        streamed = list(api.iter_broadcasts_search())
+        nose.tools.assert_equal(broadcasts, streamed)
+
+    @responses.activate
+    def test_search_as_table(self):
+        mock_auth_response()
+        fixture = load_fixture('users/search.json')
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/users/search'),
+                      body=fixture, status=200,
+                      content_type='application/json')
+
+        api = CsaAPI("admin", 'taliesin', records=True)
+        table = api.users_search(as_table=True)
+        nose.tools.assert_true(isinstance(table, ColumnTable))
+        nose.tools.assert_equal([u['id'] for u in json.loads(fixture)],
+                                list(table['id']))
+
+    @responses.activate
+    @nose.tools.raises(requests.exceptions.HTTPError)
+    def test_iter_search_error(self):
+        mock_auth_response()
+        responses.add(responses.GET,
+                      RequestHandler._build_end_point_uri('/users/search'),
+                      status=422)
+
+        api = CsaAPI("cwl39", 'taliesin')
+        list(api.iter_users_search())
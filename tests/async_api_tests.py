@@ -0,0 +1,65 @@
+import unittest
+import nose.tools
+import requests
+import responses
+import json
+import os
+
+from test_helpers import *
+from csa_client import constants
+from csa_client.async_api import AsyncCsaAPI
+
+class AsyncApiTests(unittest.TestCase):
+
+    def tearDown(self):
+        responses.reset()
+        if os.path.isfile(constants.TOKEN_FILE):
+            os.remove(constants.TOKEN_FILE)
+
+    @responses.activate
+    def test_get_user(self):
+        mock_auth_response()
+        fixture = mock_show_user_response(39)
+
+        with AsyncCsaAPI(username="admin", password='taliesin') as api:
+            future = api.get_user(39)
+            nose.tools.assert_dict_equal(fixture, future.result(timeout=5))
+
+    @responses.activate
+    def test_many_requests_in_flight(self):
+        mock_auth_response()
+        fixtures = {39: mock_show_user_response(39),
+                    41: mock_show_user_response(41)}
+
+        user_ids = [39, 41] * 50
+        with AsyncCsaAPI(username="admin", password='taliesin', workers=8) as api:
+            futures = [api.get_user(user_id) for user_id in user_ids]
+            users = [future.result(timeout=5) for future in futures]
+
+        expected = [dict(fixtures[i], id=i) for i in user_ids]
+        nose.tools.assert_equal(expected, users)
+
+    @responses.activate
+    @nose.tools.raises(requests.exceptions.HTTPError)
+    def test_request_error(self):
+        mock_auth_response()
+        mock_show_user_response(41, status=403)
+
+        with AsyncCsaAPI(username="cwl39", password='taliesin') as api:
+            api.get_user(41).result(timeout=5)
+
+    @responses.activate
+    def test_refresh_on_unauthorized(self):
+        mock_auth_response()
+        fixture = load_fixture('broadcasts/1.json')
+        url = RequestHandler._build_end_point_uri('/broadcasts/show/:id', {':id': 1})
+        responses.add(responses.GET, url, status=401, body='')
+        responses.add(responses.GET, url, status=200, body=fixture)
+
+        with AsyncCsaAPI(username="admin", password='taliesin') as api:
+            broadcast = api.get_broadcast(1).result(timeout=5)
+
+        nose.tools.assert_dict_equal(json.loads(fixture), broadcast)
+        token_calls = [c for c in responses.calls
+                       if c.request.url.endswith('/oauth/token.json')]
+        nose.tools.assert_equal(2, len(token_calls))
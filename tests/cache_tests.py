@@ -0,0 +1,62 @@
+import unittest
+import nose.tools
+import time
+
+from csa_client.cache import ResponseCache
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=3, ttls={'/users/search': 0},
+                                   default_ttl=60)
+
+    def test_get_and_set(self):
+        self.cache.set('/users/show/:id', 39, {'id': 39})
+        nose.tools.assert_equal({'id': 39}, self.cache.get('/users/show/:id', '39'))
+        nose.tools.assert_is_none(self.cache.get('/users/show/:id', 41))
+
+        stats = self.cache.stats()
+        nose.tools.assert_equal(1, stats['hits'])
+        nose.tools.assert_equal(1, stats['misses'])
+
+    def test_values_are_copied(self):
+        user = {'id': 39, 'jobs': [1]}
+        self.cache.set('/users/show/:id', 39, user)
+        user['jobs'].append(2)
+
+        cached = self.cache.get('/users/show/:id', 39)
+        cached['jobs'].append(3)
+        nose.tools.assert_equal({'id': 39, 'jobs': [1]}, self.cache.get('/users/show/:id', 39))
+
+    def test_least_recently_used_is_evicted(self):
+        for user_id in (1, 2, 3):
+            self.cache.set('/users/show/:id', user_id, user_id)
+        self.cache.get('/users/show/:id', 1)
+        self.cache.set('/users/show/:id', 4, 4)
+
+        nose.tools.assert_is_none(self.cache.get('/users/show/:id', 2))
+        nose.tools.assert_equal(1, self.cache.get('/users/show/:id', 1))
+        nose.tools.assert_equal(1, self.cache.stats()['evictions'])
+        nose.tools.assert_equal(3, self.cache.stats()['entries'])
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttls={}, default_ttl=0.01)
+        cache.set('/users/show/:id', 39, {'id': 39})
+        time.sleep(0.02)
+        nose.tools.assert_is_none(cache.get('/users/show/:id', 39))
+
+    def test_zero_ttl_is_not_cached(self):
+        self.cache.set('/users/search', '', [])
+        nose.tools.assert_equal(0, self.cache.stats()['entries'])
+
+    def test_invalidate(self):
+        self.cache.set('/broadcasts/show/:id', 1, {})
+        self.cache.set('/broadcasts/search', 'a', [])
+        self.cache.set('/broadcasts/search', 'b', [])
+
+        self.cache.invalidate('/broadcasts/search')
+        nose.tools.assert_is_none(self.cache.get('/broadcasts/search', 'a'))
+        nose.tools.assert_equal({}, self.cache.get('/broadcasts/show/:id', 1))
+
+        self.cache.invalidate('/broadcasts/show/:id', '1')
+        nose.tools.assert_is_none(self.cache.get('/broadcasts/show/:id', 1))
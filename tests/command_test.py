@@ -10,6 +10,7 @@ from test_helpers import *
 from csa_client import constants
 from csa_client import RequestHandler
 from csa_client.command import *
+from csa_client.token_cache import TokenCache
 
 class CommandTests(unittest.TestCase):
 
@@ -28,6 +29,24 @@ class CommandTests(unittest.TestCase):
             nose.tools.assert_false(result.exception)
             nose.tools.assert_equal(0, result.exit_code)
 
+    @responses.activate
+    def test_commands_reuse_cached_user_id(self):
+        runner = CliRunner()
+        mock_auth_response(user_id=41)
+        mock_show_user_response(41)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+            nose.tools.assert_equal(41, TokenCache.load_tokens()['user_id'])
+
+            responses.calls.reset()
+            result = runner.invoke(cli, ['users', 'show'])
+            nose.tools.assert_false(result.exception)
+            urls = [call.request.url for call in responses.calls]
+            nose.tools.assert_equal([RequestHandler._build_end_point_uri('/users/show/:id', {':id': 41})],
+                                    urls)
+
     ##########################################################################
     # User tests
     ##########################################################################
@@ -195,3 +214,263 @@ class CommandTests(unittest.TestCase):
             result = runner.invoke(cli, ['broadcasts', 'destroy', '1'])
             nose.tools.assert_false(result.exception)
             nose.tools.assert_equal(0, result.exit_code)
+            #without a local index none is made
+            nose.tools.assert_false(os.path.exists(constants.SEARCH_INDEX_FILE))
+
+    @responses.activate
+    def test_search_broadcasts_locally(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        fixture = load_fixture('broadcasts/search.json')
+        url = RequestHandler._build_end_point_uri('/broadcasts/search')
+        responses.add(responses.GET, url, status=200, body=fixture)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(cli, ['broadcasts', 'search', '--local', 'chris'])
+            nose.tools.assert_equal(1, result.exit_code)
+
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            result = runner.invoke(cli, ['broadcasts', 'index'])
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_true('Indexed 2 broadcasts' in result.output)
+
+            #no requests are made for a local search
+            responses.reset()
+            result = runner.invoke(cli, ['broadcasts', 'search', '--local', '@chrisbashton'])
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_true('l4d2' in result.output)
+            nose.tools.assert_false('Savill' in result.output)
+
+            #destroying a broadcast removes it from the index
+            url = RequestHandler._build_end_point_uri('/broadcasts/destroy/:id', {':id': '15'})
+            responses.add(responses.DELETE, url, status=200)
+            result = runner.invoke(cli, ['broadcasts', 'destroy', '15'])
+            nose.tools.assert_equal(0, result.exit_code)
+            result = runner.invoke(cli, ['broadcasts', 'search', '--local', '@chrisbashton'])
+            nose.tools.assert_false('l4d2' in result.output)
+
+    @responses.activate
+    def test_watch_broadcasts(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        fixture = json.loads(load_fixture('broadcasts/search.json'))
+        url = RequestHandler._build_end_point_uri('/broadcasts/search')
+        responses.add(responses.GET, url, status=200, body=json.dumps(fixture[:1]))
+        responses.add(responses.GET, url, status=200, body=json.dumps(fixture))
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            result = runner.invoke(cli, ['broadcasts', 'watch', '--interval', '0',
+                                         '--polls', '2'])
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_equal("17\t41\t2014-12-05T14:22:07.817Z\t... Chris Savill\n",
+                                    result.output)
+
+    @responses.activate
+    def test_search_users_formats(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        fixture = json.loads(load_fixture('users/search.json'))
+        url = RequestHandler._build_end_point_uri('/users/search')
+        responses.add(responses.GET, url, status=200, body=json.dumps(fixture))
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            # machine formats keep the order the server sent
+            result = runner.invoke(cli, ['users', 'search', '', '--format', 'ndjson'])
+            nose.tools.assert_false(result.exception)
+            lines = result.output.splitlines()
+            nose.tools.assert_equal(fixture, [json.loads(line) for line in lines])
+
+            result = runner.invoke(cli, ['users', 'search', '', '--format', 'csv',
+                                         '--sort-by', 'id'])
+            nose.tools.assert_false(result.exception)
+            lines = result.output.splitlines()
+            nose.tools.assert_equal('id,firstname,surname,email,phone', lines[0])
+            nose.tools.assert_equal('1,Firstname00,Surname0,cwl0@aber.ac.uk,01970 622422',
+                                    lines[1])
+            nose.tools.assert_equal(len(fixture) + 1, len(lines))
+
+    ##########################################################################
+    # Sorting tests
+    ##########################################################################
+
+    def test_sort_json_mixed_types(self):
+        broadcasts = json.loads(load_fixture('broadcasts/search.json'))
+        broadcasts.append({'id': 2, 'user_id': 39})
+        nose.tools.assert_equal([2, '15', 17], [b['id'] for b in sort_json(broadcasts, 'id')])
+
+    def test_sort_json_non_ascii_digits(self):
+        entries = [{'content': u'a'}, {'content': unichr(0xb2)}, {'content': u'-12'}]
+        nose.tools.assert_equal([u'-12', u'a', unichr(0xb2)],
+                                [e['content'] for e in sort_json(entries, 'content')])
+
+    def test_sort_json_multiple_keys(self):
+        users = [{'id': 1, 'surname': 'Loftus'}, {'id': 2, 'surname': 'Jackson'},
+                 {'id': 3, 'surname': 'Loftus'}, {'id': 4}]
+        sort_keys = [('surname', False), ('id', True)]
+        nose.tools.assert_equal([4, 2, 3, 1], [u['id'] for u in sort_json(users, sort_keys)])
+        nose.tools.assert_equal([1, 3], [u['id'] for u in sort_json(users, [('surname', True)], 2)])
+
+    def test_sort_json_limit_streams(self):
+        users = ({'id': i % 7, 'n': i} for i in xrange(1000))
+        top = sort_json(users, [('id', True), ('n', False)], limit=3)
+        nose.tools.assert_equal([(6, 6), (6, 13), (6, 20)], [(u['id'], u['n']) for u in top])
+
+    def test_select_entries(self):
+        users = ({'id': i} for i in xrange(5, 0, -1))
+        nose.tools.assert_equal([5, 4], [u['id'] for u in select_entries(users, None, 2)])
+
+    @responses.activate
+    def test_search_broadcasts_sort_and_limit(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        fixture = load_fixture('broadcasts/search.json')
+        url = RequestHandler._build_end_point_uri('/broadcasts/search')
+        responses.add(responses.GET, url, status=200, body=fixture)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            result = runner.invoke(cli, ['broadcasts', 'search', '', '--sort-by',
+                                         'user_id,-id', '--limit', '1',
+                                         '--format', 'ndjson'])
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_equal([17], [json.loads(line)['id']
+                                           for line in result.output.splitlines()])
+
+            result = runner.invoke(cli, ['broadcasts', 'search', '', '--sort-by', 'email'])
+            nose.tools.assert_equal(2, result.exit_code)
+            nose.tools.assert_true('invalid sort key: email' in result.output)
+
+    @responses.activate
+    def test_shell(self):
+        runner = CliRunner()
+        mock_auth_response()
+        mock_show_user_response(41)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            responses.calls.reset()
+            lines = ['users show --user-id=41', '', '# a comment', 'bogus',
+                     'users show --user-id=41 --format ndjson', 'shell',
+                     'exit', 'users show --user-id=41']
+            result = runner.invoke(cli, ['shell'], input='\n'.join(lines))
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_equal(0, result.exit_code)
+            nose.tools.assert_true('No such command "bogus"' in result.output)
+            nose.tools.assert_true('shell cannot be run here.' in result.output)
+
+            url = RequestHandler._build_end_point_uri('/users/show/:id', {':id': '41'})
+            nose.tools.assert_equal([url, url], [call.request.url for call in responses.calls])
+
+    def test_shell_help_and_end_of_input(self):
+        runner = CliRunner()
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(cli, ['shell'], input='help\n"unclosed\n')
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_true('Commands:' in result.output)
+            nose.tools.assert_true('Error: No closing quotation' in result.output)
+            nose.tools.assert_false(os.path.isfile(constants.TOKEN_FILE))
+
+    @responses.activate
+    def test_batch(self):
+        runner = CliRunner()
+        mock_auth_response()
+        mock_show_user_response(41)
+
+        for broadcast_id in ('17', '18'):
+            url = RequestHandler._build_end_point_uri('/broadcasts/destroy/:id',
+                                                      {':id': broadcast_id})
+            responses.add(responses.DELETE, url, status=200)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            with open('script', 'w') as script:
+                script.write('# provisioning\n'
+                             'broadcasts destroy 17\n'
+                             '\n'
+                             'users show --user-id=41 --format ndjson\n'
+                             'bogus\n'
+                             'users create\n'
+                             'broadcasts destroy 18\n')
+
+            responses.calls.reset()
+            result = runner.invoke(cli, ['batch', 'script', '--workers', '3'])
+            nose.tools.assert_equal(1, result.exit_code)
+
+            lines = result.output.splitlines()
+            nose.tools.assert_equal('Broadcast destroyed.', lines[0])
+            nose.tools.assert_equal(41, json.loads(lines[1])['id'])
+            nose.tools.assert_true(lines[2].startswith('Line 5: Error: No such command'))
+            nose.tools.assert_equal('Enter firstname: ', lines[-4])
+            nose.tools.assert_equal('Line 6: Error: Aborted!', lines[-3])
+            nose.tools.assert_equal('Broadcast destroyed.', lines[-2])
+            nose.tools.assert_equal('Ran 5 commands, 2 failed.', lines[-1])
+
+            # every command shares one session, so no new tokens are requested
+            urls = [call.request.url for call in responses.calls]
+            nose.tools.assert_equal(3, len(urls))
+            nose.tools.assert_false(any('oauth' in url for url in urls))
+
+    @responses.activate
+    def test_batch_from_stdin(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        url = RequestHandler._build_end_point_uri('/users/destroy/:id', {':id': '41'})
+        responses.add(responses.DELETE, url, status=200)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            result = runner.invoke(cli, ['batch', '-'],
+                                   input='users destroy --user-id=41\n')
+            nose.tools.assert_false(result.exception)
+            nose.tools.assert_equal(['User destroyed.', 'Ran 1 commands, 0 failed.'],
+                                    result.output.splitlines())
+
+    @responses.activate
+    def test_batch_runs_lines_in_order(self):
+        runner = CliRunner()
+        mock_auth_response()
+
+        ids = range(10)
+        for broadcast_id in ids:
+            url = RequestHandler._build_end_point_uri('/broadcasts/destroy/:id',
+                                                      {':id': str(broadcast_id)})
+            responses.add(responses.DELETE, url, status=200)
+
+        with runner.isolated_filesystem():
+            result = runner.invoke(authorize, input='admin\ntaliesin\ntaliesin')
+            nose.tools.assert_equal(0, result.exit_code)
+
+            responses.calls.reset()
+            script = ''.join('broadcasts destroy %d\n' % i for i in ids)
+            result = runner.invoke(cli, ['batch', '-'],
+                                   input=script + 'authorize --username admin\n')
+            nose.tools.assert_equal(1, result.exit_code)
+            nose.tools.assert_true('Line 11: Error: authorize cannot be run here.'
+                                   in result.output)
+
+            urls = [call.request.url for call in responses.calls]
+            nose.tools.assert_equal([RequestHandler._build_end_point_uri(
+                                        '/broadcasts/destroy/:id', {':id': str(i)})
+                                     for i in ids], urls)
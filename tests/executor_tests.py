@@ -0,0 +1,61 @@
+import unittest
+import nose.tools
+import threading
+
+from csa_client.executor import WorkerPool, Future
+
+class WorkerPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool(4)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_submit(self):
+        future = self.pool.submit(lambda x, y: x + y, 1, y=2)
+        nose.tools.assert_equal(3, future.result(timeout=1))
+        nose.tools.assert_true(future.done())
+
+    @nose.tools.raises(KeyError)
+    def test_submit_raises(self):
+        future = self.pool.submit({}.__getitem__, 'missing')
+        future.result(timeout=1)
+
+    def test_exception(self):
+        future = self.pool.submit({}.__getitem__, 'missing')
+        nose.tools.assert_is_instance(future.exception(timeout=1), KeyError)
+
+    def test_map_keeps_order(self):
+        futures = self.pool.map(lambda x: x * 2, range(100))
+        nose.tools.assert_equal([x * 2 for x in range(100)],
+                                [f.result(timeout=1) for f in futures])
+
+    def test_runs_concurrently(self):
+        started = []
+        all_started = threading.Event()
+
+        def wait_for_others():
+            started.append(True)
+            if len(started) == 4:
+                all_started.set()
+            return all_started.wait(1)
+
+        futures = [self.pool.submit(wait_for_others) for _ in range(4)]
+        nose.tools.assert_true(all(f.result(timeout=2) for f in futures))
+
+    def test_done_callback(self):
+        called = []
+        future = self.pool.submit(lambda: 1)
+        future.result(timeout=1)
+        future.add_done_callback(lambda f: called.append(f.result()))
+        nose.tools.assert_equal([1], called)
+
+    @nose.tools.raises(RuntimeError)
+    def test_submit_after_shutdown(self):
+        self.pool.shutdown()
+        self.pool.submit(lambda: 1)
+
+    @nose.tools.raises(RuntimeError)
+    def test_result_timeout(self):
+        Future().result(timeout=0.01)
@@ -0,0 +1,143 @@
+import unittest
+import nose.tools
+import requests
+import json
+import os
+import shutil
+import tempfile
+
+from test_helpers import *
+from stub_server import StubServer
+from csa_client.http_cache import HTTPCache
+
+class HTTPCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = StubServer().start()
+        self.fixture = load_fixture('users/show/39.json')
+
+        def show_user(request):
+            if request.headers.get('if-none-match') == '"v1"':
+                return (304, {'ETag': '"v1"'}, '')
+            return (200, {'ETag': '"v1"', 'content-type': 'application/json'},
+                    self.fixture)
+
+        def search(request):
+            modified = 'Sat, 06 Dec 2014 10:00:00 GMT'
+            if request.headers.get('if-modified-since') == modified:
+                return (304, {}, '')
+            body = json.dumps([{'id': 1, 'q': request.json()['q']}])
+            return (200, {'Last-Modified': modified}, body)
+
+        self.server.add_callback('GET', '/users/show/:id', show_user, {':id': 39})
+        self.server.add_callback('GET', '/users/search', search)
+        self.server.add('GET', '/broadcasts/search', body='[]')
+        self.server.add('GET', '/broadcasts/show/:id', {':id': 1}, body='{"id": 1}',
+                        headers={'ETag': '"b1"', 'Cache-Control': 'private, max-age=60'})
+        self.server.add('GET', '/broadcasts/show/:id', {':id': 2}, body='{"id": 2}',
+                        headers={'ETag': '"b2"', 'Cache-Control': 'no-store'})
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def handler(self, cache=None):
+        return self.server.handler(http_cache=cache or HTTPCache(self.directory))
+
+    def test_etag_revalidated_across_handlers(self):
+        first = self.handler().make_request('/users/show/:id', {':id': 39})
+        nose.tools.assert_equal(200, first.status_code)
+        nose.tools.assert_false(getattr(first, 'from_cache', False))
+
+        # A new handler and cache object stand in for a later process
+        second = self.handler().make_request('/users/show/:id', {':id': 39})
+        nose.tools.assert_equal(200, second.status_code)
+        nose.tools.assert_true(second.from_cache)
+        nose.tools.assert_equal(json.loads(self.fixture), second.json())
+        nose.tools.assert_equal('"v1"', second.headers['etag'])
+
+        request_headers = self.server.calls[-1][2]
+        nose.tools.assert_equal('"v1"', request_headers.get('if-none-match'))
+
+    def test_last_modified_keyed_on_params(self):
+        handler = self.handler()
+        handler.make_request('/users/search', params={'q': 'a'})
+        handler.make_request('/users/search', params={'q': 'b'})
+        cached = handler.make_request('/users/search', params={'q': 'a'})
+
+        nose.tools.assert_true(cached.from_cache)
+        nose.tools.assert_equal([{'id': 1, 'q': 'a'}], cached.json())
+        nose.tools.assert_equal(None, self.server.calls[1][2].get('if-modified-since'))
+
+    def test_responses_without_validators_are_not_stored(self):
+        handler = self.handler()
+        handler.make_request('/broadcasts/search')
+        handler.make_request('/broadcasts/search')
+
+        nose.tools.assert_equal(0, handler.http_cache.size())
+        nose.tools.assert_equal(None, self.server.calls[1][2].get('if-none-match'))
+
+    def test_no_store_and_private_are_not_stored(self):
+        cache = HTTPCache(os.path.join(self.directory, 'cache'))
+        handler = self.handler(cache)
+        handler.make_request('/broadcasts/show/:id', {':id': 1})
+        handler.make_request('/broadcasts/show/:id', {':id': 2})
+
+        nose.tools.assert_equal(0, cache.size())
+        nose.tools.assert_false(os.path.exists(cache.directory))
+
+    def test_directory_made_on_first_store(self):
+        cache = HTTPCache(os.path.join(self.directory, 'cache'))
+        nose.tools.assert_false(os.path.exists(cache.directory))
+
+        self.handler(cache).make_request('/users/show/:id', {':id': 39})
+        nose.tools.assert_true(os.path.isdir(cache.directory))
+
+    def test_size_kept_between_processes(self):
+        cache = HTTPCache(self.directory)
+        self.handler(cache).make_request('/users/show/:id', {':id': 39})
+        size = cache.size()
+
+        # A file added behind the cache's back is not counted, showing the
+        # stored size is read instead of listing the directory
+        with open(os.path.join(self.directory, 'other'), 'w') as other:
+            other.write('x' * 100)
+        nose.tools.assert_equal(size, HTTPCache(self.directory).size())
+
+    def test_unusable_directory_does_not_fail_requests(self):
+        cache = HTTPCache(os.path.join(os.devnull, 'http'))
+        response = self.handler(cache).make_request('/users/show/:id', {':id': 39})
+
+        nose.tools.assert_equal(200, response.status_code)
+        nose.tools.assert_equal(json.loads(self.fixture), response.json())
+        nose.tools.assert_equal(0, cache.size())
+
+    def test_no_cache_without_http_cache(self):
+        handler = self.server.handler()
+        handler.make_request('/users/show/:id', {':id': 39})
+        response = handler.make_request('/users/show/:id', {':id': 39})
+
+        nose.tools.assert_false(getattr(response, 'from_cache', False))
+        nose.tools.assert_equal(None, self.server.calls[1][2].get('if-none-match'))
+
+    def test_size_capped_eviction(self):
+        cache = HTTPCache(self.directory, max_size=1000)
+        handler = self.handler(cache)
+        for query in 'abcdefghijklmnopqrstuvwxyz':
+            handler.make_request('/users/search', params={'q': query})
+
+        nose.tools.assert_true(cache.size() <= 1000)
+        nose.tools.assert_true(0 < len(os.listdir(self.directory)) < 26)
+
+        key = HTTPCache.key('GET', self.server.url + '/users/search.json', '{"q": "z"}')
+        nose.tools.assert_is_not_none(cache.get(key))
+        key = HTTPCache.key('GET', self.server.url + '/users/search.json', '{"q": "a"}')
+        nose.tools.assert_is_none(cache.get(key))
+
+    def test_clear(self):
+        cache = HTTPCache(self.directory)
+        self.handler(cache).make_request('/users/show/:id', {':id': 39})
+        cache.clear()
+        nose.tools.assert_equal([], os.listdir(self.directory))
+        nose.tools.assert_equal(0, cache.size())
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import unittest
+import nose.tools
+import json
+
+from test_helpers import *
+from csa_client.json_stream import iter_json_array
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class JsonStreamTests(unittest.TestCase):
+
+    def test_fixtures_in_any_chunk_size(self):
+        for fixture in ('users/search.json', 'broadcasts/search.json'):
+            data = load_fixture(fixture)
+            expected = json.loads(data)
+            for size in (1, 2, 7, 64, 4096, len(data)):
+                items = list(iter_json_array(chunked(data, size)))
+                nose.tools.assert_equal(expected, items)
+
+    def test_empty_array(self):
+        nose.tools.assert_equal([], list(iter_json_array([' [ ', ' ] '])))
+
+    def test_scalars_split_across_chunks(self):
+        data = '[12345, true, "abc", null, 1.5e3]'
+        for size in (1, 3):
+            nose.tools.assert_equal([12345, True, u'abc', None, 1500.0],
+                                    list(iter_json_array(chunked(data, size))))
+
+    def test_multibyte_characters_split_across_chunks(self):
+        data = json.dumps([{'content': u'caf\xe9 ☃'}], ensure_ascii=False).encode('utf-8')
+        nose.tools.assert_equal([{'content': u'caf\xe9 ☃'}],
+                                list(iter_json_array(chunked(data, 1))))
+
+    def test_is_lazy(self):
+        def chunks():
+            yield '[{"id": 1},'
+            raise AssertionError("Read past the first item")
+
+        items = iter_json_array(chunks())
+        nose.tools.assert_equal({'id': 1}, next(items))
+
+    @nose.tools.raises(ValueError)
+    def test_not_an_array(self):
+        list(iter_json_array(['{"id": 1}']))
+
+    @nose.tools.raises(ValueError)
+    def test_truncated_array(self):
+        list(iter_json_array(['[{"id": 1}, {"id"']))
+
+    @nose.tools.raises(ValueError)
+    def test_missing_separator(self):
+        list(iter_json_array(['[1 2]']))
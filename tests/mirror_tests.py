@@ -0,0 +1,121 @@
+import unittest
+import nose.tools
+import responses
+import tempfile
+import shutil
+import json
+import os
+
+from test_helpers import *
+from csa_client import constants
+from csa_client.api import CsaAPI
+from csa_client.mirror import Mirror
+
+class MirrorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'mirror.db')
+        self.users = json.loads(load_fixture('users/search.json'))
+        self.broadcasts = json.loads(load_fixture('broadcasts/search.json'))
+        self.requests = []
+
+    def tearDown(self):
+        responses.reset()
+        shutil.rmtree(self.directory)
+        if os.path.isfile(constants.TOKEN_FILE):
+            os.remove(constants.TOKEN_FILE)
+
+    def mock_search(self, end_point, records):
+        def search(request):
+            self.requests.append((end_point, json.loads(request.body)))
+            return (200, {}, json.dumps(records))
+
+        responses.add_callback(responses.GET,
+                               RequestHandler._build_end_point_uri(end_point),
+                               callback=search,
+                               content_type='application/json')
+
+    def sync(self, users, broadcasts, mirror=None, **kwargs):
+        responses.reset()
+        mock_auth_response()
+        self.mock_search('/users/search', users)
+        self.mock_search('/broadcasts/search', broadcasts)
+        if mirror is None:
+            mirror = Mirror(CsaAPI("admin", 'taliesin'), self.path)
+        return mirror, mirror.sync(**kwargs)
+
+    @responses.activate
+    def test_full_pull(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+        nose.tools.assert_equal({'users': len(self.users), 'broadcasts': 2}, counts)
+        nose.tools.assert_true('updated_since' not in self.requests[0][1])
+
+        nose.tools.assert_equal(self.users[0], mirror.get_user(42))
+        nose.tools.assert_equal(self.broadcasts[0], mirror.get_broadcast(15))
+        nose.tools.assert_equal('2014-11-25T14:15:30.777Z', mirror.high_water('users'))
+        nose.tools.assert_equal('2014-12-05T14:22:07.817Z', mirror.high_water('broadcasts'))
+
+    @responses.activate
+    def test_incremental_sync(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+
+        changed = dict(self.users[1], surname='Changed',
+                       updated_at='2015-01-01T00:00:00.000Z')
+        #the server may ignore updated_since, so send everything
+        mirror, counts = self.sync([changed] + self.users[2:], self.broadcasts,
+                                   mirror)
+        nose.tools.assert_equal('2014-11-25T14:15:30.777Z',
+                                self.requests[2][1]['updated_since'])
+        nose.tools.assert_equal({'users': 1, 'broadcasts': 1}, counts)
+        nose.tools.assert_equal('Changed', mirror.get_user(41)['surname'])
+        nose.tools.assert_equal('2015-01-01T00:00:00.000Z', mirror.high_water('users'))
+
+        #an incremental sync keeps users missing from the response
+        nose.tools.assert_equal(self.users[0], mirror.get_user(42))
+
+    @responses.activate
+    def test_incremental_sync_without_updated_at(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+
+        unstamped = {'id': 1007, 'surname': 'Unstamped'}
+        created = {'id': 1008, 'surname': 'Created',
+                   'created_at': '2015-01-01T00:00:00.000Z'}
+        old = {'id': 1009, 'surname': 'Old', 'created_at': '2013-01-01T00:00:00.000Z'}
+        mirror, counts = self.sync([unstamped, created, old], [], mirror)
+
+        nose.tools.assert_equal(2, counts['users'])
+        nose.tools.assert_equal(unstamped, mirror.get_user(1007))
+        nose.tools.assert_equal(created, mirror.get_user(1008))
+        nose.tools.assert_raises(KeyError, mirror.get_user, 1009)
+
+    @responses.activate
+    def test_full_sync_removes_deleted(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+        mirror, counts = self.sync(self.users[1:], self.broadcasts, mirror, full=True)
+        nose.tools.assert_raises(KeyError, mirror.get_user, 42)
+        nose.tools.assert_equal(self.users[1], mirror.get_user(41))
+
+    @responses.activate
+    def test_reads_are_local(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+        responses.reset()
+
+        nose.tools.assert_equal([42], [u['id'] for u in mirror.users_search('Jackson')])
+        nose.tools.assert_equal([41], [u['id'] for u in mirror.users_search('cwl@')])
+        nose.tools.assert_equal(len(self.users), len(mirror.users_search()))
+        nose.tools.assert_equal(len(self.users), len(mirror.users_by_grad_year(1985)))
+        nose.tools.assert_equal([], mirror.users_search('100%'))
+
+        nose.tools.assert_equal(self.broadcasts[1:], mirror.broadcasts_search('Savill'))
+        nose.tools.assert_equal(self.broadcasts, mirror.broadcasts_by_user(41))
+        nose.tools.assert_equal([], mirror.broadcasts_by_user(42))
+
+    @responses.activate
+    def test_mirror_persists(self):
+        mirror, counts = self.sync(self.users, self.broadcasts)
+        mirror.close()
+
+        mirror = Mirror(None, self.path)
+        nose.tools.assert_equal(self.users[1], mirror.get_user('41'))
+        nose.tools.assert_equal('2014-11-25T14:15:30.777Z', mirror.high_water('users'))
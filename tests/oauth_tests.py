@@ -3,9 +3,11 @@ import nose.tools
 import requests
 import responses
 import json
+import time
 
 from requests.exceptions import HTTPError
 from test_helpers import *
+from stub_server import StubServer
 from csa_client import constants
 from csa_client.oauth import OAuth2ResourceOwner, OAuth2Tokens
 
@@ -81,3 +83,289 @@ class OAuth2TokensTest(unittest.TestCase):
         r = request(json.dumps({'some': 'data'}))
         response = self.oauth_tokens(r)
         nose.tools.assert_equal('{"access_token": "abcd", "some": "data"}', response.body)
+
+    def test_oauth_appends_token_to_empty_body(self):
+        class request:
+            def __init__(self, d):
+                self.body = d
+
+        for body in ('{}', '', None):
+            response = self.oauth_tokens(request(body))
+            nose.tools.assert_equal({'access_token': 'abcd'}, json.loads(response.body))
+
+    def test_oauth_appends_token_to_nested_body(self):
+        class request:
+            def __init__(self, d):
+                self.body = d
+
+        data = {'user': {'id': 1, 'firstname': 'Sam'}, 'q': '{}'}
+        response = self.oauth_tokens(request(json.dumps(data)))
+        data['access_token'] = 'abcd'
+        nose.tools.assert_equal(data, json.loads(response.body))
+
+    def test_oauth_replaces_existing_token(self):
+        class request:
+            def __init__(self, d):
+                self.body = d
+
+        response = self.oauth_tokens(request('{"access_token": "old"}'))
+        nose.tools.assert_equal({'access_token': 'abcd'}, json.loads(response.body))
+
+    def test_oauth_header_mode(self):
+        class request:
+            def __init__(self, d):
+                self.body = d
+                self.headers = {}
+
+        oauth_tokens = OAuth2Tokens('abcd', mode='header')
+        response = oauth_tokens(request('{"some": "data"}'))
+        nose.tools.assert_equal('Bearer abcd', response.headers['Authorization'])
+        nose.tools.assert_equal('{"some": "data"}', response.body)
+
+    @nose.tools.raises(ValueError)
+    def test_oauth_invalid_mode(self):
+        OAuth2Tokens('abcd', mode='query')
+
+    @responses.activate
+    def test_resource_owner_header_mode(self):
+        def check_header(request):
+            nose.tools.assert_equal('Bearer abcd', request.headers['Authorization'])
+            nose.tools.assert_equal({}, json.loads(request.body))
+            return (200, {}, '[]')
+
+        responses.add_callback(responses.GET,
+                               RequestHandler._build_end_point_uri('/users/search'),
+                               callback=check_header)
+
+        oauth_handler = OAuth2ResourceOwner('/oauth/token', auth_mode='header')
+        oauth_handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd'})
+        oauth_handler.make_request('/users/search')
+
+class OAuth2ResourceOwnerBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.oauth_handler = OAuth2ResourceOwner('/oauth/token')
+        self.oauth_handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd'})
+
+    @responses.activate
+    def test_make_requests_in_order(self):
+        user_ids = [39, 41] * 20
+        fixtures = dict((user_id, mock_show_user_response(user_id))
+                        for user_id in set(user_ids))
+
+        batch = [('/users/show/:id', {':id': user_id}) for user_id in user_ids]
+        results = self.oauth_handler.make_requests(batch, workers=4)
+
+        nose.tools.assert_equal(len(batch), len(results))
+        for user_id, (response, error) in zip(user_ids, results):
+            nose.tools.assert_is_none(error)
+            nose.tools.assert_dict_equal(fixtures[user_id], response.json())
+
+    @responses.activate
+    def test_make_requests_with_errors(self):
+        mock_show_user_response(39)
+        mock_show_user_response(41, status=403)
+
+        batch = [('/users/show/:id', {':id': 39}, {}),
+                 ('/users/show/:id', {':id': 41}, {}),
+                 ('/home/index',)]
+        results = self.oauth_handler.make_requests(batch, workers=2)
+
+        nose.tools.assert_equal(200, results[0][0].status_code)
+        nose.tools.assert_is_none(results[0][1])
+        nose.tools.assert_is_none(results[1][0])
+        nose.tools.assert_is_instance(results[1][1], HTTPError)
+        nose.tools.assert_is_none(results[2][0])
+        nose.tools.assert_is_instance(results[2][1], KeyError)
+
+    def test_make_requests_grows_pool(self):
+        self.oauth_handler.make_requests([], workers=16)
+        nose.tools.assert_equal(16, self.oauth_handler.transport.pool_maxsize)
+
+class OAuth2ResourceOwnerExpiryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.oauth_handler = OAuth2ResourceOwner('/oauth/token', refresh_skew=30)
+
+    def test_records_expiry(self):
+        now = time.time()
+        self.oauth_handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd',
+                                       'expires_in': 7200})
+
+        tokens = self.oauth_handler.get_tokens()
+        nose.tools.assert_equal(7200, tokens['expires_in'])
+        nose.tools.assert_true(tokens['issued_at'] >= now)
+        nose.tools.assert_false(self.oauth_handler.token_expiring())
+
+    def test_auth_replaced_before_access_token(self):
+        oauth_handler = self.oauth_handler
+        oauth_handler.set_tokens({'access_token': 'old', 'refresh_token': 'abcd'})
+        seen = []
+
+        class Session(object):
+            def __setattr__(self, name, value):
+                if name == 'auth':
+                    seen.append(oauth_handler.access_token)
+                object.__setattr__(self, name, value)
+
+        oauth_handler.session = Session()
+        oauth_handler.set_tokens({'access_token': 'new', 'refresh_token': 'abcd'})
+        nose.tools.assert_equal(['old'], seen)
+        nose.tools.assert_equal('new', oauth_handler.session.auth.token)
+        nose.tools.assert_equal('new', oauth_handler.access_token)
+
+    def test_no_expiry(self):
+        self.oauth_handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd'})
+        nose.tools.assert_false(self.oauth_handler.token_expiring())
+        nose.tools.assert_not_in('expires_in', self.oauth_handler.get_tokens())
+
+    @responses.activate
+    def test_refreshes_before_expiry(self):
+        mock_auth_response(body=json.dumps({'access_token': 'new', 'refresh_token': 'new',
+                                            'expires_in': 7200}))
+        mock_show_user_response(39)
+
+        self.oauth_handler.set_tokens({'access_token': 'old', 'refresh_token': 'old',
+                                       'expires_in': 60,
+                                       'issued_at': time.time() - 40})
+        nose.tools.assert_true(self.oauth_handler.token_expiring())
+
+        self.oauth_handler.make_request('/users/show/:id', {':id': 39})
+
+        urls = [call.request.url for call in responses.calls]
+        nose.tools.assert_equal([RequestHandler._build_end_point_uri('/oauth/token'),
+                                 RequestHandler._build_end_point_uri('/users/show/:id', {':id': 39})],
+                                urls)
+        nose.tools.assert_equal('new', json.loads(responses.calls[1].request.body)['access_token'])
+        nose.tools.assert_false(self.oauth_handler.token_expiring())
+
+    @responses.activate
+    def test_does_not_refresh_fresh_token(self):
+        mock_show_user_response(39)
+
+        self.oauth_handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd',
+                                       'expires_in': 60,
+                                       'issued_at': time.time() - 10})
+        self.oauth_handler.make_request('/users/show/:id', {':id': 39})
+
+        nose.tools.assert_equal(1, len(responses.calls))
+
+class OAuth2ResourceOwnerConcurrencyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.valid_tokens = ['fresh']
+
+        def issue_token(request):
+            time.sleep(0.05)
+            token = 'token-%d' % self.server.count('/oauth/token.json')
+            self.valid_tokens[:] = [token]
+            return (200, {}, {'access_token': token, 'refresh_token': token})
+
+        def show_user(request):
+            if request.json().get('access_token') not in self.valid_tokens:
+                return (401, {}, '')
+            return (200, {}, load_fixture('users/show/39.json'))
+
+        self.server.add_callback('POST', '/oauth/token', issue_token)
+        self.server.add_callback('GET', '/users/show/:id', show_user, {':id': 39})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_single_refresh_under_concurrency(self):
+        handler = self.server.handler(OAuth2ResourceOwner, '/oauth/token',
+                                      coalesce=False)
+        handler.set_tokens({'access_token': 'expired', 'refresh_token': 'abcd'})
+
+        batch = [('/users/show/:id', {':id': 39})] * 256
+        results = handler.make_requests(batch, workers=64)
+
+        errors = [error for response, error in results if error is not None]
+        nose.tools.assert_equal([], errors)
+        nose.tools.assert_equal(1, self.server.count('/oauth/token.json'))
+        nose.tools.assert_equal('token-1', handler.get_tokens()['access_token'])
+
+    def test_single_proactive_refresh_under_concurrency(self):
+        handler = self.server.handler(OAuth2ResourceOwner, '/oauth/token',
+                                      coalesce=False)
+        handler.set_tokens({'access_token': 'fresh', 'refresh_token': 'abcd',
+                            'expires_in': 60, 'issued_at': time.time() - 59})
+
+        batch = [('/users/show/:id', {':id': 39})] * 256
+        results = handler.make_requests(batch, workers=64)
+
+        errors = [error for response, error in results if error is not None]
+        nose.tools.assert_equal([], errors)
+        nose.tools.assert_equal(1, self.server.count('/oauth/token.json'))
+
+
+class OAuth2ResourceOwnerCoalescingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+
+        def slow_user(request):
+            time.sleep(0.1)
+            return (200, {}, load_fixture('users/show/39.json'))
+
+        def slow_search(request):
+            time.sleep(0.1)
+            return (200, {}, json.dumps([request.json()['q']]))
+
+        def slow_update(request):
+            time.sleep(0.1)
+            return (200, {}, '')
+
+        def slow_forbidden(request):
+            time.sleep(0.1)
+            return (403, {}, '')
+
+        self.server.add_callback('GET', '/users/show/:id', slow_user, {':id': 39})
+        self.server.add_callback('GET', '/users/show/:id', slow_forbidden, {':id': 41})
+        self.server.add_callback('GET', '/users/search', slow_search)
+        self.server.add_callback('PUT', '/users/update/:id', slow_update, {':id': 39})
+
+        self.handler = self.server.handler(OAuth2ResourceOwner, '/oauth/token')
+        self.handler.set_tokens({'access_token': 'abcd', 'refresh_token': 'abcd'})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_identical_gets_share_one_request(self):
+        batch = [('/users/show/:id', {':id': 39})] * 16
+        results = self.handler.make_requests(batch, workers=16)
+
+        nose.tools.assert_equal(1, self.server.count('/users/show/39.json'))
+        responses = set(id(response) for response, error in results)
+        nose.tools.assert_equal(1, len(responses))
+        nose.tools.assert_equal(39, results[0][0].json()['id'])
+
+    def test_different_params_are_not_coalesced(self):
+        batch = [('/users/search', {}, {'q': str(i % 4)}) for i in range(16)]
+        results = self.handler.make_requests(batch, workers=16)
+
+        nose.tools.assert_equal(4, self.server.count('/users/search.json'))
+        nose.tools.assert_equal([[str(i % 4)] for i in range(16)],
+                                [response.json() for response, error in results])
+
+    def test_writes_are_not_coalesced(self):
+        batch = [('/users/update/:id', {':id': 39}, {'grad_year': 1986})] * 4
+        self.handler.make_requests(batch, workers=4)
+
+        nose.tools.assert_equal(4, self.server.count('/users/update/39.json'))
+
+    def test_errors_are_shared(self):
+        batch = [('/users/show/:id', {':id': 41})] * 8
+        results = self.handler.make_requests(batch, workers=8)
+
+        nose.tools.assert_equal(1, self.server.count('/users/show/41.json'))
+        for response, error in results:
+            nose.tools.assert_is_instance(error, HTTPError)
+
+    def test_coalescing_disabled(self):
+        self.handler.coalesce = False
+        batch = [('/users/show/:id', {':id': 39})] * 4
+        self.handler.make_requests(batch, workers=4)
+
+        nose.tools.assert_equal(4, self.server.count('/users/show/39.json'))
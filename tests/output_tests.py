@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import unittest
+import nose.tools
+import json
+import StringIO
+import threading
+
+from tabulate import tabulate
+from csa_client.output import ThreadLocalOutput, write_entries, write_table
+from csa_client.records import User
+
+USERS = [
+    {'id': 42, 'firstname': u'Sam', 'email': u'sam@jackson.me'},
+    {'id': 1, 'firstname': u'Zo\xeb', 'email': None},
+    {'id': 3, 'firstname': u'Christopher, "CJ"', 'email': u'cwl@aber.ac.uk'},
+]
+
+class OutputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+
+    def echo(self, line, nl=True):
+        self.lines.append(line + ('\n' if nl else ''))
+
+    def output(self):
+        return ''.join(self.lines)
+
+    def write(self, entries, output_format, keys=('id', 'firstname', 'email')):
+        write_entries(entries, list(keys), output_format, echo=self.echo)
+        return self.output()
+
+    def test_small_table_uses_tabulate(self):
+        expected = tabulate([[u[k] for k in ('id', 'firstname', 'email')] for u in USERS],
+                            headers=['id', 'firstname', 'email'], tablefmt='rst')
+        nose.tools.assert_equal(expected + '\n', self.write(USERS, 'table'))
+
+    def test_empty_table(self):
+        nose.tools.assert_equal("No entries to show.\n", self.write([], 'table'))
+
+    def test_long_table_is_streamed(self):
+        write_table(iter(USERS), ['id', 'firstname'], self.echo, sample_size=1)
+        nose.tools.assert_equal(["====  ===========\n",
+                                 "  id  firstname\n",
+                                 "====  ===========\n",
+                                 "  42  Sam\n",
+                                 "   1  Zo\xeb\n".decode('latin-1'),
+                                 "   3  Christop...\n",
+                                 "====  ===========\n"], self.lines)
+
+    def test_ndjson(self):
+        users = [User.from_dict(USERS[0])] + USERS[1:]
+        lines = self.write(users, 'ndjson').splitlines()
+        nose.tools.assert_equal(USERS, [json.loads(line) for line in lines])
+
+    def test_csv(self):
+        nose.tools.assert_equal('id,firstname,email\n'
+                                '42,Sam,sam@jackson.me\n'
+                                '1,Zo\xc3\xab,\n'
+                                '3,"Christopher, ""CJ""",cwl@aber.ac.uk\n',
+                                self.write(USERS, 'csv'))
+
+    def test_tsv(self):
+        nose.tools.assert_equal('id\tfirstname\n42\tSam\n',
+                                self.write(USERS[:1], 'tsv', ('id', 'firstname')))
+
+    def test_rows_are_written_as_they_arrive(self):
+        def users():
+            for user in USERS:
+                yield user
+                # the row is written before the next one is read
+                nose.tools.assert_true(str(user['id']) in self.lines[-1])
+
+        self.write(users(), 'ndjson')
+        self.write(users(), 'csv')
+        write_table(users(), ['id'], self.echo, sample_size=0)
+
+    @nose.tools.raises(ValueError)
+    def test_unknown_format(self):
+        self.write(USERS, 'xml')
+
+    def test_thread_local_output(self):
+        stream = StringIO.StringIO()
+        output = ThreadLocalOutput(stream)
+        captured = {}
+
+        def run(name):
+            with output.capture() as buffer:
+                output.write(u'%s \xe9\n' % name)
+            captured[name] = buffer.getvalue()
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in 'abc']
+        for thread in threads:
+            thread.start()
+        output.write('main\n')
+        for thread in threads:
+            thread.join()
+
+        nose.tools.assert_equal('main\n', stream.getvalue())
+        nose.tools.assert_equal('b \xc3\xa9\n', captured['b'])
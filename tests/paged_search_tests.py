@@ -0,0 +1,91 @@
+import unittest
+import nose.tools
+import json
+import time
+
+from test_helpers import *
+from stub_server import StubServer
+
+class PagedSearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.users = json.loads(load_fixture('users/search.json'))
+        self.broadcasts = [{'id': i, 'content': 'broadcast %d' % i}
+                           for i in range(25)]
+
+        self.server = StubServer().start()
+        self.server.add_paged('GET', '/users/search', self.users)
+        self.server.add_paged('GET', '/broadcasts/search', self.broadcasts)
+        self.api = self.server.api()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_search_page(self):
+        page = self.api.users_search_page('', page=2, per_page=10)
+        nose.tools.assert_equal(self.users[10:20], page)
+
+        params = json.loads(self.server.calls[-1][3])
+        nose.tools.assert_equal({'access_token': 'abcd', 'q': '', 'page': 2, 'per_page': 10},
+                                params)
+
+    def test_iter_users_search_paged(self):
+        users = list(self.api.iter_users_search_paged(per_page=10))
+
+        nose.tools.assert_equal(self.users, users)
+        # 41 users are 5 pages, the last one short, then an empty page
+        nose.tools.assert_equal(6, self.server.count('/users/search.json'))
+
+    def test_short_page_with_page_size(self):
+        self.server.add_paged('GET', '/users/search', self.users,
+                              send_page_size=True)
+        users = list(self.api.iter_users_search_paged(per_page=10))
+
+        nose.tools.assert_equal(self.users, users)
+        # the server confirms the fifth page is the last
+        nose.tools.assert_equal(5, self.server.count('/users/search.json'))
+
+    def test_server_caps_page_size(self):
+        self.server.add_paged('GET', '/users/search', self.users, max_per_page=4)
+        users = list(self.api.iter_users_search_paged(per_page=10))
+
+        nose.tools.assert_equal(self.users, users)
+        nose.tools.assert_equal(12, self.server.count('/users/search.json'))
+
+    def test_iter_exact_pages(self):
+        broadcasts = list(self.api.iter_broadcasts_search_paged(per_page=5))
+
+        nose.tools.assert_equal(self.broadcasts, broadcasts)
+        # The empty sixth page marks the end
+        nose.tools.assert_equal(6, self.server.count('/broadcasts/search.json'))
+
+    def test_start_page(self):
+        broadcasts = list(self.api.iter_broadcasts_search_paged(per_page=10, page=3))
+        nose.tools.assert_equal(self.broadcasts[20:], broadcasts)
+
+    def test_next_page_is_prefetched(self):
+        broadcasts = self.api.iter_broadcasts_search_paged(per_page=10)
+        nose.tools.assert_equal(self.broadcasts[0], next(broadcasts))
+
+        for _ in range(100):
+            if self.server.count('/broadcasts/search.json') == 2:
+                break
+            time.sleep(0.01)
+        nose.tools.assert_equal(2, self.server.count('/broadcasts/search.json'))
+        broadcasts.close()
+
+    def test_server_without_paging(self):
+        self.server.add('GET', '/broadcasts/search', body=json.dumps(self.broadcasts))
+        broadcasts = list(self.api.iter_broadcasts_search_paged(per_page=10))
+
+        nose.tools.assert_equal(self.broadcasts, broadcasts)
+        # more than a page of results means they were all sent at once
+        nose.tools.assert_equal(1, self.server.count('/broadcasts/search.json'))
+
+    def test_server_ignoring_page(self):
+        self.server.add('GET', '/broadcasts/search', body=json.dumps(self.broadcasts))
+        broadcasts = list(self.api.iter_broadcasts_search_paged(per_page=25))
+
+        nose.tools.assert_equal(self.broadcasts, broadcasts)
+        # the first repeated page ends the search
+        nose.tools.assert_equal(2, self.server.count('/broadcasts/search.json'))
@@ -0,0 +1,76 @@
+import unittest
+import nose.tools
+import datetime
+import pickle
+import json
+
+from test_helpers import load_fixture
+from csa_client import constants, records
+from csa_client.records import User, Broadcast, intern_string
+
+class RecordsTests(unittest.TestCase):
+
+    def test_user_round_trip(self):
+        fixture = json.loads(load_fixture('users/show/39.json'))
+        user = User.from_dict(fixture)
+        nose.tools.assert_equal(fixture, user.to_dict())
+        nose.tools.assert_equal(39, user.id)
+        nose.tools.assert_equal('Firstname39', user['firstname'])
+
+    def test_broadcasts_round_trip(self):
+        fixture = json.loads(load_fixture('broadcasts/search.json'))
+        broadcasts = list(Broadcast.from_dicts(fixture))
+        nose.tools.assert_equal(fixture, [b.to_dict() for b in broadcasts])
+
+    def test_unknown_keys_are_kept(self):
+        user = User.from_dict({'id': 1, 'nickname': 'sam'})
+        nose.tools.assert_equal('sam', user['nickname'])
+        nose.tools.assert_equal({'id': 1, 'nickname': 'sam'}, user.to_dict())
+
+    def test_missing_fields_are_unset(self):
+        user = User.from_dict({'id': 1})
+        nose.tools.assert_equal({'id': 1}, user.to_dict())
+        nose.tools.assert_is_none(user.get('email'))
+        nose.tools.assert_false('email' in user)
+        nose.tools.assert_raises(KeyError, lambda: user['email'])
+
+    def test_set_item(self):
+        user = User.from_dict({'id': 1})
+        user['grad_year'] = 1986
+        user['nickname'] = 'sam'
+        nose.tools.assert_equal({'id': 1, 'grad_year': 1986, 'nickname': 'sam'},
+                                user.to_dict())
+
+    def test_no_instance_dict(self):
+        user = User.from_dict({'id': 1})
+        nose.tools.assert_false(hasattr(user, '__dict__'))
+
+    def test_repeated_strings_are_interned(self):
+        name = 'Samuel'
+        first = User.from_dict({'firstname': ''.join(name)})
+        second = User.from_dict({'firstname': ''.join(list(name))})
+        nose.tools.assert_is(first.firstname, second.firstname)
+        nose.tools.assert_is(first.firstname, intern_string(name))
+
+    def test_timestamps_are_not_interned(self):
+        stamp = '2014-11-25T14:15:30.777Z'
+        first = User.from_dict({'created_at': ''.join(stamp)})
+        second = User.from_dict({'created_at': ''.join(list(stamp))})
+        nose.tools.assert_is_not(first.created_at, second.created_at)
+
+    def test_intern_table_is_bounded(self):
+        for i in xrange(constants.INTERN_TABLE_SIZE + 10):
+            intern_string('value%d' % i)
+        nose.tools.assert_true(len(records._interned) <= constants.INTERN_TABLE_SIZE)
+
+    def test_timestamps_are_parsed_lazily(self):
+        broadcast = Broadcast.from_dict({'created_at': '2014-11-30T20:00:45.237Z'})
+        nose.tools.assert_equal(datetime.datetime(2014, 11, 30, 20, 0, 45, 237000),
+                                broadcast.created)
+        nose.tools.assert_is_none(broadcast.updated)
+
+    def test_equality_and_pickle(self):
+        user = User.from_dict({'id': 1, 'nickname': 'sam'})
+        nose.tools.assert_equal(User.from_dict({'id': 1, 'nickname': 'sam'}), user)
+        nose.tools.assert_not_equal(Broadcast.from_dict({'id': 1}), User.from_dict({'id': 1}))
+        nose.tools.assert_equal(user, pickle.loads(pickle.dumps(user, 2)))
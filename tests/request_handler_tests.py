@@ -7,7 +7,7 @@ import json
 from requests.exceptions import HTTPError
 from test_helpers import *
 from csa_client import constants
-from csa_client.request_handler import RequestHandler
+from csa_client.request_handler import RequestHandler, Route, compile_routes
 
 class RequestHandlerTests(unittest.TestCase):
 
@@ -102,3 +102,26 @@ class RequestHandlerTests(unittest.TestCase):
 
         uri = self.request_handler._build_domain_address()
         nose.tools.assert_equal('https://localhost:3001', uri)
+
+class RouteTests(unittest.TestCase):
+
+    def test_route_without_vars(self):
+        route = Route('/users/search', 'GET')
+        nose.tools.assert_equal('GET', route.method)
+        nose.tools.assert_equal((), route.variables)
+        nose.tools.assert_equal('/users/search.json', route.build_path())
+
+    def test_route_with_vars(self):
+        route = Route('/users/show/:id', 'GET')
+        nose.tools.assert_equal((':id',), route.variables)
+        nose.tools.assert_equal('/users/show/42.json', route.build_path({':id': 42}))
+
+    @nose.tools.raises(ValueError)
+    def test_route_with_missing_vars(self):
+        route = Route('/users/show/:id', 'GET')
+        route.build_path({':user': 42})
+
+    def test_compile_routes(self):
+        routes = compile_routes(constants.END_POINTS)
+        nose.tools.assert_equal(set(constants.END_POINTS), set(routes))
+        nose.tools.assert_equal('PUT', routes['/users/update/:id'].method)
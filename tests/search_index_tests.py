@@ -0,0 +1,102 @@
+import unittest
+import nose.tools
+import tempfile
+import shutil
+import json
+import os
+
+from test_helpers import load_fixture
+from csa_client.search_index import SearchIndex, parse_query, tokenize
+
+class SearchIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.broadcasts = json.loads(load_fixture('broadcasts/search.json'))
+        self.index = SearchIndex()
+        self.index.update(self.broadcasts)
+
+    def test_tokenize(self):
+        terms, mentions = tokenize(u"@craighepy @ChrisBAshton l4d2? #LAN")
+        nose.tools.assert_equal([u'craighepy', u'chrisbashton', u'l4d2', u'lan'], terms)
+        nose.tools.assert_equal([u'craighepy', u'chrisbashton'], mentions)
+        nose.tools.assert_equal(([u'chris'], []), tokenize(u"chris*"))
+        nose.tools.assert_equal(([u'chris*'], []), tokenize(u"chris*", wildcards=True))
+
+    def test_search_terms(self):
+        nose.tools.assert_equal([self.broadcasts[1]], self.index.search('savill'))
+        nose.tools.assert_equal([self.broadcasts[0]], self.index.search('L4D2'))
+        nose.tools.assert_equal([], self.index.search('missing'))
+        nose.tools.assert_equal(self.broadcasts, self.index.search(''))
+
+    def test_search_prefix(self):
+        nose.tools.assert_equal([self.broadcasts[0], self.broadcasts[1]],
+                                self.index.search('chris*'))
+
+    def test_search_mentions(self):
+        nose.tools.assert_equal([self.broadcasts[0]], self.index.search('@ChrisBAshton'))
+        nose.tools.assert_equal([], self.index.search('@ChrisBAshton savill'))
+        nose.tools.assert_equal([self.broadcasts[0]], self.index.mentioning('@craighepy'))
+        nose.tools.assert_equal([], self.index.mentioning('chris'))
+
+    def test_search_word_matching_a_mention(self):
+        self.index.add({'id': 30, 'content': u'@zed hello'})
+        self.index.add({'id': 31, 'content': u'@zed zed zed'})
+        #zed as a word still ranks the broadcasts mentioning @zed
+        nose.tools.assert_equal([31, 30], [b['id'] for b in self.index.search('@zed zed')])
+        nose.tools.assert_equal([30, 31], [b['id'] for b in self.index.search('@zed')])
+        nose.tools.assert_equal(([u'craighepy', u'lan'], [u'craighepy']),
+                                parse_query(u'@craighepy craighepy #LAN'))
+
+    def test_ranking(self):
+        self.index.add({'id': 20, 'content': u'lan lan lan party'})
+        self.index.add({'id': 21, 'content': u'lan tonight'})
+        results = self.index.search('lan')
+        nose.tools.assert_equal([20, 21], [b['id'] for b in results])
+        nose.tools.assert_equal([20], [b['id'] for b in self.index.search('lan', limit=1)])
+
+        #a rare term outweighs a common one
+        results = self.index.search('lan tonight')
+        nose.tools.assert_equal(21, results[0]['id'])
+
+    def test_incremental_updates(self):
+        self.index.add({'id': 17, 'content': u'replaced', 'updated_at': u'2015-01-01'})
+        nose.tools.assert_equal([], self.index.search('savill'))
+        nose.tools.assert_equal([17], [b['id'] for b in self.index.search('replaced')])
+        nose.tools.assert_equal(u'2015-01-01', self.index.high_water)
+
+        self.index.remove('15')
+        nose.tools.assert_false(15 in self.index)
+        nose.tools.assert_equal([], self.index.search('@craighepy'))
+        nose.tools.assert_equal([], self.index.search('l4d*'))
+        nose.tools.assert_equal(1, len(self.index))
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'index.db')
+            self.index.save(path)
+            index = SearchIndex.load(path)
+            nose.tools.assert_equal(self.index.search('chris*'), index.search('chris*'))
+            nose.tools.assert_equal(self.index.mentioning('craighepy'),
+                                    index.mentioning('craighepy'))
+            nose.tools.assert_equal(u'2014-12-05T14:22:07.817Z', index.high_water)
+
+            #removals are only written by save
+            index.remove(15)
+            nose.tools.assert_equal([], index.search('l4d2'))
+            index.close()
+            nose.tools.assert_equal(2, len(SearchIndex.load(path)))
+
+            index = SearchIndex.load(path)
+            index.remove(15)
+            index.save()
+            index.close()
+            nose.tools.assert_false(15 in SearchIndex.load(path))
+
+            with open(path, 'w') as file_handle:
+                file_handle.write('[]')
+            nose.tools.assert_raises(ValueError, SearchIndex.load, path)
+            nose.tools.assert_raises(ValueError, SearchIndex.load,
+                                     os.path.join(directory, 'missing.json'))
+        finally:
+            shutil.rmtree(directory)
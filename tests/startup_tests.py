@@ -0,0 +1,68 @@
+import unittest
+import nose.tools
+import subprocess
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Runs the CLI and prints which slow modules it imported
+RUN_CLI = """
+import sys, json
+from csa_client.command import cli
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps([name for name in sys.argv[-1].split(',')
+                             if name in sys.modules]))
+"""
+
+SLOW_MODULES = 'requests,urllib3,tabulate,sqlite3,csa_client.api,csa_client.token_cache'
+
+class StartupTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.env = dict(os.environ, PYTHONPATH=ROOT)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *args):
+        process = subprocess.Popen([sys.executable, '-c', RUN_CLI] + list(args) +
+                                   [SLOW_MODULES], cwd=self.directory, env=self.env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, modules = process.communicate()
+        return output, json.loads(modules.splitlines()[-1])
+
+    def best_time(self, args, runs=5):
+        times = []
+        for _ in range(runs):
+            start = time.time()
+            subprocess.check_call([sys.executable] + args, cwd=self.directory,
+                                  env=self.env, stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE)
+            times.append(time.time() - start)
+        return min(times)
+
+    def test_help_does_not_import_slow_modules(self):
+        output, modules = self.run_cli('--help')
+        nose.tools.assert_true('Usage' in output)
+        nose.tools.assert_equal([], modules)
+
+    def test_subcommand_help_does_no_token_io(self):
+        output, modules = self.run_cli('users', 'search', '--help')
+        nose.tools.assert_true('Search for users' in output)
+        nose.tools.assert_equal([], modules)
+        nose.tools.assert_equal([], os.listdir(self.directory))
+
+    def test_startup_time(self):
+        # Starting the CLI must stay cheaper than importing requests alone
+        cli_time = self.best_time(['-c', RUN_CLI, '--help', SLOW_MODULES])
+        requests_time = self.best_time(['-c', 'import requests'])
+        nose.tools.assert_less(cli_time, requests_time)
@@ -0,0 +1,161 @@
+__author__ = "Samuel Jackson"
+__date__ = "October 18, 2026"
+__license__ = "MIT"
+
+import json
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from csa_client.request_handler import RequestHandler
+from csa_client.api import CsaAPI
+
+class StubServer(object):
+    """ A local HTTP server which stands in for the CSA application.
+
+    Responses are registered per end point with add() or add_callback().
+    Every request received is recorded in calls as a (method, path,
+    headers, body) tuple. Connections are kept alive between requests.
+    """
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+        stub = self
+        class Handler(StubRequestHandler):
+            server_stub = stub
+
+        self.server = ThreadedHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.daemon = True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handler(self, cls=RequestHandler, *args, **kwargs):
+        """Create a request handler which talks to this server"""
+        handler = cls(*args, **kwargs)
+        handler.DOMAIN_ADDRESS = self.url
+        return handler
+
+    def api(self, **kwargs):
+        """Create an authorized CsaAPI which talks to this server"""
+        tokens = {'access_token': 'abcd', 'refresh_token': 'abcd', 'user_id': 1}
+        api = CsaAPI(tokens=tokens, **kwargs)
+        api.get_session().DOMAIN_ADDRESS = self.url
+        return api
+
+    def add_paged(self, method, end_point, items, max_per_page=None,
+                  send_page_size=False):
+        """Register a list of records served a page at a time
+
+        The page and per_page request parameters select the records
+        returned. Every record is returned if they are not given.
+
+        :param max_per_page: the most records to put on a page
+        :param send_page_size: send the number of records per page in the
+                               X-Per-Page header
+        """
+        def callback(request):
+            params = request.json()
+            if 'page' not in params:
+                return (200, {}, items)
+            per_page = min(params['per_page'], max_per_page or params['per_page'])
+            start = (params['page'] - 1) * per_page
+            headers = {'X-Per-Page': str(per_page)} if send_page_size else {}
+            return (200, headers, items[start:start + per_page])
+        self.add_callback(method, end_point, callback)
+
+    def add(self, method, end_point, end_point_vars={}, status=200, body='',
+            headers={}):
+        """Register a fixed response for an end point"""
+        def callback(request):
+            return (status, headers, body)
+        self.add_callback(method, end_point, callback, end_point_vars)
+
+    def add_callback(self, method, end_point, callback, end_point_vars={}):
+        """Register a function which builds the response for an end point
+
+        The callback is passed a StubRequest and must return a tuple of
+        (status, headers, body).
+        """
+        route = RequestHandler._get_route(end_point)
+        self.routes[(method, route.build_path(end_point_vars))] = callback
+
+    def count(self, path):
+        """Count the requests received for a path"""
+        with self.lock:
+            return len([call for call in self.calls if call[1] == path])
+
+
+class StubRequest(object):
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+
+class ThreadedHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up early (e.g. after a timeout) are expected
+        pass
+
+
+class StubRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_stub = None
+
+    def log_message(self, *args):
+        pass
+
+    def _dispatch(self):
+        length = int(self.headers.get('content-length', 0))
+        body = self.rfile.read(length) if length else ''
+        path = self.path.split('?')[0]
+        request = StubRequest(self.command, path, self.headers, body)
+
+        stub = self.server_stub
+        with stub.lock:
+            stub.calls.append((self.command, path, self.headers, body))
+
+        callback = stub.routes.get((self.command, path))
+        if callback is None:
+            status, headers, body = 404, {}, ''
+        else:
+            status, headers, body = callback(request)
+
+        if not isinstance(body, basestring):
+            body = json.dumps(body)
+
+        self.send_response(status)
+        for key, value in headers.iteritems():
+            self.send_header(key, value)
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_BREW = _dispatch
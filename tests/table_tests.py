@@ -0,0 +1,89 @@
+import unittest
+import nose.tools
+import json
+import array
+
+from test_helpers import load_fixture
+from csa_client.table import ColumnTable, StringColumn, timestamp_to_epoch
+from csa_client.records import User
+
+class ColumnTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.users = json.loads(load_fixture('users/search.json'))
+        self.table = ColumnTable.from_dicts(self.users)
+
+    def test_typed_columns(self):
+        nose.tools.assert_equal(len(self.users), len(self.table))
+        nose.tools.assert_true(isinstance(self.table['id'], array.array))
+        nose.tools.assert_true(isinstance(self.table['grad_year'], array.array))
+        nose.tools.assert_true(isinstance(self.table['created_at'], array.array))
+        nose.tools.assert_true(isinstance(self.table['surname'], StringColumn))
+        nose.tools.assert_equal([u['id'] for u in self.users], list(self.table['id']))
+        nose.tools.assert_equal([u['email'] for u in self.users], list(self.table['email']))
+
+    def test_repeated_strings_are_stored_once(self):
+        phones = self.table['phone']
+        nose.tools.assert_equal(len(set(u['phone'] for u in self.users)),
+                                len(phones.values))
+
+    def test_timestamps(self):
+        nose.tools.assert_almost_equal(1416924930.777,
+                                       timestamp_to_epoch('2014-11-25T14:15:30.777Z'))
+        nose.tools.assert_almost_equal(1416924930.777, self.table['created_at'][0])
+
+    def test_mixed_ids_are_converted(self):
+        broadcasts = json.loads(load_fixture('broadcasts/search.json'))
+        table = ColumnTable.from_dicts(broadcasts)
+        nose.tools.assert_equal(array.array('l', [15, 17]), table['id'])
+
+    def test_missing_values_fall_back_to_string_column(self):
+        table = ColumnTable.from_dicts([{'id': 1, 'grad_year': 1985},
+                                        {'id': 2},
+                                        {'id': 3, 'grad_year': '1990',
+                                         'nickname': 'sam'}])
+        nose.tools.assert_true(isinstance(table['id'], array.array))
+        nose.tools.assert_equal([1985, None, 1990], list(table['grad_year']))
+        nose.tools.assert_equal([None, None, 'sam'], list(table['nickname']))
+
+    def test_filter(self):
+        table = self.table.filter('jobs', lambda jobs: not jobs)
+        nose.tools.assert_equal([42, 41], list(table['id']))
+        nose.tools.assert_equal(['Jackson', 'Loftus'], list(table['surname']))
+
+        table = self.table.filter('firstname', lambda name: name.startswith('Firstname3'))
+        expected = [u['firstname'] for u in self.users
+                    if u['firstname'].startswith('Firstname3')]
+        nose.tools.assert_equal(expected, list(table['firstname']))
+
+    def test_sort(self):
+        table = self.table.sort('id')
+        nose.tools.assert_equal(sorted(u['id'] for u in self.users), list(table['id']))
+
+        table = self.table.sort('surname', reverse=True)
+        nose.tools.assert_equal(sorted((u['surname'] for u in self.users), reverse=True),
+                                list(table['surname']))
+
+    def test_sort_is_stable(self):
+        table = self.table.sort('id').sort('jobs')
+        nose.tools.assert_equal([41, 42, 1, 2], list(table['id'])[:4])
+
+    def test_group_by_and_count_by(self):
+        groups = self.table.group_by('jobs')
+        nose.tools.assert_equal([0, 1], list(groups))
+        nose.tools.assert_equal(2, len(groups[0]))
+        nose.tools.assert_equal({1985: len(self.users)}, self.table.count_by('grad_year'))
+        nose.tools.assert_equal(1, self.table.count_by('surname')['Jackson'])
+
+    def test_rows(self):
+        users = [User.from_dict(user) for user in self.users[:2]]
+        table = ColumnTable.from_dicts(users)
+        rows = list(table)
+        nose.tools.assert_equal('Jackson', rows[0]['surname'])
+        nose.tools.assert_equal(41, table.row(1)['id'])
+        nose.tools.assert_equal(0, rows[1]['jobs'])
+
+    def test_empty_table(self):
+        table = ColumnTable.from_dicts([])
+        nose.tools.assert_equal(0, len(table))
+        nose.tools.assert_equal([], list(table))
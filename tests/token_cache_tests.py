@@ -1,7 +1,7 @@
 import unittest
 import nose.tools
-import pickledb
 import os
+import threading
 
 from test_helpers import *
 from csa_client.token_cache import TokenCache
@@ -12,8 +12,9 @@ class TokenCacheTest(unittest.TestCase):
         self.tokens = {'access_token': 'abcd', 'refresh_token': 'abcd'}
 
     def tearDown(self):
-        if os.path.isfile(constants.TOKEN_FILE):
-            os.remove(constants.TOKEN_FILE)
+        for path in (constants.TOKEN_FILE, constants.TOKEN_LOCK_FILE):
+            if os.path.isfile(path):
+                os.remove(path)
 
     def test_cache_and_load(self):
         TokenCache.cache_tokens(self.tokens)
@@ -21,3 +22,66 @@ class TokenCacheTest(unittest.TestCase):
 
         tokens = TokenCache.load_tokens()
         nose.tools.assert_dict_equal(self.tokens, tokens)
+
+    def test_cache_and_load_expiry(self):
+        self.tokens.update({'expires_in': 7200, 'issued_at': 1418000000.5})
+        TokenCache.cache_tokens(self.tokens)
+
+        tokens = TokenCache.load_tokens()
+        nose.tools.assert_dict_equal(self.tokens, tokens)
+
+    def test_unchanged_tokens_are_not_written(self):
+        nose.tools.assert_true(TokenCache.cache_tokens(self.tokens))
+        modified = os.stat(constants.TOKEN_FILE).st_ino
+
+        nose.tools.assert_false(TokenCache.cache_tokens(dict(self.tokens)))
+        nose.tools.assert_equal(modified, os.stat(constants.TOKEN_FILE).st_ino)
+
+        self.tokens['access_token'] = 'efgh'
+        nose.tools.assert_true(TokenCache.cache_tokens(self.tokens))
+        nose.tools.assert_equal('efgh', TokenCache.load_tokens()['access_token'])
+
+    def test_reads_pickledb_cache(self):
+        with open(constants.TOKEN_FILE, 'w') as file_handle:
+            file_handle.write('{"access_token": "abcd", "refresh_token": "abcd"}')
+
+        nose.tools.assert_dict_equal(self.tokens, TokenCache.load_tokens())
+
+    @nose.tools.raises(ValueError)
+    def test_load_missing(self):
+        TokenCache.load_tokens()
+
+    @nose.tools.raises(ValueError)
+    def test_load_corrupt(self):
+        with open(constants.TOKEN_FILE, 'w') as file_handle:
+            file_handle.write('{"access_token": "ab')
+        TokenCache.load_tokens()
+
+    def test_concurrent_writers(self):
+        TokenCache.cache_tokens(self.tokens)
+        errors = []
+
+        def write(worker):
+            for i in range(50):
+                token = '%d-%d' % (worker, i)
+                TokenCache.cache_tokens({'access_token': token, 'refresh_token': token})
+
+        def read():
+            for i in range(200):
+                try:
+                    tokens = TokenCache.load_tokens()
+                    nose.tools.assert_equal(tokens['access_token'], tokens['refresh_token'])
+                except Exception, e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        threads.append(threading.Thread(target=read))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        nose.tools.assert_equal([], errors)
+        leftovers = [f for f in os.listdir('.') if f.startswith('.csa_tokens') and
+                     f not in ('.csa_tokens.json', '.csa_tokens.json.lock')]
+        nose.tools.assert_equal([], leftovers)
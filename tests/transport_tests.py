@@ -0,0 +1,122 @@
+import unittest
+import nose.tools
+import requests
+import threading
+import time
+
+from stub_server import StubServer
+from csa_client.transport import TransportConfig, PoolStats
+
+class TransportConfigTests(unittest.TestCase):
+
+    def test_copy(self):
+        config = TransportConfig(pool_maxsize=2, read_timeout=5)
+        bigger = config.copy(pool_maxsize=20)
+
+        nose.tools.assert_equal(2, config.pool_maxsize)
+        nose.tools.assert_equal(20, bigger.pool_maxsize)
+        nose.tools.assert_equal((config.connect_timeout, 5), bigger.timeout)
+
+
+class PooledTransportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.server.add('GET', '/users/search', body='[]')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_connections_are_reused(self):
+        handler = self.server.handler()
+        for _ in range(5):
+            handler.make_request('/users/search')
+
+        stats = handler.pool_stats.as_dict()
+        nose.tools.assert_equal({'opened': 1, 'reused': 4, 'discarded': 0}, stats)
+
+    def test_keep_alive_disabled(self):
+        handler = self.server.handler(transport=TransportConfig(keep_alive=False))
+        for _ in range(3):
+            handler.make_request('/users/search')
+
+        nose.tools.assert_equal(3, handler.pool_stats.opened)
+        nose.tools.assert_equal(0, handler.pool_stats.reused)
+
+    def test_exhausted_pool_discards_connections(self):
+        def slow_response(request):
+            time.sleep(0.1)
+            return (200, {}, '[]')
+        self.server.add_callback('GET', '/broadcasts/search', slow_response)
+
+        handler = self.server.handler(transport=TransportConfig(pool_maxsize=1))
+        threads = [threading.Thread(target=handler.make_request,
+                                    args=('/broadcasts/search',))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        nose.tools.assert_equal(4, handler.pool_stats.opened)
+        nose.tools.assert_equal(3, handler.pool_stats.discarded)
+
+    def test_blocking_pool_reuses_connections(self):
+        def slow_response(request):
+            time.sleep(0.05)
+            return (200, {}, '[]')
+        self.server.add_callback('GET', '/broadcasts/search', slow_response)
+
+        config = TransportConfig(pool_maxsize=1, pool_block=True)
+        handler = self.server.handler(transport=config)
+        threads = [threading.Thread(target=handler.make_request,
+                                    args=('/broadcasts/search',))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = handler.pool_stats.as_dict()
+        nose.tools.assert_equal({'opened': 1, 'reused': 3, 'discarded': 0}, stats)
+
+    @nose.tools.raises(requests.exceptions.Timeout)
+    def test_read_timeout(self):
+        def slow_response(request):
+            time.sleep(0.5)
+            return (200, {}, '[]')
+        self.server.add_callback('GET', '/broadcasts/search', slow_response)
+
+        handler = self.server.handler(transport=TransportConfig(read_timeout=0.05))
+        handler.make_request('/broadcasts/search')
+
+    def test_ensure_pool_size_keeps_stats(self):
+        handler = self.server.handler()
+        handler.make_request('/users/search')
+        handler.ensure_pool_size(50)
+        handler.make_request('/users/search')
+
+        nose.tools.assert_equal(50, handler.transport.pool_maxsize)
+        nose.tools.assert_true(handler.transport.pool_block)
+        nose.tools.assert_equal(2, handler.pool_stats.opened)
+
+    def test_set_transport_closes_old_adapter(self):
+        handler = self.server.handler()
+        handler.make_request('/users/search')
+        adapter = handler.session.get_adapter(self.server.url)
+        nose.tools.assert_equal(1, len(adapter.poolmanager.pools))
+
+        handler.ensure_pool_size(50)
+        nose.tools.assert_equal(0, len(adapter.poolmanager.pools))
+        nose.tools.assert_is_not(adapter, handler.session.get_adapter(self.server.url))
+
+
+class PoolStatsTests(unittest.TestCase):
+
+    def test_reset(self):
+        stats = PoolStats()
+        stats.increment('opened')
+        stats.increment('reused')
+        stats.reset()
+        nose.tools.assert_equal({'opened': 0, 'reused': 0, 'discarded': 0},
+                                stats.as_dict())
@@ -0,0 +1,123 @@
+import unittest
+import nose.tools
+import requests
+import json
+import shutil
+import tempfile
+
+from requests.exceptions import HTTPError, ConnectionError, ReadTimeout
+from test_helpers import *
+from stub_server import StubServer
+from csa_client.http_cache import HTTPCache
+from csa_client.watch import watch, broadcast_key
+
+def broadcast(broadcast_id, created_at):
+    return {'id': broadcast_id, 'user_id': 41, 'content': 'post %s' % broadcast_id,
+            'created_at': created_at, 'updated_at': created_at}
+
+def server_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return HTTPError("%d error" % status, response=response)
+
+class WatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.waits = []
+        self.since = []
+
+    def run_watch(self, results, **kwargs):
+        results = list(results)
+
+        def poll(since):
+            self.since.append(since)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        kwargs.setdefault('max_polls', len(results))
+        return list(watch(poll, interval=1, max_interval=8,
+                          sleep=self.waits.append, **kwargs))
+
+    def test_existing_broadcasts_are_skipped(self):
+        first = [broadcast(1, '2014-12-01'), broadcast(2, '2014-12-02')]
+        second = first + [broadcast(4, '2014-12-03'), broadcast('3', '2014-12-03')]
+        found = self.run_watch([first, second, second])
+
+        nose.tools.assert_equal(['3', 4], [b['id'] for b in found])
+        nose.tools.assert_equal([None, '2014-12-02', '2014-12-03'], self.since)
+
+    def test_empty_first_poll(self):
+        found = self.run_watch([[], [broadcast(1, '2014-12-01')]])
+        nose.tools.assert_equal([1], [b['id'] for b in found])
+
+    def test_resume_after_last(self):
+        existing = [broadcast(1, '2014-12-01'), broadcast(2, '2014-12-02')]
+        found = self.run_watch([existing], last=existing[0])
+        nose.tools.assert_equal([2], [b['id'] for b in found])
+        nose.tools.assert_equal(['2014-12-01'], self.since)
+
+    def test_adaptive_interval(self):
+        existing = [broadcast(1, '2014-12-01')]
+        newer = existing + [broadcast(2, '2014-12-02')]
+        self.run_watch([existing, None, None, None, None, newer, newer])
+        nose.tools.assert_equal([2, 4, 8, 8, 8, 1], self.waits)
+
+    def test_errors_back_off(self):
+        existing = [broadcast(1, '2014-12-01')]
+        newer = existing + [broadcast(2, '2014-12-02')]
+        found = self.run_watch([existing, ConnectionError(), ReadTimeout(),
+                                server_error(503), newer])
+        nose.tools.assert_equal([2], [b['id'] for b in found])
+        nose.tools.assert_equal([2, 4, 8, 8], self.waits)
+
+    @nose.tools.raises(HTTPError)
+    def test_client_errors_stop_watching(self):
+        self.run_watch([[], server_error(401)])
+
+    def test_broadcast_key(self):
+        nose.tools.assert_true(broadcast_key(broadcast('15', '2014-12-01')) <
+                               broadcast_key(broadcast(17, '2014-12-01')))
+        nose.tools.assert_true(broadcast_key(broadcast(17, '2014-12-01')) <
+                               broadcast_key(broadcast(2, '2014-12-02')))
+
+
+class WatchBroadcastsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = StubServer().start()
+        self.broadcasts = json.loads(load_fixture('broadcasts/search.json'))
+
+        def search(request):
+            etag = '"%d"' % len(self.broadcasts)
+            if request.headers.get('if-none-match') == etag:
+                return (304, {'ETag': etag}, '')
+            return (200, {'ETag': etag}, json.dumps(self.broadcasts))
+
+        self.server.add_callback('GET', '/broadcasts/search', search)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_watch_broadcasts(self):
+        api = self.server.api(http_cache=HTTPCache(self.directory))
+        new = broadcast(18, '2014-12-06T10:00:00.000Z')
+
+        def sleep(seconds):
+            if len(self.server.calls) == 3:
+                self.broadcasts.append(new)
+
+        found = list(api.watch_broadcasts(sleep=sleep, max_polls=5))
+        nose.tools.assert_equal([new], found)
+
+        requests = [json.loads(call[3]) for call in self.server.calls]
+        nose.tools.assert_true('updated_since' not in requests[0])
+        nose.tools.assert_equal('2014-12-05T14:22:07.817Z', requests[1]['updated_since'])
+        nose.tools.assert_equal('2014-12-06T10:00:00.000Z', requests[4]['updated_since'])
+
+        #unchanged searches were revalidated rather than downloaded again
+        headers = [call[2] for call in self.server.calls]
+        nose.tools.assert_equal('"2"', headers[2].get('if-none-match'))